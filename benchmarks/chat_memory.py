@@ -0,0 +1,142 @@
+"""Память на состояние чатов и восстановление вытесненных чатов.
+
+Моделирует --chats чатов, каждый из которых получил карточку, и проверяет:
+
+- размер одного чата по tracemalloc и оценку ChatCache.memory_usage();
+- что в памяти остается не больше --limit чатов, а вытесненные сверх
+  предела сохраняются в хранилище;
+- вытеснение неактивных чатов по времени (активна доля --active);
+- что вытесненный чат восстанавливается из хранилища с той же карточкой.
+
+При нарушениях скрипт завершается с кодом 1.
+
+Запуск из корня репозитория:
+    python -m benchmarks.chat_memory --chats 1000000 --limit 200000
+    python -m benchmarks.chat_memory --chats 100000 --storage sqlite
+"""
+import argparse
+import random
+import resource
+import sys
+import time
+import tracemalloc
+
+from englishcard.state import ChatCache, ChatState, chats, get_chat
+from englishcard.storage import set_storage
+from englishcard.storage.memory import MemoryStorage
+from englishcard.storage.sqlite import SQLiteStorage
+
+FIRST_CHAT_ID = 900_000_000
+
+
+def copy_str(value: str) -> str:
+    """Новая строка с тем же текстом: слова карточки приходят из базы новыми объектами."""
+    return (value + ' ')[:-1]
+
+
+def make_card(words: list, cid: int) -> dict:
+    word_id, word, translation = words[cid % len(words)]
+    options = [copy_str(word)] + [copy_str(other[1]) for other in random.sample(words, 3)]
+    random.shuffle(options)
+    return {
+        'target_word': copy_str(word),
+        'translate_word': copy_str(translation),
+        'word_id': word_id,
+        'options': options,
+        'mode': 'all',
+        'shown_at': time.time()
+    }
+
+
+def measure_chat_size(words: list, count: int) -> None:
+    """Размер чата по tracemalloc в сравнении с оценкой memory_usage()."""
+    cache = ChatCache(limit=count)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(count):
+        cid = FIRST_CHAT_ID + i
+        cache.add(cid, ChatState(card=make_card(words, cid), accuracy=0.5))
+    traced = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    _, estimated = cache.memory_usage()
+    print(f"Размер чата: {traced / count:.0f} байт по tracemalloc, "
+          f"{estimated / count:.0f} байт по оценке memory_usage()")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chats', type=int, default=1_000_000, help="количество чатов")
+    parser.add_argument('--limit', type=int, default=200_000, help="предел чатов в памяти")
+    parser.add_argument('--active', type=float, default=0.1,
+                        help="доля чатов в памяти, активных перед вытеснением по времени")
+    parser.add_argument('--rehydrate', type=int, default=10_000,
+                        help="количество восстанавливаемых из хранилища чатов")
+    parser.add_argument('--sample', type=int, default=10_000,
+                        help="чатов для замера размера через tracemalloc")
+    parser.add_argument('--storage', choices=('memory', 'sqlite'), default='memory',
+                        help="хранилище для вытесненных чатов")
+    parser.add_argument('--seed', type=int, default=None, help="seed генератора случайных чисел")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    storage = MemoryStorage() if args.storage == 'memory' else SQLiteStorage(':memory:')
+    storage.initialize()
+    set_storage(storage)
+    words = [(word_id, word, translation) for word_id, word, translation, _ in storage.get_word_difficulties()]
+
+    measure_chat_size(words, args.sample)
+
+    # Каждый чат получает первую карточку, как после /start
+    chats.clear()
+    chats.limit = args.limit
+    chat_ids = [FIRST_CHAT_ID + i for i in range(args.chats)]
+    started = time.perf_counter()
+    for cid in chat_ids:
+        storage.ensure_user_exists(cid, None)
+    seeded = time.perf_counter() - started
+
+    started = time.perf_counter()
+    max_chats = 0
+    for cid in chat_ids:
+        chat = get_chat(cid) or chats.add(cid, ChatState())
+        chat.card = make_card(words, cid)
+        chat.accuracy = random.random()
+        max_chats = max(max_chats, len(chats))
+    elapsed = time.perf_counter() - started
+    count, size = chats.memory_usage()
+    print(f"{args.chats} чатов (пользователи созданы за {seeded:.1f} с) за {elapsed:.1f} с: "
+          f"в памяти {count} (максимум {max_chats}), {size / 2 ** 20:.0f} МБ, "
+          f"{size // max(count, 1)} байт на чат")
+    print(f"  пиковый RSS процесса: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} МБ")
+
+    # Часть чатов в памяти остается активной, остальные вытесняются по времени
+    active = random.sample([cid for cid, _ in chats.items()], int(count * args.active))
+    cutoff = time.monotonic()
+    for cid in active:
+        chats.get(cid)
+    started = time.perf_counter()
+    evicted = chats.evict_idle(now=cutoff + chats.ttl)
+    elapsed = time.perf_counter() - started
+    print(f"Вытеснено неактивных: {evicted} за {elapsed:.2f} с "
+          f"({elapsed / max(evicted, 1) * 1e6:.1f} мкс на чат), в памяти {len(chats)}")
+
+    # Вытесненные чаты восстанавливаются из хранилища с той же карточкой
+    in_memory = set(cid for cid, _ in chats.items())
+    returning = random.sample([cid for cid in chat_ids if cid not in in_memory],
+                              min(args.rehydrate, args.chats - len(in_memory)))
+    started = time.perf_counter()
+    mismatches = 0
+    for cid in returning:
+        chat = get_chat(cid)
+        if chat is None or chat.card is None or chat.card['word_id'] != words[cid % len(words)][0]:
+            mismatches += 1
+    elapsed = time.perf_counter() - started
+    print(f"Восстановлено из хранилища: {len(returning)} чатов, "
+          f"{elapsed / max(len(returning), 1) * 1e6:.1f} мкс на чат, карточка не совпала: {mismatches}")
+
+    if max_chats > args.limit or len(chats) > args.limit or mismatches or len(in_memory) != len(active):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""Нагрузочная проверка обработки всплесков обновлений.
+
+Воспроизводит быстрые серии нажатий в множестве чатов: обновления
+одного чата идут подряд, чаты перемешаны. Запросы к Telegram API
+перехватываются, каждый ответ задерживается на --latency мс.
+Проверяется, что:
+
+- обработчики одного чата не выполняются одновременно;
+- после правильного ответа клавиатура содержит слова карточки этого чата;
+- количество выученных слов совпадает с количеством ответов "Отлично!".
+
+--dispatch chat использует очередь на каждый чат (:class:`ChatTeleBot`),
+--dispatch pool - общий пул потоков telebot для сравнения. При нарушениях
+скрипт завершается с кодом 1.
+
+Запуск из корня репозитория:
+    python -m benchmarks.dispatch_stress --chats 200 --rounds 5 --burst 4 --workers 16
+    python -m benchmarks.dispatch_stress --dispatch pool
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+import telebot
+from telebot import TeleBot, custom_filters, types
+
+from benchmarks.startup import FakeResponse
+from englishcard import create_app
+from englishcard.handlers import Command, register_handlers
+from englishcard.i18n import get_text
+from englishcard.state import state_storage
+from englishcard.storage import create_storage
+from englishcard.storage.base import write_deck_csv
+
+FIRST_CHAT_ID = 900_000_000
+
+
+class RecordingStub:
+    """Перехватчик запросов, отслеживающий одновременные запросы одного чата."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.in_flight = Counter()
+        self.overlaps = Counter()
+        self.praised = Counter()
+        self.keyboard_errors = []
+        self.last_request_at = time.perf_counter()
+
+    def __call__(self, method, url, params=None, **kwargs):
+        params = params or {}
+        chat_id = int(params.get('chat_id', 0))
+        with self.lock:
+            self.in_flight[chat_id] += 1
+            if self.in_flight[chat_id] > 1:
+                self.overlaps[chat_id] += 1
+        try:
+            if url.endswith('sendMessage'):
+                self.check_message(chat_id, params)
+            time.sleep(self.latency)
+        finally:
+            with self.lock:
+                self.in_flight[chat_id] -= 1
+                self.last_request_at = time.perf_counter()
+
+        return FakeResponse({
+            'message_id': 1,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'text': params.get('text', ''),
+        })
+
+    def check_message(self, chat_id: int, params: dict) -> None:
+        text = params.get('text', '')
+        if not text.startswith(get_text('answer.correct')):
+            return
+        target_word = text.splitlines()[1].split(' -> ')[0]
+        keyboard = json.loads(params.get('reply_markup') or '{}').get('keyboard', [])
+        options = {button['text'] for row in keyboard for button in row}
+        with self.lock:
+            self.praised[chat_id] += 1
+            if target_word not in options:
+                self.keyboard_errors.append((chat_id, target_word))
+
+
+def make_update(update_id: int, chat_id: int, text: str) -> types.Update:
+    message = {
+        'message_id': update_id,
+        'date': int(time.time()),
+        'chat': {'id': chat_id, 'type': 'private'},
+        'from': {'id': chat_id, 'is_bot': False, 'first_name': 'Stress'},
+        'text': text,
+    }
+    if text.startswith('/'):
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text)}]
+    return types.Update.de_json(json.dumps({'update_id': update_id, 'message': message}))
+
+
+def make_updates(chats: int, rounds: int, burst: int, words: list) -> list:
+    """Обновления: /start в каждом чате, затем серии нажатий вперемешку между чатами."""
+    chat_ids = [FIRST_CHAT_ID + i for i in range(chats)]
+    taps = words + [get_text(Command.NEXT)]
+    updates = [make_update(i + 1, chat_id, '/start') for i, chat_id in enumerate(chat_ids)]
+    for _ in range(rounds):
+        random.shuffle(chat_ids)
+        for chat_id in chat_ids:
+            for _ in range(burst):
+                updates.append(make_update(len(updates) + 1, chat_id, random.choice(taps)))
+    return updates
+
+
+def create_pool_bot(workers: int) -> TeleBot:
+    bot = TeleBot('0:stress', state_storage=state_storage, parse_mode=None,
+                  threaded=True, num_threads=workers)
+    register_handlers(bot)
+    bot.add_custom_filter(custom_filters.StateFilter(bot))
+    return bot
+
+
+def wait_pool(bot: TeleBot, stub: RecordingStub, quiet: float = 0.5) -> None:
+    while not bot.worker_pool.tasks.empty() or time.perf_counter() - stub.last_request_at < quiet:
+        time.sleep(0.05)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dispatch', choices=('chat', 'pool'), default='chat',
+                        help="очередь на каждый чат или общий пул telebot")
+    parser.add_argument('--chats', type=int, default=200, help="количество чатов")
+    parser.add_argument('--rounds', type=int, default=5, help="серий нажатий в каждом чате")
+    parser.add_argument('--burst', type=int, default=4, help="нажатий в серии")
+    parser.add_argument('--words', type=int, default=12, help="слов в словаре")
+    parser.add_argument('--workers', type=int, default=16, help="потоков обработки")
+    parser.add_argument('--latency', type=float, default=2.0,
+                        help="задержка ответа Telegram API, мс")
+    parser.add_argument('--seed', type=int, default=None, help="seed генератора случайных чисел")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    stub = RecordingStub(args.latency / 1000)
+    telebot.apihelper.CUSTOM_REQUEST_SENDER = stub
+
+    storage = create_storage('memory')
+    words = [f'word{i}' for i in range(args.words)]
+    storage.import_deck('stress', write_deck_csv((word, f'слово{word[4:]}') for word in words), None)
+
+    if args.dispatch == 'chat':
+        bot = create_app(token='0:stress', storage=storage, workers=args.workers)
+    else:
+        create_app(token='0:stress', threaded=False, storage=storage)
+        bot = create_pool_bot(args.workers)
+
+    updates = make_updates(args.chats, args.rounds, args.burst, words)
+    started = time.perf_counter()
+    for i in range(0, len(updates), 100):
+        bot.process_new_updates(updates[i:i + 100])
+    if args.dispatch == 'chat':
+        bot.dispatcher.wait()
+        bot.dispatcher.close()
+        elapsed = time.perf_counter() - started
+    else:
+        wait_pool(bot, stub)
+        elapsed = stub.last_request_at - started
+
+    learned_errors = {}
+    for i in range(args.chats):
+        chat_id = FIRST_CHAT_ID + i
+        learned = storage.get_user_words_count(chat_id)
+        if learned != stub.praised[chat_id]:
+            learned_errors[chat_id] = (learned, stub.praised[chat_id])
+
+    print(f"{args.dispatch}: {len(updates)} обновлений, {args.chats} чатов, "
+          f"{args.workers} потоков за {elapsed:.2f} с ({len(updates) / elapsed:.0f} обновлений/с)")
+    print(f"  одновременная обработка одного чата: {sum(stub.overlaps.values())} "
+          f"(чатов: {len(stub.overlaps)})")
+    print(f"  клавиатура без слова карточки: {len(stub.keyboard_errors)}")
+    print(f"  выучено слов не равно ответам 'Отлично!': {len(learned_errors)} чатов")
+
+    if stub.overlaps or stub.keyboard_errors or learned_errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""Время планирования горячих запросов: текст запроса против EXECUTE.
+
+Заполняет отдельную схему PostgreSQL так же, как benchmarks.query_plans,
+и сравнивает два способа выполнить запросы одной карточки (выбор слова,
+варианты ответа, проверка и отметка выученного слова, подсчет слов)
+на одном долгоживущем соединении:
+
+- text - текст запроса отправляется и разбирается сервером каждый раз;
+- prepared - подготовленные запросы из englishcard.storage.postgres.STATEMENTS.
+
+Для каждого способа выводится время карточки и время планирования из
+EXPLAIN (ANALYZE), а также время открытия соединения, которое раньше
+тратилось на каждую операцию. Все изменения откатываются.
+
+Запуск из корня репозитория (переменные DB_* из .env):
+    python -m benchmarks.prepared_statements --scale 10000x100000 --cards 500
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.query_plans import parse_scale, seed
+from englishcard.storage import queries
+from englishcard.storage.base import DEFAULT_PAIR_ID
+from englishcard.storage.postgres import STATEMENTS, get_connection
+from englishcard.storage.prepared import PreparedConnection
+
+# Запросы карточки в порядке выполнения ботом и текст каждого из них
+CARD_QUERIES: Dict[str, str] = {
+    'get_random_word_all': queries.SQL_GET_RANDOM_WORD_ALL,
+    'get_other_words': queries.SQL_GET_OTHER_WORDS,
+    'check_user_word': queries.SQL_CHECK_USER_WORD,
+    'insert_user_word': queries.SQL_INSERT_USER_WORD,
+    'count_user_words': queries.SQL_COUNT_USER_WORDS,
+}
+
+
+def get_card_params(user_id: int, word_id: int) -> Dict[str, tuple]:
+    return {
+        'get_random_word_all': (DEFAULT_PAIR_ID, user_id, DEFAULT_PAIR_ID, user_id),
+        'get_other_words': (DEFAULT_PAIR_ID, user_id, DEFAULT_PAIR_ID, word_id, 3),
+        'check_user_word': (user_id, word_id),
+        'insert_user_word': (user_id, word_id),
+        'count_user_words': (user_id,),
+    }
+
+
+def text_executor(conn) -> Callable:
+    def execute(cur, name: str, params: tuple) -> None:
+        cur.execute(CARD_QUERIES[name], params)
+    return execute
+
+
+def prepared_executor(conn) -> Callable:
+    prepared = PreparedConnection(conn, STATEMENTS)
+    return lambda cur, name, params: prepared.execute(cur, name, params)
+
+
+EXECUTORS = {'text': text_executor, 'prepared': prepared_executor}
+
+
+def run_cards(conn, execute: Callable, user_ids: List[int]) -> List[float]:
+    """Показ и правильный ответ на карточку для каждого пользователя, как в боте."""
+    timings = []
+    with conn.cursor() as cur:
+        for user_id in user_ids:
+            started = time.perf_counter()
+            execute(cur, 'get_random_word_all', get_card_params(user_id, 0)['get_random_word_all'])
+            row = cur.fetchone()
+            if row is None:
+                continue
+            params = get_card_params(user_id, row[0])
+            execute(cur, 'get_other_words', params['get_other_words'])
+            cur.fetchall()
+            execute(cur, 'check_user_word', params['check_user_word'])
+            if cur.fetchone() is None:
+                execute(cur, 'insert_user_word', params['insert_user_word'])
+            execute(cur, 'count_user_words', params['count_user_words'])
+            cur.fetchone()
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+def measure_planning(conn, mode: str, cards: List[Tuple[int, int]]) -> Dict[str, List[float]]:
+    """Время планирования каждого запроса карточки по EXPLAIN (ANALYZE)."""
+    planning: Dict[str, List[float]] = {name: [] for name in CARD_QUERIES}
+    prepared = PreparedConnection(conn, STATEMENTS)
+    with conn.cursor() as cur:
+        for user_id, word_id in cards:
+            for name, params in get_card_params(user_id, word_id).items():
+                if mode == 'prepared':
+                    prepared.registry.prepare(cur, prepared.prepared, name)
+                    query = cur.mogrify(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+                else:
+                    query = cur.mogrify(CARD_QUERIES[name], params)
+                cur.execute(b"EXPLAIN (ANALYZE, FORMAT JSON) " + query)
+                planning[name].append(cur.fetchone()[0][0]['Planning Time'])
+    return planning
+
+
+def print_plan_cache(conn) -> None:
+    """Сколько раз сервер использовал общий план подготовленного запроса (PostgreSQL 14+)."""
+    with conn.cursor() as cur:
+        try:
+            cur.execute("SELECT name, generic_plans, custom_plans FROM pg_prepared_statements ORDER BY name")
+        except Exception:
+            conn.rollback()
+            return
+        for name, generic, custom in cur.fetchall():
+            print(f"  {name:22} общий план {generic}, частный план {custom}")
+
+
+def reset(conn) -> None:
+    """Откат изменений и удаление подготовленных запросов вне транзакции."""
+    conn.rollback()
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute("DEALLOCATE ALL")
+    conn.autocommit = False
+
+
+def measure_connect(repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn = get_connection()
+        timings.append(time.perf_counter() - started)
+        if conn:
+            conn.close()
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', default='10000x100000', help="пользователей x слов")
+    parser.add_argument('--cards', type=int, default=500, help="карточек для замера")
+    parser.add_argument('--personal', type=int, default=5, help="личных слов у пользователя")
+    parser.add_argument('--learned', type=int, default=100, help="выученных слов у пользователя")
+    parser.add_argument('--deck-size', type=int, default=500, help="слов в колоде")
+    parser.add_argument('--events', type=int, default=0, help="ответов в журнале")
+    parser.add_argument('--pairs', type=int, default=0, help="дополнительных языковых пар того же размера")
+    parser.add_argument('--keep', action='store_true', help="не удалять схему после замера")
+    args = parser.parse_args()
+
+    users, words = parse_scale(args.scale)
+    conn = get_connection()
+    if not conn:
+        sys.exit(2)
+    schema = f"prepared_statements_{users}_{words}"
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            started = time.perf_counter()
+            seed(cur, schema, users, words, args)
+            print(f"{users} пользователей x {words} слов: заполнено за {time.perf_counter() - started:.1f} с")
+        conn.autocommit = False
+
+        user_ids = random.sample(range(1, users + 1), min(args.cards, users))
+        with conn.cursor() as cur:
+            cards = []
+            for user_id in user_ids:
+                cur.execute(queries.SQL_GET_RANDOM_WORD_ALL, get_card_params(user_id, 0)['get_random_word_all'])
+                row = cur.fetchone()
+                if row:
+                    cards.append((user_id, row[0]))
+        conn.rollback()
+
+        results = {}
+        for mode, executor in EXECUTORS.items():
+            # Прогрев кэша страниц, затем замер; изменения откатываются
+            run_cards(conn, executor(conn), user_ids[:20])
+            reset(conn)
+            timings = run_cards(conn, executor(conn), user_ids)
+            if mode == 'prepared':
+                print_plan_cache(conn)
+            reset(conn)
+            planning = measure_planning(conn, mode, cards)
+            reset(conn)
+
+            per_card = sum(statistics.mean(values) for values in planning.values())
+            results[mode] = per_card
+            print(f"{mode:9} карточка: медиана {statistics.median(timings) * 1000:.3f} мс, "
+                  f"p95 {sorted(timings)[int(len(timings) * 0.95)] * 1000:.3f} мс; "
+                  f"планирование {per_card:.3f} мс на карточку")
+            for name, values in planning.items():
+                print(f"  {name:22} планирование {statistics.mean(values):.3f} мс")
+
+        print(f"Сэкономлено на планировании: {results['text'] - results['prepared']:.3f} мс на карточку")
+        print(f"Открытие соединения: {measure_connect(10) * 1000:.1f} мс "
+              f"(раньше на каждую из {len(CARD_QUERIES) - 1} операций карточки)")
+    finally:
+        if not args.keep:
+            conn.rollback()
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
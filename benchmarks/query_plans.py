@@ -0,0 +1,440 @@
+"""Проверка планов SQL запросов PostgreSQL.
+
+Для каждого масштаба (пользователей x слов) создает отдельную схему в
+базе из переменных DB_* (.env), заполняет ее через generate_series,
+выполняет EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) для каждого запроса
+бота и сохраняет время планирования и выполнения, прочитанные буферы
+и форму плана. Запросы карточек выполняются в языковой паре 1, а в
+базу добавляются еще --pairs пар того же размера (по умолчанию 3).
+Если пара 1 занимает больше половины общих слов (--pairs 0), Seq Scan по
+words для запросов карточек разрешен. Скрипт
+завершается с кодом 1, если запрос читает большую таблицу
+последовательным просмотром (Seq Scan) там, где ожидается индекс,
+запрос карточек читает строки words вне своей пары или медиана времени
+выполнения превышает бюджет.
+
+Изменяющие запросы выполняются в транзакции, которая откатывается.
+Схема удаляется после проверки (кроме запуска с --keep), данные бота
+не затрагиваются.
+
+Запуск из корня репозитория:
+    python -m benchmarks.query_plans --scale 10000x100000 --scale 20000x500000
+    python -m benchmarks.query_plans --output plans.json --baseline plans-main.json
+    python -m benchmarks.query_plans --scale 10000x100000 --pairs 0
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, NamedTuple, Tuple
+
+from englishcard.storage import queries
+from englishcard.storage.base import DEFAULT_PAIR_ID, get_month_start
+from englishcard.storage.postgres import (
+    SQL_CREATE_ANSWER_PARTITION,
+    SQL_MIGRATE_ANSWER_EVENTS,
+    SQL_MIGRATE_CHAT_STATE,
+    SQL_MIGRATE_DECKS,
+    SQL_MIGRATE_LANGUAGE_PAIRS,
+    SQL_MIGRATE_PERSONAL_WORDS,
+    SQL_MIGRATE_USER_WORDS,
+    SQL_MIGRATE_WORD_DIFFICULTY,
+    get_connection,
+    get_next_month,
+)
+
+# Базовые таблицы из README: остальное создают миграции хранилища
+SQL_BASE_SCHEMA: str = """
+    CREATE TABLE users (
+        user_id BIGINT PRIMARY KEY,
+        username VARCHAR(255)
+    );
+
+    CREATE TABLE words (
+        word_id SERIAL PRIMARY KEY,
+        word VARCHAR(255) NOT NULL,
+        translation VARCHAR(255) NOT NULL,
+        owner_id BIGINT REFERENCES users(user_id) ON DELETE CASCADE
+    );
+
+    CREATE TABLE user_words (
+        user_id BIGINT REFERENCES users(user_id),
+        word_id INTEGER REFERENCES words(word_id),
+        PRIMARY KEY (user_id, word_id)
+    );
+"""
+
+SQL_SEED: str = """
+    INSERT INTO users (user_id, username)
+    SELECT g, 'user' || g FROM generate_series(1, %(users)s) g;
+
+    INSERT INTO words (word, translation)
+    SELECT 'word' || g, 'слово' || g FROM generate_series(1, %(words)s) g;
+
+    INSERT INTO words (word, translation, owner_id)
+    SELECT 'own' || u || '_' || i, 'свое' || i, u
+    FROM generate_series(1, %(users)s) u, generate_series(1, %(personal)s) i;
+
+    INSERT INTO user_words (user_id, word_id)
+    SELECT u, 1 + floor(random() * %(words)s)::int
+    FROM generate_series(1, %(users)s) u, generate_series(1, %(learned)s) i
+    ON CONFLICT DO NOTHING;
+
+    INSERT INTO decks (name)
+    SELECT 'deck' || d FROM generate_series(0, %(decks)s - 1) d;
+
+    INSERT INTO deck_words (deck_id, word_id)
+    SELECT d.deck_id, w.word_id
+    FROM words w
+    JOIN decks d ON d.name = 'deck' || (w.word_id %% %(decks)s)
+    WHERE w.owner_id IS NULL;
+
+    -- Другие языковые пары: их слова не должны попадать в запросы пары 1
+    INSERT INTO language_pairs (source_lang, target_lang)
+    SELECT 'en', 'x' || p FROM generate_series(1, %(pairs)s) p;
+
+    INSERT INTO words (word, translation, pair_id)
+    SELECT 'word' || g, 'pair' || p.pair_id || '_' || g, p.pair_id
+    FROM language_pairs p, generate_series(1, %(words)s) g
+    WHERE p.pair_id <> 1;
+
+    INSERT INTO answer_events (user_id, word_id, mode, correct, latency_ms, answered_at)
+    SELECT 1 + floor(random() * %(users)s)::int, 1 + floor(random() * %(words)s)::int,
+        'all', random() < 0.7, floor(random() * 5000)::int,
+        %(now)s - random() * %(event_days)s * interval '1 day'
+    FROM generate_series(1, %(events)s);
+"""
+
+# За сколько последних дней распределяются ответы журнала: секции
+# создаются для каждого месяца этого периода
+SEED_EVENT_DAYS: int = 60
+
+# Запросы карточек читают слова своей пары через индексы, начинающиеся
+# с pair_id: прочитанных строк words может быть больше, чем слов пары,
+# не больше чем на эту долю (отброшенные фильтром строки других пар и
+# пользователей, перепроверка неточного битового индекса)
+PAIR_ROWS_TOLERANCE: float = 0.05
+
+# Если слова пары составляют больше этой доли общих слов words, индекс
+# по pair_id почти не отсеивает строки, и планировщик вправе выбрать для
+# запросов карточек Seq Scan: тогда он разрешен, а строки вне пары не
+# проверяются
+SEQ_SCAN_PAIR_SHARE: float = 0.5
+
+
+class Statement(NamedTuple):
+    name: str
+    sql: str
+    params: Callable[[dict], tuple]
+    budget_ms: float
+    seq_scan_allowed: Tuple[str, ...] = ()
+    modifies: bool = False
+    pair_rows: bool = False
+
+
+STATEMENTS: List[Statement] = [
+    Statement('get_random_word', queries.SQL_GET_RANDOM_WORD,
+              lambda s: (s['pair_id'], s['user_id'], s['pair_id'], s['user_id']), 150, pair_rows=True),
+    Statement('get_random_word_all', queries.SQL_GET_RANDOM_WORD_ALL,
+              lambda s: (s['pair_id'], s['user_id'], s['pair_id'], s['user_id']), 150, pair_rows=True),
+    Statement('get_other_words', queries.SQL_GET_OTHER_WORDS,
+              lambda s: (s['pair_id'], s['user_id'], s['pair_id'], s['word_id'], 3), 150, pair_rows=True),
+    Statement('get_random_deck_word', queries.SQL_GET_RANDOM_DECK_WORD,
+              lambda s: (s['user_id'], s['deck_id'], s['user_id']), 50),
+    Statement('get_other_deck_words', queries.SQL_GET_OTHER_DECK_WORDS,
+              lambda s: (s['deck_id'], s['user_id'], s['word_id'], 3), 50),
+    Statement('check_user_word', queries.SQL_CHECK_USER_WORD,
+              lambda s: (s['user_id'], s['word_id']), 5),
+    Statement('get_learned_word_ids', queries.SQL_GET_LEARNED_WORD_IDS,
+              lambda s: (s['user_id'], [s['word_id'], s['new_word_id']]), 5),
+    Statement('insert_user_word', queries.SQL_INSERT_USER_WORD,
+              lambda s: (s['user_id'], s['new_word_id']), 5, modifies=True),
+    Statement('delete_user_word',
+              "DELETE FROM user_words WHERE user_id = %s AND word_id = %s",
+              lambda s: (s['user_id'], s['word_id']), 5, modifies=True),
+    Statement('count_user_words', queries.SQL_COUNT_USER_WORDS,
+              lambda s: (s['user_id'],), 5),
+    Statement('count_personal_words', queries.SQL_COUNT_PERSONAL_WORDS,
+              lambda s: (s['user_id'], s['pair_id']), 5),
+    Statement('find_word', queries.SQL_FIND_WORD,
+              lambda s: (s['pair_id'], s['word'], s['user_id'], s['pair_id'], s['word']), 5),
+    Statement('get_user', "SELECT user_id FROM users WHERE user_id = %s",
+              lambda s: (s['user_id'],), 5),
+    Statement('get_user_deck', "SELECT deck_id FROM users WHERE user_id = %s",
+              lambda s: (s['user_id'],), 5),
+    Statement('get_chat_state', queries.SQL_GET_CHAT_STATE,
+              lambda s: (s['user_id'],), 5),
+    Statement('save_chat_state', queries.SQL_SAVE_CHAT_STATE,
+              lambda s: (s['word_id'], 0.5, s['user_id']), 5, modifies=True),
+    Statement('get_decks', queries.SQL_GET_DECKS,
+              lambda s: (s['pair_id'], s['user_id']), 200, ('decks', 'deck_words')),
+    Statement('get_deck', queries.SQL_GET_DECK,
+              lambda s: (s['deck_id'], s['user_id']), 5, ('decks',)),
+    Statement('export_deck',
+              "SELECT w.word, w.translation FROM deck_words dw "
+              "JOIN words w ON w.word_id = dw.word_id "
+              "WHERE dw.deck_id = %s AND (w.owner_id IS NULL OR w.owner_id = %s) "
+              "ORDER BY w.word_id",
+              lambda s: (s['deck_id'], s['user_id']), 100),
+    Statement('delete_word_links', "DELETE FROM user_words WHERE word_id = %s",
+              lambda s: (s['word_id'],), 20, modifies=True),
+    Statement('get_word_difficulties', queries.SQL_GET_WORD_DIFFICULTIES,
+              lambda s: (s['pair_id'],), 300, pair_rows=True),
+    Statement('get_deck_word_difficulties', queries.SQL_GET_DECK_WORD_DIFFICULTIES,
+              lambda s: (s['deck_id'],), 50, pair_rows=True),
+    Statement('get_answer_stats', queries.SQL_GET_ANSWER_STATS,
+              lambda s: (), 30000, ('answer_events',)),
+]
+
+
+def parse_scale(value: str) -> Tuple[int, int]:
+    users, _, words = value.lower().partition('x')
+    return int(users), int(words)
+
+
+def walk(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get('Plans', ()):
+        yield from walk(child)
+
+
+def plan_shape(node: dict) -> str:
+    """Компактная форма плана: узлы, таблицы и индексы без стоимостей."""
+    shape = node['Node Type']
+    if 'Relation Name' in node:
+        shape += f" on {node['Relation Name']}"
+    if 'Index Name' in node:
+        shape += f" using {node['Index Name']}"
+    children = [plan_shape(child) for child in node.get('Plans', ())]
+    if children:
+        shape += f" ({', '.join(children)})"
+    return shape
+
+
+def find_seq_scans(plan: dict, allowed: Tuple[str, ...]) -> List[str]:
+    """Таблицы, прочитанные последовательным просмотром без разрешения.
+
+    Секции журнала ответов (answer_events_ГГГГ_ММ) считаются таблицей answer_events.
+    """
+    return [
+        node['Relation Name'] for node in walk(plan)
+        if node['Node Type'] == 'Seq Scan'
+        and not any(node['Relation Name'] == table or node['Relation Name'].startswith(f'{table}_')
+                    for table in allowed)
+    ]
+
+
+def seed(cur, schema: str, users: int, words: int, args) -> dict:
+    """Создание схемы, заполнение данными и выбор параметров запросов."""
+    cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+    cur.execute(f"CREATE SCHEMA {schema}")
+    cur.execute(f"SET search_path TO {schema}")
+    cur.execute(SQL_BASE_SCHEMA)
+    for migration in (SQL_MIGRATE_PERSONAL_WORDS, SQL_MIGRATE_USER_WORDS, SQL_MIGRATE_DECKS,
+                      SQL_MIGRATE_ANSWER_EVENTS, SQL_MIGRATE_WORD_DIFFICULTY, SQL_MIGRATE_CHAT_STATE,
+                      SQL_MIGRATE_LANGUAGE_PAIRS):
+        cur.execute(migration)
+
+    # Секции журнала за каждый месяц периода, в который попадут ответы
+    now = datetime.now(timezone.utc)
+    month = get_month_start(now)
+    while month >= get_month_start(now - timedelta(days=SEED_EVENT_DAYS)):
+        cur.execute(
+            SQL_CREATE_ANSWER_PARTITION.format(suffix=month.strftime('%Y_%m')),
+            (month, get_next_month(month))
+        )
+        month = get_month_start(month - timedelta(days=1))
+
+    cur.execute(SQL_SEED, {
+        'users': users,
+        'words': words,
+        'personal': args.personal,
+        'learned': args.learned,
+        'decks': max(1, words // args.deck_size),
+        'events': args.events,
+        'pairs': args.pairs,
+        'now': now,
+        'event_days': SEED_EVENT_DAYS,
+    })
+    cur.execute("VACUUM ANALYZE")
+
+    cur.execute("SELECT MIN(deck_id) FROM decks")
+    deck_id = cur.fetchone()[0]
+    cur.execute("""
+        SELECT word_id, word FROM words
+        WHERE owner_id IS NULL AND pair_id = %s ORDER BY word_id OFFSET %s LIMIT 1
+    """, (DEFAULT_PAIR_ID, words // 2))
+    word_id, word = cur.fetchone()
+    cur.execute("""
+        SELECT w.word_id FROM words w
+        LEFT JOIN user_words uw ON uw.word_id = w.word_id AND uw.user_id = %s
+        WHERE w.owner_id IS NULL AND w.pair_id = %s AND uw.user_id IS NULL LIMIT 1
+    """, (users // 2, DEFAULT_PAIR_ID))
+    new_word_id = cur.fetchone()[0]
+    cur.execute("""
+        SELECT COUNT(*) FROM words
+        WHERE pair_id = %s AND (owner_id IS NULL OR owner_id = %s)
+    """, (DEFAULT_PAIR_ID, users // 2))
+    pair_words = cur.fetchone()[0]
+    cur.execute("""
+        SELECT COUNT(*) FILTER (WHERE pair_id = %s)::float / COUNT(*) FROM words
+        WHERE owner_id IS NULL
+    """, (DEFAULT_PAIR_ID,))
+    pair_share = cur.fetchone()[0]
+    return {
+        'pair_id': DEFAULT_PAIR_ID,
+        'user_id': users // 2,
+        'deck_id': deck_id,
+        'word_id': word_id,
+        'word': word,
+        'new_word_id': new_word_id,
+        'pair_words': pair_words,
+        'dense_pair': pair_share > SEQ_SCAN_PAIR_SHARE,
+    }
+
+
+def count_rows_read(plan: dict, table: str) -> int:
+    """Строки таблицы, прочитанные планом: выданные узлами ее просмотра
+    и отброшенные их фильтрами, с учетом числа повторов узла."""
+    return int(sum(
+        (node.get('Actual Rows', 0) + node.get('Rows Removed by Filter', 0)
+         + node.get('Rows Removed by Index Recheck', 0)) * node.get('Actual Loops', 1)
+        for node in walk(plan) if node.get('Relation Name') == table
+    ))
+
+
+def explain(cur, statement: Statement, sample: dict, repeat: int) -> dict:
+    query = cur.mogrify(statement.sql, statement.params(sample)).decode()
+    plans = []
+    for _ in range(repeat):
+        if statement.modifies:
+            cur.execute("BEGIN")
+        try:
+            cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}")
+            result = cur.fetchone()[0]
+            plans.append(result[0] if isinstance(result, list) else json.loads(result)[0])
+        finally:
+            if statement.modifies:
+                cur.execute("ROLLBACK")
+
+    plan = plans[-1]['Plan']
+    allowed = statement.seq_scan_allowed
+    if statement.pair_rows and sample['dense_pair']:
+        allowed += ('words',)
+    return {
+        'shape': plan_shape(plan),
+        'planning_ms': statistics.median(p['Planning Time'] for p in plans),
+        'execution_ms': statistics.median(p['Execution Time'] for p in plans),
+        'shared_hit_blocks': plan.get('Shared Hit Blocks', 0),
+        'shared_read_blocks': plan.get('Shared Read Blocks', 0),
+        'seq_scans': find_seq_scans(plan, allowed),
+        'words_rows': count_rows_read(plan, 'words'),
+    }
+
+
+def run_scale(conn, users: int, words: int, args) -> Dict[str, dict]:
+    schema = f"query_plans_{users}_{words}"
+    results = {}
+    with conn.cursor() as cur:
+        started = time.perf_counter()
+        sample = seed(cur, schema, users, words, args)
+        print(f"\n{users} пользователей x {words} слов: заполнено за "
+              f"{time.perf_counter() - started:.1f} с")
+
+        try:
+            for statement in STATEMENTS:
+                if args.only and statement.name not in args.only:
+                    continue
+                result = explain(cur, statement, sample, args.repeat)
+                result['budget_ms'] = statement.budget_ms * args.budget_factor
+                # Слова других пар и чужие личные слова не должны читаться
+                result['outside_pair'] = (
+                    statement.pair_rows and not sample['dense_pair']
+                    and result['words_rows'] > sample['pair_words'] * (1 + PAIR_ROWS_TOLERANCE)
+                )
+                result['ok'] = (not result['seq_scans'] and not result['outside_pair']
+                                and result['execution_ms'] <= result['budget_ms'])
+                results[statement.name] = result
+
+                status = 'OK  ' if result['ok'] else 'FAIL'
+                print(f"  {status} {statement.name:<28} план {result['planning_ms']:7.2f} мс, "
+                      f"выполнение {result['execution_ms']:8.2f} мс "
+                      f"(бюджет {result['budget_ms']:.0f} мс), "
+                      f"буферы {result['shared_hit_blocks']}+{result['shared_read_blocks']}")
+                if result['seq_scans']:
+                    print(f"       Seq Scan: {', '.join(result['seq_scans'])}")
+                if result['outside_pair']:
+                    print(f"       прочитано строк words: {result['words_rows']}, "
+                          f"слов пары: {sample['pair_words']}")
+                if args.verbose or not result['ok']:
+                    print(f"       {result['shape']}")
+        finally:
+            if not args.keep:
+                cur.execute(f"DROP SCHEMA {schema} CASCADE")
+    return results
+
+
+def compare_with_baseline(results: dict, path: str) -> None:
+    """Вывод запросов, у которых форма плана изменилась относительно прошлого запуска."""
+    with open(path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    for scale, statements in results.items():
+        for name, result in statements.items():
+            previous = baseline.get(scale, {}).get(name)
+            if previous and previous['shape'] != result['shape']:
+                print(f"План изменился: {scale} {name}\n  было:  {previous['shape']}\n"
+                      f"  стало: {result['shape']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', action='append', type=str,
+                        help="пользователей x слов, например 10000x100000 (можно несколько)")
+    parser.add_argument('--personal', type=int, default=5, help="личных слов у пользователя")
+    parser.add_argument('--learned', type=int, default=100, help="выученных слов у пользователя")
+    parser.add_argument('--deck-size', type=int, default=500, help="слов в общей колоде")
+    parser.add_argument('--events', type=int, default=1_000_000, help="ответов в журнале")
+    parser.add_argument('--pairs', type=int, default=3, help="дополнительных языковых пар того же размера")
+    parser.add_argument('--repeat', type=int, default=5, help="повторов EXPLAIN ANALYZE")
+    parser.add_argument('--budget-factor', type=float, default=1.0,
+                        help="множитель бюджетов времени (для медленных машин)")
+    parser.add_argument('--only', nargs='+', help="проверить только указанные запросы")
+    parser.add_argument('--output', help="файл JSON для результатов")
+    parser.add_argument('--baseline', help="результаты прошлого запуска для сравнения планов")
+    parser.add_argument('--keep', action='store_true', help="не удалять схему после проверки")
+    parser.add_argument('--verbose', action='store_true', help="выводить форму каждого плана")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    if not conn:
+        sys.exit(2)
+    conn.autocommit = True
+
+    results = {}
+    try:
+        for scale in args.scale or ['10000x100000', '20000x500000']:
+            users, words = parse_scale(scale)
+            results[scale] = run_scale(conn, users, words, args)
+    finally:
+        conn.close()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        compare_with_baseline(results, args.baseline)
+
+    failed = [
+        f"{scale} {name}" for scale, statements in results.items()
+        for name, result in statements.items() if not result['ok']
+    ]
+    if failed:
+        print(f"\nНе прошли проверку: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nВсе запросы прошли проверку")
+
+
+if __name__ == '__main__':
+    main()
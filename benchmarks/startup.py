@@ -0,0 +1,136 @@
+"""Замер времени запуска бота.
+
+Измеряет время импорта пакета в новом процессе, время создания бота
+через :func:`englishcard.create_app` и время до первой карточки: от
+получения команды /start до отправки сообщения с вариантами ответа.
+Запросы к Telegram API перехватываются через
+``telebot.apihelper.CUSTOM_REQUEST_SENDER``, хранилище выбирается
+параметром --storage (для postgres нужны переменные DB_* из .env).
+
+Запуск из корня репозитория:
+    python -m benchmarks.startup --runs 20 --storage memory
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from englishcard.storage import STORAGE_BACKENDS
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import englishcard; "
+    "print(time.perf_counter() - started)"
+)
+
+
+class FakeResponse:
+    """Ответ Telegram API с успешным результатом."""
+
+    status_code = 200
+
+    def __init__(self, result):
+        self._payload = {'ok': True, 'result': result}
+        self.text = json.dumps(self._payload)
+
+    def json(self):
+        return self._payload
+
+
+class TelegramStub:
+    """Перехватчик запросов к Telegram API, запоминающий время отправки карточек."""
+
+    def __init__(self):
+        self.card_sent_at = None
+
+    def __call__(self, method, url, params=None, **kwargs):
+        params = params or {}
+        if url.endswith('sendMessage') and params.get('reply_markup'):
+            self.card_sent_at = time.perf_counter()
+        chat_id = int(params.get('chat_id', 0))
+        return FakeResponse({
+            'message_id': 1,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'text': params.get('text', ''),
+        })
+
+
+def make_update(update_id: int, chat_id: int, text: str):
+    from telebot import types
+
+    return types.Update.de_json(json.dumps({
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': chat_id, 'is_bot': False, 'first_name': 'Bench'},
+            'text': text,
+            'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(text)}],
+        },
+    }))
+
+
+def measure_import(runs: int) -> list:
+    timings = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, '-c', IMPORT_SNIPPET], text=True)
+        timings.append(float(output.strip().splitlines()[-1]))
+    return timings
+
+
+def measure_first_card(runs: int, first_chat_id: int, backend: str) -> tuple:
+    import telebot
+    from englishcard import create_app
+    from englishcard.storage import create_storage
+
+    stub = TelegramStub()
+    telebot.apihelper.CUSTOM_REQUEST_SENDER = stub
+
+    storage = create_storage(backend)
+    storage.initialize()
+
+    started = time.perf_counter()
+    bot = create_app(token='0:benchmark', threaded=False, storage=storage)
+    create_timing = time.perf_counter() - started
+
+    timings = []
+    for run in range(runs):
+        stub.card_sent_at = None
+        update = make_update(run + 1, first_chat_id + run, '/start')
+        started = time.perf_counter()
+        bot.process_new_updates([update])
+        if stub.card_sent_at is None:
+            print("Карточка не была отправлена: проверьте подключение к хранилищу")
+            break
+        timings.append(stub.card_sent_at - started)
+    return create_timing, timings
+
+
+def report(name: str, timings: list) -> None:
+    if not timings:
+        return
+    print(f"{name}: медиана {statistics.median(timings) * 1000:.1f} мс, "
+          f"мин {min(timings) * 1000:.1f} мс, макс {max(timings) * 1000:.1f} мс "
+          f"({len(timings)} запусков)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help="количество повторов")
+    parser.add_argument('--chat-id', type=int, default=900_000_000,
+                        help="ID первого тестового чата")
+    parser.add_argument('--storage', choices=STORAGE_BACKENDS, default='memory',
+                        help="хранилище словаря")
+    args = parser.parse_args()
+
+    report("Импорт englishcard", measure_import(args.runs))
+    create_timing, card_timings = measure_first_card(args.runs, args.chat_id, args.storage)
+    print(f"Создание бота: {create_timing * 1000:.1f} мс")
+    report("Время до первой карточки", card_timings)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Сравнение горячих операций хранилищ.
+
+Заполняет каждое хранилище одинаковыми данными (общий словарь, личные
+слова и выученные слова пользователей) и измеряет время операций,
+из которых состоит показ и проверка карточки.
+
+Запуск из корня репозитория:
+    python -m benchmarks.storage --words 5000 --users 50 --storage memory sqlite
+    python -m benchmarks.storage --storage postgres   # отдельная база, переменные DB_* из .env
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+from englishcard.storage import STORAGE_BACKENDS, Storage, create_storage
+from englishcard.storage.base import write_deck_csv
+from englishcard.storage.sqlite import SQLiteStorage
+
+FIRST_USER_ID = 900_000_000
+
+
+def seed(storage: Storage, words: int, users: int, personal_words: int, learned: float) -> List[int]:
+    """Заполнение хранилища через пакетную загрузку колод.
+
+    Returns:
+        List[int]: ID тестовых пользователей
+    """
+    storage.initialize()
+    storage.import_deck(
+        'benchmark',
+        write_deck_csv((f'word{i}', f'слово{i}') for i in range(words)),
+        None
+    )
+
+    user_ids = [FIRST_USER_ID + i for i in range(users)]
+    for user_id in user_ids:
+        storage.ensure_user_exists(user_id, None)
+        storage.import_deck(
+            'benchmark',
+            write_deck_csv((f'user{user_id}word{i}', f'слово{i}') for i in range(personal_words)),
+            user_id
+        )
+        for word_id in random.sample(range(1, words + 1), int(words * learned)):
+            storage.add_user_word(user_id, word_id)
+    return user_ids
+
+
+def measure(operation: Callable[[], object], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def run(storage: Storage, name: str, args) -> None:
+    started = time.perf_counter()
+    user_ids = seed(storage, args.words, args.users, args.personal_words, args.learned)
+    print(f"\n{name}: заполнено за {time.perf_counter() - started:.1f} с")
+
+    def random_user() -> int:
+        return random.choice(user_ids)
+
+    operations = {
+        'get_random_word': lambda: storage.get_random_word(random_user(), show_all=True),
+        'get_random_other_words': lambda: storage.get_random_other_words(
+            random_user(), random.randint(1, args.words)),
+        'add_user_word': lambda: storage.add_user_word(
+            random_user(), random.randint(1, args.words)),
+        'get_user_words_count': lambda: storage.get_user_words_count(random_user()),
+    }
+    for operation_name, operation in operations.items():
+        timings = measure(operation, args.repeat)
+        print(f"  {operation_name:<24} медиана {statistics.median(timings) * 1000:8.3f} мс, "
+              f"p95 {sorted(timings)[int(len(timings) * 0.95)] * 1000:8.3f} мс")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--storage', nargs='+', choices=STORAGE_BACKENDS,
+                        default=['memory', 'sqlite'], help="сравниваемые хранилища")
+    parser.add_argument('--words', type=int, default=5000, help="слов в общем словаре")
+    parser.add_argument('--users', type=int, default=50, help="пользователей")
+    parser.add_argument('--personal-words', type=int, default=20,
+                        help="личных слов у каждого пользователя")
+    parser.add_argument('--learned', type=float, default=0.3,
+                        help="доля выученных слов общего словаря")
+    parser.add_argument('--repeat', type=int, default=200, help="повторов каждой операции")
+    args = parser.parse_args()
+
+    for backend in args.storage:
+        if backend == 'sqlite':
+            with tempfile.TemporaryDirectory() as directory:
+                run(SQLiteStorage(f'{directory}/benchmark.db'), backend, args)
+        else:
+            run(create_storage(backend), backend, args)
+
+
+if __name__ == '__main__':
+    main()
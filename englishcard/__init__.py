@@ -0,0 +1,4 @@
+"""EnglishCard - Telegram бот для изучения английских слов с помощью карточек."""
+from englishcard.app import create_app, get_bot, main
+
+__all__ = ['create_app', 'get_bot', 'main']
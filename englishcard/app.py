@@ -0,0 +1,78 @@
+"""Создание и запуск бота.
+
+Импорт пакета не создает бота, не читает окружение и не обращается
+к базе данных: все это происходит в :func:`create_app` и :func:`main`.
+"""
+from typing import Optional
+
+import telebot
+from telebot import TeleBot, custom_filters
+
+from englishcard.config import CONNECT_TIMEOUT, READ_TIMEOUT, get_token
+from englishcard.dispatch import ChatTeleBot
+from englishcard.handlers import register_handlers
+from englishcard.lifecycle import start_bot
+from englishcard.state import state_storage
+from englishcard.storage import Storage, get_storage, set_storage
+
+_bot: Optional[TeleBot] = None
+
+
+def create_app(token: Optional[str] = None, threaded: bool = True,
+               storage: Optional[Storage] = None, workers: Optional[int] = None) -> TeleBot:
+    """Создание бота с зарегистрированными обработчиками.
+    
+    Args:
+        token: Токен Telegram бота (по умолчанию переменная окружения TOKEN)
+        threaded: Обрабатывать ли обновления в пуле потоков с очередью
+            на каждый чат (иначе в потоке, который их передал)
+        storage: Хранилище словаря (по умолчанию выбирается STORAGE_BACKEND)
+        workers: Количество потоков (по умолчанию DISPATCH_WORKERS)
+        
+    Returns:
+        TeleBot: Новый экземпляр бота
+    """
+    if storage is not None:
+        set_storage(storage)
+
+    # Настройка таймаутов
+    telebot.apihelper.CONNECT_TIMEOUT = CONNECT_TIMEOUT
+    telebot.apihelper.READ_TIMEOUT = READ_TIMEOUT
+
+    if threaded:
+        bot = ChatTeleBot(
+            token or get_token(),
+            state_storage=state_storage,
+            parse_mode=None,
+            workers=workers
+        )
+    else:
+        bot = TeleBot(
+            token or get_token(),
+            state_storage=state_storage,
+            parse_mode=None,
+            threaded=False
+        )
+    register_handlers(bot)
+    bot.add_custom_filter(custom_filters.StateFilter(bot))
+    return bot
+
+
+def get_bot() -> TeleBot:
+    """Получение бота приложения, который создается при первом обращении."""
+    global _bot
+    if _bot is None:
+        _bot = create_app()
+    return _bot
+
+
+def main() -> None:
+    """Подготовка базы данных и запуск бота."""
+    print('Start telegram bot...')
+    bot = get_bot()
+    print("Инициализация базы данных...")
+    storage = get_storage()
+    storage.initialize()
+    storage.delete_unwanted_words()
+    print("Запуск бота...")
+    start_bot(bot)
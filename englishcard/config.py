@@ -0,0 +1,78 @@
+"""Настройки бота.
+
+Переменные окружения (в том числе из файла .env) загружаются лениво,
+при первом обращении, а не при импорте модуля.
+"""
+import os
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+# Константы
+CONNECT_TIMEOUT: int = 60
+READ_TIMEOUT: int = 60
+MAX_RETRIES: int = 3
+RETRY_DELAY: int = 5
+MAX_RETRY_DELAY: int = 300
+HEALTHY_POLLING_TIME: int = 60
+DRAIN_TIMEOUT: int = 30
+CHECKPOINT_INTERVAL: int = 60
+DISPATCH_WORKERS: int = 8
+EVENT_BATCH_SIZE: int = 500
+EVENT_BUFFER_LIMIT: int = 100_000
+EVENT_FLUSH_INTERVAL: int = 10
+EXPORT_CHUNK_SIZE: int = 10_000
+ACCURACY_SMOOTHING: float = 0.1
+DIFFICULTY_INTERVAL: int = 3600
+DIFFICULTY_CACHE_TTL: int = 600
+DIFFICULTY_UNIFORM_SHARE: float = 0.2
+CHAT_STATE_TTL: int = 1800
+CHAT_STATE_LIMIT: int = 200_000
+CHAT_EVICT_INTERVAL: int = 60
+ADMIN_IDS: List[int] = [123456789]  # Замените на ваш ID в Telegram
+
+_env_loaded: bool = False
+
+
+def load_env() -> None:
+    """Однократная загрузка переменных окружения из файла .env."""
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv()
+        _env_loaded = True
+
+
+def get_token() -> Optional[str]:
+    """Получение токена Telegram бота."""
+    load_env()
+    return os.getenv('TOKEN')
+
+
+def get_checkpoint_path() -> str:
+    """Получение пути к файлу с сохраненным состоянием чатов."""
+    load_env()
+    return os.getenv('CHECKPOINT_PATH', 'checkpoint.json')
+
+
+def get_storage_backend() -> str:
+    """Получение названия хранилища: postgres, sqlite или memory."""
+    load_env()
+    return os.getenv('STORAGE_BACKEND', 'postgres')
+
+
+def get_sqlite_path() -> str:
+    """Получение пути к файлу базы данных SQLite."""
+    load_env()
+    return os.getenv('SQLITE_PATH', 'englishcard.db')
+
+
+def get_dispatch_workers() -> int:
+    """Получение количества потоков для обработки обновлений."""
+    load_env()
+    return int(os.getenv('DISPATCH_WORKERS', DISPATCH_WORKERS))
+
+
+def get_card_selection() -> str:
+    """Получение режима выбора карточек: random или difficulty."""
+    load_env()
+    return os.getenv('CARD_SELECTION', 'random')
@@ -0,0 +1,243 @@
+"""Сложность слов и выбор карточек с учетом сложности.
+
+Сложность слова рассчитывается периодической задачей по журналу ответов
+всех пользователей: доля ошибок и среднее число попыток до первого
+верного ответа. Агрегация выполняется хранилищем одним запросом
+(GROUP BY и оконные функции в SQL), результат сохраняется в столбце
+``words.difficulty``.
+
+В режиме CARD_SELECTION=difficulty карточка выбирается из таблицы
+псевдонимов (метод Уокера - Воуза): таблица строится один раз для
+колоды и уровня точности пользователя, после чего выбор слова занимает
+O(1). Слабым пользователям чаще достаются легкие слова, сильным - трудные.
+
+Запуск расчета вручную из корня репозитория:
+    python -m englishcard.difficulty
+"""
+import math
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from englishcard.config import (
+    DIFFICULTY_CACHE_TTL,
+    DIFFICULTY_INTERVAL,
+    DIFFICULTY_UNIFORM_SHARE,
+)
+from englishcard.state import chats, shutdown_event
+from englishcard.storage import get_storage
+
+# Сглаживание: слово с малым числом ответов считается близким к среднему
+PRIOR_ERROR_RATE: float = 0.3
+PRIOR_ANSWERS: int = 5
+# Уровни точности пользователя, для каждого строится своя таблица
+ACCURACY_TIERS: int = 5
+# Сложность, на которую нацелен самый сильный уровень, и ширина окна
+MAX_TARGET_DIFFICULTY: float = 0.6
+TARGET_WIDTH: float = 0.15
+MIN_WEIGHT: float = 0.05
+# Кандидатов карточки из таблицы псевдонимов: выученные среди них
+# отсеиваются одним запросом, если невыученных нет - выбор равновероятный
+MAX_DRAWS: int = 8
+
+
+def compute_difficulty(answers: int, errors: int, mean_attempts: Optional[float]) -> float:
+    """Сложность слова от 0 до 1.
+
+    Args:
+        answers: Количество ответов на слово
+        errors: Количество ошибок
+        mean_attempts: Среднее число попыток до первого верного ответа
+
+    Returns:
+        float: Среднее сглаженной доли ошибок и доли лишних попыток
+    """
+    error_rate = (errors + PRIOR_ERROR_RATE * PRIOR_ANSWERS) / (answers + PRIOR_ANSWERS)
+    if mean_attempts is None:
+        return error_rate
+    return (error_rate + (1 - 1 / max(mean_attempts, 1.0))) / 2
+
+
+def update_difficulty() -> int:
+    """Пересчет сложности всех слов по журналу ответов.
+
+    Returns:
+        int: Количество слов с обновленной сложностью
+    """
+    started = time.perf_counter()
+    stats = get_storage().get_answer_stats()
+    difficulties = [
+        (word_id, round(compute_difficulty(answers, errors, mean_attempts), 4))
+        for word_id, answers, errors, mean_attempts in stats
+    ]
+    if difficulties and not get_storage().set_word_difficulties(difficulties):
+        return 0
+    sampler.clear()
+    print(f"Сложность {len(difficulties)} слов пересчитана за "
+          f"{time.perf_counter() - started:.2f} с")
+    return len(difficulties)
+
+
+def difficulty_loop(interval: float = DIFFICULTY_INTERVAL) -> None:
+    """Периодический пересчет сложности до завершения бота."""
+    while True:
+        try:
+            update_difficulty()
+        except Exception as e:
+            print(f"Ошибка при пересчете сложности слов: {e}")
+        if shutdown_event.wait(interval):
+            return
+
+
+class AliasTable:
+    """Таблица псевдонимов для выбора индекса с заданными весами за O(1)."""
+
+    def __init__(self, weights: List[float]) -> None:
+        count = len(weights)
+        total = sum(weights)
+        self.probability = [0.0] * count
+        self.alias = list(range(count))
+
+        scaled = [weight * count / total for weight in weights]
+        small = [i for i, weight in enumerate(scaled) if weight < 1]
+        large = [i for i, weight in enumerate(scaled) if weight >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1 - scaled[less]
+            (small if scaled[more] < 1 else large).append(more)
+        for i in small + large:
+            self.probability[i] = 1.0
+
+    def __len__(self) -> int:
+        return len(self.probability)
+
+    def sample(self) -> int:
+        i = random.randrange(len(self.probability))
+        return i if random.random() < self.probability[i] else self.alias[i]
+
+
+def get_accuracy_tier(user_id: int) -> int:
+    """Уровень точности пользователя от 0 до ACCURACY_TIERS - 1."""
+    chat = chats.get(user_id)
+    accuracy = 0.5 if chat is None or chat.accuracy is None else chat.accuracy
+    return min(int(accuracy * ACCURACY_TIERS), ACCURACY_TIERS - 1)
+
+
+def get_word_weight(difficulty: Optional[float], tier: int) -> float:
+    """Вес слова для уровня: чем ближе сложность к целевой, тем чаще слово."""
+    target = MAX_TARGET_DIFFICULTY * tier / (ACCURACY_TIERS - 1)
+    if difficulty is None:
+        difficulty = PRIOR_ERROR_RATE
+    return MIN_WEIGHT + math.exp(-((difficulty - target) / TARGET_WIDTH) ** 2)
+
+
+class DifficultySampler:
+    """Кэш таблиц псевдонимов по языковой паре, колоде и уровню точности."""
+
+    def __init__(self, ttl: float = DIFFICULTY_CACHE_TTL) -> None:
+        self.ttl = ttl
+        # Блокировка защищает только словари кэша: слова читаются из
+        # хранилища, а таблицы строятся без нее, чтобы обработчики других
+        # чатов не ждали полного чтения словаря пары
+        self._lock = threading.Lock()
+        self._words: Dict[Tuple[int, Optional[int]], Tuple[float, List[Tuple[int, str, str, Optional[float]]]]] = {}
+        self._tables: Dict[Tuple[int, Optional[int], int], AliasTable] = {}
+        # Источники, которые сейчас перечитываются: остальные потоки до
+        # конца чтения используют прежние слова
+        self._loading: Set[Tuple[int, Optional[int]]] = set()
+        # Меняется при сбросе кэша: прочитанное до сброса не сохраняется
+        self._generation = 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._words.clear()
+            self._tables.clear()
+            self._generation += 1
+
+    def get_words(self, pair_id: int, deck_id: Optional[int]) -> List[Tuple[int, str, str, Optional[float]]]:
+        """Слова колоды или общего словаря пары со сложностью, перечитываемые раз в ttl секунд."""
+        source = (pair_id, deck_id)
+        with self._lock:
+            loaded_at, words = self._words.get(source, (0.0, []))
+            if time.monotonic() - loaded_at <= self.ttl:
+                return words
+            # Устаревшие слова перечитывает один поток, если есть что отдать
+            # остальным; при первом чтении каждый поток читает сам
+            if source in self._loading and words:
+                return words
+            self._loading.add(source)
+            generation = self._generation
+
+        try:
+            fresh = get_storage().get_word_difficulties(deck_id, pair_id=pair_id)
+        finally:
+            with self._lock:
+                self._loading.discard(source)
+
+        with self._lock:
+            # Пока шло чтение, слова мог обновить другой поток
+            current = self._words.get(source)
+            if current is not None and current[0] > loaded_at:
+                return current[1]
+            if generation == self._generation:
+                self._words[source] = (time.monotonic(), fresh)
+                for key in [key for key in self._tables if key[:2] == source]:
+                    del self._tables[key]
+        return fresh
+
+    def get_table(self, pair_id: int, deck_id: Optional[int], tier: int
+                  ) -> Tuple[List[Tuple[int, str, str, Optional[float]]], Optional[AliasTable]]:
+        words = self.get_words(pair_id, deck_id)
+        if not words:
+            return words, None
+        key = (pair_id, deck_id, tier)
+        with self._lock:
+            table = self._tables.get(key)
+            cached = self._words.get(key[:2], (0.0, None))[1] is words
+        # Таблица в кэше построена по текущим словам источника
+        if table is not None and cached:
+            return words, table
+        table = AliasTable([get_word_weight(word[3], tier) for word in words])
+        with self._lock:
+            if self._words.get(key[:2], (0.0, None))[1] is words:
+                self._tables[key] = table
+        return words, table
+
+    def pick_word(self, user_id: int, deck_id: Optional[int], pair_id: int) -> Tuple[int, str, str] | None:
+        """Выбор невыученного слова с учетом сложности.
+
+        Returns:
+            Tuple[int, str, str] | None: ID, слово и перевод или None, если
+                карточку нужно выбрать равновероятно
+        """
+        # Часть карточек выбирается равновероятно: так показываются личные
+        # слова и слова, на которые еще мало ответов
+        if random.random() < DIFFICULTY_UNIFORM_SHARE:
+            return None
+        words, table = self.get_table(pair_id, deck_id, get_accuracy_tier(user_id))
+        if table is None:
+            return None
+        # Кандидаты выбираются в памяти, выученные отсеиваются одним запросом
+        candidates = [words[table.sample()] for _ in range(MAX_DRAWS)]
+        learned = get_storage().get_learned_word_ids(user_id, [word[0] for word in candidates])
+        if learned is None:
+            return None
+        for word_id, word, translation, _ in candidates:
+            if word_id not in learned:
+                return word_id, word, translation
+        return None
+
+
+sampler = DifficultySampler()
+
+
+def main() -> None:
+    get_storage().initialize()
+    update_difficulty()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""Обработка обновлений с очередью на каждый чат.
+
+Обновления одного чата выполняются строго по очереди, в порядке
+получения, а обновления разных чатов - параллельно в пуле потоков.
+Так два быстрых нажатия в одном чате не читают и не меняют текущую
+карточку одновременно, а число потоков можно увеличивать ради
+пропускной способности.
+"""
+import queue
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable, List, Optional
+
+from telebot import TeleBot, types
+
+from englishcard.config import get_dispatch_workers
+
+_STOP = object()
+
+
+def get_update_chat_id(update: types.Update) -> Hashable:
+    """Определение чата, к которому относится обновление.
+
+    Args:
+        update: Обновление от Telegram
+
+    Returns:
+        Hashable: ID чата, ID пользователя для обновлений без чата
+        или ID самого обновления, если порядок не важен
+    """
+    for name in ('message', 'edited_message', 'channel_post', 'edited_channel_post',
+                 'business_message', 'edited_business_message', 'my_chat_member',
+                 'chat_member', 'chat_join_request'):
+        event = getattr(update, name, None)
+        if event is not None:
+            return event.chat.id
+
+    call = update.callback_query
+    if call is not None:
+        return call.message.chat.id if call.message else call.from_user.id
+
+    for name in ('inline_query', 'chosen_inline_result', 'shipping_query', 'pre_checkout_query'):
+        event = getattr(update, name, None)
+        if event is not None:
+            return event.from_user.id
+
+    return ('update', update.update_id)
+
+
+class ChatDispatcher:
+    """Пул потоков с очередью задач на каждый ключ (чат).
+
+    Очередь чата существует, пока в ней есть задачи или одна из них
+    выполняется. В общую очередь готовых чатов попадает только чат
+    без выполняемой задачи, поэтому задачи одного чата никогда не
+    выполняются одновременно, а разные чаты обслуживаются по кругу.
+    """
+
+    def __init__(self, workers: int, name: str = 'ChatWorker') -> None:
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._mailboxes: Dict[Hashable, Deque[Callable[[], None]]] = {}
+        self._ready: queue.SimpleQueue = queue.SimpleQueue()
+        self._pending = 0
+        self._closed = False
+        self._threads: List[threading.Thread] = [
+            threading.Thread(target=self._work, name=f'{name}{i}', daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def pending(self) -> int:
+        """Количество задач в очередях, включая выполняемые."""
+        return self._pending
+
+    @property
+    def active_chats(self) -> int:
+        """Количество чатов с задачами в очереди."""
+        return len(self._mailboxes)
+
+    def submit(self, key: Hashable, task: Callable, *args, **kwargs) -> bool:
+        """Постановка задачи в очередь чата.
+
+        Args:
+            key: Ключ очереди, обычно ID чата
+            task: Функция для выполнения
+            *args: Позиционные аргументы функции
+            **kwargs: Именованные аргументы функции
+
+        Returns:
+            bool: False если пул уже остановлен
+        """
+        with self._lock:
+            if self._closed:
+                return False
+            self._pending += 1
+            mailbox = self._mailboxes.get(key)
+            if mailbox is None:
+                self._mailboxes[key] = deque([lambda: task(*args, **kwargs)])
+                self._ready.put(key)
+            else:
+                mailbox.append(lambda: task(*args, **kwargs))
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Ожидание выполнения всех поставленных задач.
+
+        Args:
+            timeout: Максимальное время ожидания в секундах
+
+        Returns:
+            bool: True если все задачи выполнены до таймаута
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Остановка потоков после уже поставленных в очередь чатов.
+
+        Args:
+            timeout: Максимальное время ожидания каждого потока
+        """
+        with self._lock:
+            self._closed = True
+        for _ in self._threads:
+            self._ready.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _work(self) -> None:
+        while True:
+            key = self._ready.get()
+            if key is _STOP:
+                return
+
+            with self._lock:
+                job = self._mailboxes[key].popleft()
+            try:
+                job()
+            except Exception as e:
+                print(f"Ошибка при обработке обновления чата {key}: {e}")
+
+            with self._lock:
+                self._pending -= 1
+                if self._mailboxes[key]:
+                    self._ready.put(key)
+                else:
+                    del self._mailboxes[key]
+                if self._pending == 0:
+                    self._idle.notify_all()
+
+
+class ChatTeleBot(TeleBot):
+    """Бот, который обрабатывает обновления через :class:`ChatDispatcher`.
+
+    Получение обновлений идет в одном потоке (``threaded=False``),
+    а обработчики каждого обновления выполняются в очереди его чата.
+    """
+
+    def __init__(self, *args, workers: Optional[int] = None, **kwargs) -> None:
+        kwargs['threaded'] = False
+        super().__init__(*args, **kwargs)
+        self.dispatcher = ChatDispatcher(workers or get_dispatch_workers())
+
+    def process_new_updates(self, updates: List[types.Update]) -> None:
+        for update in updates:
+            # Смещение для следующего getUpdates сдвигаем сразу, не дожидаясь
+            # обработки, иначе обновления будут получены повторно
+            if update.update_id > self.last_update_id:
+                self.last_update_id = update.update_id
+            self.dispatcher.submit(
+                get_update_chat_id(update), super().process_new_updates, [update]
+            )
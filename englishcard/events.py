@@ -0,0 +1,219 @@
+"""Журнал ответов: пакетная запись и выгрузка для анализа.
+
+Ответы копятся в памяти и записываются в хранилище пачками: по
+заполнении пачки, по таймеру и при завершении бота. Обработчик ответа
+не обращается к хранилищу ради журнала.
+
+Выгрузка читает журнал частями и пишет каждую часть сразу в файл CSV
+или Parquet (для Parquet нужен необязательный пакет pyarrow), поэтому
+объем журнала не ограничен памятью. Запуск из корня репозитория:
+    python -m englishcard.events --format csv --output answers.csv --days 30
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, List, Optional
+
+from englishcard.config import (
+    ACCURACY_SMOOTHING,
+    EVENT_BATCH_SIZE,
+    EVENT_BUFFER_LIMIT,
+    EVENT_FLUSH_INTERVAL,
+    EXPORT_CHUNK_SIZE,
+)
+from englishcard.state import chats, shutdown_event, shutdown_hooks
+from englishcard.storage import AnswerEvent, get_storage
+from englishcard.storage.base import ANSWER_EVENT_FIELDS
+
+EXPORT_FORMATS = ('csv', 'parquet')
+
+
+class AnswerLog:
+    """Буфер ответов с пакетной записью в хранилище."""
+
+    def __init__(self, batch_size: int = EVENT_BATCH_SIZE,
+                 buffer_limit: int = EVENT_BUFFER_LIMIT) -> None:
+        self.batch_size = batch_size
+        self.buffer_limit = buffer_limit
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._events: List[AnswerEvent] = []
+        # Запущен ли поток записи полной пачки: пока он работает, новые
+        # ответы не запускают еще потоки (при недоступной базе буфер не
+        # освобождается, и каждый ответ иначе открывал бы свое соединение)
+        self._flush_scheduled = False
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def record(self, user_id: int, word_id: int, mode: str, correct: bool,
+               latency_ms: Optional[int] = None) -> None:
+        """Добавление ответа в буфер.
+
+        Args:
+            user_id: ID пользователя в Telegram
+            word_id: ID слова карточки
+            mode: Режим выбора карточки
+            correct: Верен ли ответ
+            latency_ms: Время от показа карточки до ответа в миллисекундах
+        """
+        event = AnswerEvent(user_id, word_id, mode, correct, latency_ms, datetime.now(timezone.utc))
+        # Точность пользователя для выбора карточек по сложности считается
+        # здесь же, без запросов к журналу: скользящее среднее ответов
+        chat = chats.get(user_id)
+        if chat is not None:
+            accuracy = 0.5 if chat.accuracy is None else chat.accuracy
+            chat.accuracy = accuracy + ACCURACY_SMOOTHING * (correct - accuracy)
+        with self._lock:
+            self._events.append(event)
+            schedule = len(self._events) >= self.batch_size and not self._flush_scheduled
+            if schedule:
+                self._flush_scheduled = True
+        if schedule:
+            # Пачку записывает отдельный поток, чтобы не задерживать ответ
+            threading.Thread(target=self._flush_batch, name='AnswerLogFlush', daemon=True).start()
+
+    def _flush_batch(self) -> None:
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._flush_scheduled = False
+
+    def flush(self) -> int:
+        """Запись накопленных ответов в хранилище.
+
+        Returns:
+            int: Количество записанных ответов
+        """
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+            if not events:
+                return 0
+            if get_storage().add_answer_events(events):
+                return len(events)
+
+            # Возвращаем неудачную пачку в буфер, отбрасывая самые старые
+            # ответы сверх лимита
+            with self._lock:
+                events.extend(self._events)
+                dropped = len(events) - self.buffer_limit
+                self._events = events[-self.buffer_limit:]
+            if dropped > 0:
+                print(f"Журнал ответов переполнен, отброшено {dropped} ответов")
+            return 0
+
+    def flush_loop(self, interval: float = EVENT_FLUSH_INTERVAL) -> None:
+        """Периодическая запись ответов до завершения бота."""
+        while not shutdown_event.wait(interval):
+            self.flush()
+
+
+answer_log = AnswerLog()
+shutdown_hooks.append(answer_log.flush)
+
+
+def export_answer_events(output: BinaryIO, export_format: str = 'csv',
+                         since: Optional[datetime] = None, until: Optional[datetime] = None,
+                         chunk_size: int = EXPORT_CHUNK_SIZE) -> Optional[int]:
+    """Потоковая выгрузка журнала ответов в CSV или Parquet.
+
+    Args:
+        output: Двоичный файл для записи
+        export_format: 'csv' или 'parquet'
+        since: Начало периода включительно
+        until: Конец периода не включительно
+        chunk_size: Количество ответов, читаемых и записываемых за раз
+
+    Returns:
+        Optional[int]: Количество выгруженных ответов или None в случае ошибки
+            (в том числе если журнал не дочитан: записанное в output неполно)
+    """
+    chunks = get_storage().iter_answer_events(since, until, chunk_size)
+    try:
+        if export_format == 'csv':
+            return _write_csv(output, chunks)
+        if export_format == 'parquet':
+            return _write_parquet(output, chunks)
+    except Exception as e:
+        print(f"Ошибка при чтении журнала ответов: {e}")
+        return None
+    print(f"Неизвестный формат выгрузки '{export_format}'")
+    return None
+
+
+def _write_csv(output: BinaryIO, chunks) -> int:
+    text = io.TextIOWrapper(output, encoding='utf-8', newline='', write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(ANSWER_EVENT_FIELDS)
+    total = 0
+    try:
+        for chunk in chunks:
+            writer.writerows(
+                (*event[:5], event.answered_at.isoformat()) for event in chunk
+            )
+            total += len(chunk)
+    finally:
+        # Файл остается открытым для вызывающего кода, в том числе при ошибке
+        text.detach()
+    return total
+
+
+def _write_parquet(output: BinaryIO, chunks) -> Optional[int]:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("Для выгрузки в Parquet установите пакет pyarrow")
+        return None
+
+    schema = pa.schema([
+        ('user_id', pa.int64()),
+        ('word_id', pa.int64()),
+        ('mode', pa.string()),
+        ('correct', pa.bool_()),
+        ('latency_ms', pa.int32()),
+        ('answered_at', pa.timestamp('us', tz='UTC')),
+    ])
+    total = 0
+    with pq.ParquetWriter(output, schema) as writer:
+        for chunk in chunks:
+            # Каждая часть журнала становится отдельной группой строк
+            columns = list(zip(*chunk))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema
+            ))
+            total += len(chunk)
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Выгрузка журнала ответов")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv', help="формат файла")
+    parser.add_argument('--output', required=True, help="путь к файлу")
+    parser.add_argument('--days', type=int, default=None,
+                        help="выгрузить только последние N дней")
+    parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+                        help="ответов в одной части")
+    args = parser.parse_args()
+
+    since = None
+    if args.days is not None:
+        since = datetime.now(timezone.utc) - timedelta(days=args.days)
+    with open(args.output, 'wb') as output:
+        total = export_answer_events(output, args.format, since, chunk_size=args.chunk_size)
+    if total is None:
+        # Неполный файл не оставляем, чтобы его не приняли за выгрузку
+        os.remove(args.output)
+        sys.exit(1)
+    print(f"Выгружено ответов: {total}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,933 @@
+"""Обработчики сообщений бота.
+
+Обработчики не создают бота сами: экземпляр передается в каждый вызов
+(``pass_bot=True``), а регистрация выполняется в :func:`register_handlers`.
+"""
+import io
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional, Tuple
+
+from telebot import types, TeleBot
+
+from englishcard.config import ADMIN_IDS, get_card_selection
+from englishcard.difficulty import sampler
+from englishcard.events import EXPORT_FORMATS, answer_log, export_answer_events
+from englishcard.i18n import get_command, get_language_params, get_languages, get_text
+from englishcard.state import MyStates, chats, get_chat
+from englishcard.storage import get_storage
+from englishcard.storage.base import INITIAL_LANGUAGE_PAIRS
+
+# Языковые пары из хранилища: ID -> (изучаемый язык, язык перевода).
+# Словарь не изменяется на месте: его читают обработчики других чатов,
+# поэтому новые пары загружаются в новый словарь (см. load_language_pairs)
+language_pairs: Dict[int, Tuple[str, str]] = {}
+
+
+def show_hint(*lines: str) -> str:
+    """Форматирование подсказки.
+    
+    Args:
+        *lines: Строки для объединения
+        
+    Returns:
+        str: Объединенные строки через перенос строки
+    """
+    return '\n'.join(lines)
+
+
+def show_target(data: Dict[str, str]) -> str:
+    """Форматирование целевого слова и перевода.
+    
+    Args:
+        data: Словарь с ключами 'target_word' и 'translate_word'
+        
+    Returns:
+        str: Отформатированная строка с переводом
+    """
+    return f"{data['target_word']} -> {data['translate_word']}"
+
+
+def get_user_deck(user_id: int) -> Optional[int]:
+    """Получение выбранной пользователем колоды из состояния чата.
+    
+    Args:
+        user_id: ID пользователя в Telegram
+        
+    Returns:
+        Optional[int]: ID колоды или None, если выбраны все слова
+    """
+    chat = get_chat(user_id)
+    return chat.deck_id
+
+
+def register_user(user_id: int, username: Optional[str]) -> bool:
+    """Создание пользователя в хранилище, если его там еще нет.
+    
+    Args:
+        user_id: ID пользователя в Telegram
+        username: Имя пользователя в Telegram
+        
+    Returns:
+        bool: True если пользователь есть в хранилище
+    """
+    if not get_storage().ensure_user_exists(user_id, username):
+        return False
+    # Состояние чата нового пользователя могло попасть в память раньше
+    chat = chats.get(user_id)
+    if chat is not None:
+        chat.is_new = False
+    return True
+
+
+def set_user_deck(user_id: int, deck_id: Optional[int]) -> bool:
+    """Выбор колоды пользователем.
+    
+    Args:
+        user_id: ID пользователя в Telegram
+        deck_id: ID колоды или None для всех слов
+        
+    Returns:
+        bool: True если колода выбрана
+    """
+    if not get_storage().set_user_deck(user_id, deck_id):
+        return False
+    chat = chats.get(user_id)
+    if chat is not None:
+        chat.deck_id = deck_id
+    return True
+
+
+def load_language_pairs() -> Dict[int, Tuple[str, str]]:
+    """Чтение языковых пар из хранилища и замена словаря language_pairs целиком."""
+    global language_pairs
+    pairs = {
+        pair_id: (source_lang, target_lang)
+        for pair_id, source_lang, target_lang in get_storage().get_language_pairs()
+    }
+    # Пустой ответ - ошибка чтения (пара по умолчанию есть всегда): прежние пары остаются
+    if pairs:
+        language_pairs = pairs
+    return pairs
+
+
+def get_language_pair(pair_id: int) -> Tuple[str, str]:
+    """Языки пары: изучаемый язык и язык перевода.
+    
+    Пары читаются из хранилища при первом обращении и перечитываются,
+    если пары нет среди прочитанных (например, она создана командой /newpair).
+    
+    Args:
+        pair_id: ID языковой пары
+        
+    Returns:
+        Tuple[str, str]: Коды изучаемого языка и языка перевода
+    """
+    pair = language_pairs.get(pair_id)
+    if pair is None:
+        pair = load_language_pairs().get(pair_id, INITIAL_LANGUAGE_PAIRS[0])
+    return pair
+
+
+def get_user_pair(user_id: int) -> int:
+    """Получение активной языковой пары пользователя из состояния чата."""
+    chat = get_chat(user_id)
+    return chat.pair_id
+
+
+def get_user_language(user_id: int) -> str:
+    """Язык интерфейса пользователя - язык перевода его языковой пары."""
+    return get_language_pair(get_user_pair(user_id))[1]
+
+
+def get_pair_params(pair_id: int) -> Dict[str, str]:
+    """Язык интерфейса (lang) и названия языков пары для строк интерфейса."""
+    source_lang, target_lang = get_language_pair(pair_id)
+    return {'lang': target_lang, **get_language_params(source_lang, target_lang, target_lang)}
+
+
+def set_user_pair(user_id: int, pair_id: int) -> bool:
+    """Выбор языковой пары пользователем.
+    
+    Колода и текущая карточка относятся к прежней паре и сбрасываются.
+    
+    Args:
+        user_id: ID пользователя в Telegram
+        pair_id: ID языковой пары
+        
+    Returns:
+        bool: True если пара выбрана
+    """
+    if not get_storage().set_user_pair(user_id, pair_id):
+        return False
+    chat = chats.get(user_id)
+    if chat is not None:
+        chat.pair_id = pair_id
+        chat.deck_id = None
+        chat.card = None
+    return True
+
+
+class Command:
+    """Ключи кнопок в каталоге строк: текст кнопки зависит от языка интерфейса."""
+
+    ADD_WORD = 'button.add_word'
+    DELETE_WORD = 'button.delete_word'
+    NEXT = 'button.next'
+    RESTART = 'button.restart'
+    ADMIN_DELETE_WORD = 'button.admin_delete_word'
+
+
+def create_markup(options: List[str], lang: str) -> types.ReplyKeyboardMarkup:
+    """Клавиатура карточки: варианты ответа и кнопки управления.
+    
+    Клавиатура собирается заново для каждого сообщения, поэтому
+    обработчики разных чатов не делят между собой список кнопок.
+    
+    Args:
+        options: Варианты ответа в порядке показа
+        lang: Язык интерфейса
+        
+    Returns:
+        types.ReplyKeyboardMarkup: Клавиатура для сообщения
+    """
+    markup = types.ReplyKeyboardMarkup(row_width=2)
+    markup.add(
+        *[types.KeyboardButton(option) for option in options],
+        types.KeyboardButton(get_text(Command.NEXT, lang)),
+        types.KeyboardButton(get_text(Command.ADD_WORD, lang)),
+        types.KeyboardButton(get_text(Command.DELETE_WORD, lang)),
+        types.KeyboardButton(get_text(Command.RESTART, lang)),
+        types.KeyboardButton(get_text(Command.ADMIN_DELETE_WORD, lang))
+    )
+    return markup
+
+
+def add_new_word(message, bot):
+    try:
+        cid = message.chat.id
+        user_id = message.from_user.id
+        params = get_pair_params(get_user_pair(user_id))
+
+        # Проверяем существование пользователя
+        if not register_user(user_id, message.from_user.username):
+            bot.send_message(cid, get_text('error.user_not_found', params['lang']))
+            return
+
+        # Запрашиваем слово на изучаемом языке
+        bot.send_message(cid, get_text('add_word.enter_word', **params))
+        bot.register_next_step_handler(message, lambda m: process_english_word(m, user_id, bot))
+    except Exception as e:
+        print(f"Ошибка при добавлении слова: {e}")
+        try:
+            bot.send_message(cid, get_text('error.generic', get_user_language(cid)))
+        except Exception as e:
+            print(f"Ошибка при отправке сообщения об ошибке: {e}")
+
+
+def process_english_word(message: types.Message, user_id: int, bot: TeleBot) -> None:
+    """Обработка введенного английского слова.
+    
+    Args:
+        message: Сообщение от пользователя
+        user_id: ID пользователя в Telegram
+        bot: Экземпляр бота
+    """
+    try:
+        cid = message.chat.id
+        english_word = message.text.strip().lower()
+        pair_id = get_user_pair(user_id)
+        lang = get_language_pair(pair_id)[1]
+
+        if not english_word:
+            bot.send_message(cid, get_text('add_word.empty_word', lang))
+            return
+
+        # Проверяем, существует ли уже такое слово
+        if get_storage().find_word(user_id, english_word, pair_id=pair_id) is not None:
+            bot.send_message(cid, get_text('add_word.exists', lang))
+            return
+
+        # Запрашиваем перевод
+        bot.send_message(cid, get_text('add_word.enter_translation', lang))
+        bot.register_next_step_handler(
+            message,
+            lambda m: process_translation(m, english_word, user_id, bot)
+        )
+    except Exception as e:
+        print(f"Ошибка при обработке английского слова: {e}")
+        try:
+            bot.send_message(cid, get_text('error.generic', get_user_language(cid)))
+        except Exception as e:
+            print(f"Ошибка при отправке сообщения об ошибке: {e}")
+
+
+def process_translate_word(message, bot):
+    try:
+        cid = message.chat.id
+        user_id = message.from_user.id
+        translation = message.text.strip()
+        pair_id = get_user_pair(user_id)
+        lang = get_language_pair(pair_id)[1]
+
+        if not translation:
+            bot.send_message(cid, get_text('add_word.empty_translation', lang))
+            return
+
+        # Получаем сохраненное слово на изучаемом языке
+        with bot.retrieve_data(message.from_user.id, message.chat.id) as data:
+            if 'new_word' not in data:
+                bot.send_message(cid, get_text('add_word.start_over', lang))
+                bot.delete_state(message.from_user.id, message.chat.id)
+                create_cards(message, bot)
+                return
+
+            english_word = data['new_word']
+
+        # Добавляем слово в личный словарь пользователя
+        if get_storage().add_personal_word(
+                user_id, english_word, translation,
+                deck_id=get_user_deck(user_id), pair_id=pair_id) is None:
+            bot.send_message(cid, get_text('add_word.error', lang))
+            return
+
+        # Получаем количество личных слов пользователя в текущей паре
+        words_count = get_storage().get_personal_words_count(user_id, pair_id)
+        
+        bot.send_message(
+            cid,
+            get_text('add_word.added', lang, word=english_word, translation=translation, count=words_count)
+        )
+
+        # Сбрасываем состояние и показываем новую карточку
+        bot.delete_state(message.from_user.id, message.chat.id)
+        create_cards(message, bot)
+    except Exception as e:
+        print(f"Ошибка при обработке перевода: {e}")
+        try:
+            bot.send_message(cid, get_text('error.generic', get_user_language(cid)))
+            bot.delete_state(message.from_user.id, message.chat.id)
+            create_cards(message, bot)
+        except Exception as e:
+            print(f"Ошибка при отправке сообщения об ошибке: {e}")
+
+
+def create_cards(message: types.Message, bot: TeleBot) -> None:
+    """Создание новой карточки со словом.
+    
+    Args:
+        message: Сообщение от пользователя
+        bot: Экземпляр бота
+    """
+    try:
+        cid = message.chat.id
+        chat = get_chat(cid)
+        if chat.is_new:
+            params = get_pair_params(chat.pair_id)
+            bot.send_message(cid, get_text('cards.greeting', **params))
+            register_user(cid, message.from_user.username)
+        
+        deck_id = chat.deck_id
+        pair_id = chat.pair_id
+        params = get_pair_params(pair_id)
+        lang = params['lang']
+        mode = 'all' if deck_id is None else 'deck'
+        word_data = None
+        if get_card_selection() == 'difficulty':
+            word_data = sampler.pick_word(cid, deck_id, pair_id)
+            if word_data:
+                mode = 'difficulty'
+        if not word_data:
+            word_data = get_storage().get_random_word(
+                cid, show_all=True, deck_id=deck_id, pair_id=pair_id)  # Показываем все слова
+        if not word_data:
+            if deck_id is not None:
+                bot.send_message(cid, get_text('cards.deck_done', lang))
+            else:
+                bot.send_message(cid, get_text('cards.all_done', lang))
+            return
+
+        word_id, target_word, translate = word_data
+        other_words = get_storage().get_random_other_words(cid, word_id, deck_id=deck_id, pair_id=pair_id)
+        
+        # Перемешиваем варианты ответов
+        options = [target_word] + [word[0] for word in other_words]
+        random.shuffle(options)
+        
+        greeting = get_text('cards.choose', translation=translate, **params)
+        bot.send_message(message.chat.id, greeting, reply_markup=create_markup(options, lang))
+        
+        # Варианты сохраняем вместе с карточкой: клавиатура принадлежит чату
+        chat.card = {
+            'target_word': target_word,
+            'translate_word': translate,
+            'word_id': word_id,
+            'options': options,
+            'mode': mode,
+            'shown_at': time.time()
+        }
+        print(f"Обновлено текущее слово: {chat.card}")
+    except Exception as e:
+        print(f"Ошибка при создании карточки: {e}")
+        try:
+            bot.send_message(cid, get_text('error.generic', get_user_language(cid)))
+        except Exception as e:
+            print(f"Ошибка при отправке сообщения об ошибке: {e}")
+
+
+def next_cards(message, bot):
+    try:
+        cid = message.chat.id
+        # Сбрасываем состояние перед показом новой карточки
+        bot.delete_state(message.from_user.id, message.chat.id)
+        create_cards(message, bot)
+    except Exception as e:
+        print(f"Ошибка при переходе к следующей карточке: {e}")
+        try:
+            bot.send_message(cid, get_text('error.generic', get_user_language(cid)))
+            create_cards(message, bot)
+        except Exception as e:
+            print(f"Ошибка при отправке сообщения об ошибке: {e}")
+
+
+def delete_word(message, bot):
+    try:
+        cid = message.chat.id
+        user_id = message.from_user.id
+
+        # Проверяем наличие текущего слова
+        chat = get_chat(cid)
+        lang = get_user_language(cid)
+        if chat.card is None:
+            bot.send_message(cid, get_text('delete_word.no_word', lang))
+            return
+
+        current_data = chat.card
+        word_id = current_data['word_id']
+
+        # Удаляем связь между пользователем и словом
+        deleted = get_storage().delete_user_word(user_id, word_id)
+        if deleted is None:
+            bot.send_message(cid, get_text('error.db_connection', lang))
+            return
+        if deleted:
+            bot.send_message(cid, get_text('delete_word.deleted', lang, word=current_data['target_word']))
+        else:
+            bot.send_message(cid, get_text('delete_word.missing', lang))
+
+        # Показываем новую карточку
+        create_cards(message, bot)
+    except Exception as e:
+        print(f"Ошибка при удалении слова: {e}")
+        try:
+            bot.send_message(cid, get_text('delete_word.error', get_user_language(cid)))
+        except Exception as e:
+            print(f"Ошибка при отправке сообщения об ошибке: {e}")
+
+
+def add_word(message, bot):
+    cid = message.chat.id
+    bot.send_message(cid, get_text('add_word.enter_word', **get_pair_params(get_user_pair(cid))))
+    bot.set_state(message.from_user.id, MyStates.add_word, message.chat.id)
+
+
+def process_add_word(message, bot):
+    try:
+        cid = message.chat.id
+        user_id = message.from_user.id
+        english_word = message.text.strip().lower()
+        pair_id = get_user_pair(user_id)
+        lang = get_language_pair(pair_id)[1]
+
+        if not english_word:
+            bot.send_message(cid, get_text('add_word.empty_word', lang))
+            return
+
+        # Проверяем, существует ли уже такое слово
+        if get_storage().find_word(user_id, english_word, pair_id=pair_id) is not None:
+            bot.send_message(cid, get_text('add_word.exists', lang))
+            bot.delete_state(message.from_user.id, message.chat.id)
+            create_cards(message, bot)
+            return
+
+        # Сохраняем слово и запрашиваем перевод
+        with bot.retrieve_data(message.from_user.id, message.chat.id) as data:
+            data['new_word'] = english_word
+            bot.send_message(cid, get_text('add_word.enter_translation', lang))
+            bot.set_state(message.from_user.id, MyStates.translate_word, message.chat.id)
+    except Exception as e:
+        print(f"Ошибка при обработке английского слова: {e}")
+        try:
+            bot.send_message(cid, get_text('error.generic', get_user_language(cid)))
+            bot.delete_state(message.from_user.id, message.chat.id)
+            create_cards(message, bot)
+        except Exception as e:
+            print(f"Ошибка при отправке сообщения об ошибке: {e}")
+
+
+def restart_bot(message, bot):
+    cid = message.chat.id
+    bot.send_message(cid, get_text('restart.restarting', get_user_language(cid)))
+    get_storage().reset_user_progress(cid)  # Сброс прогресса
+    create_cards(message, bot)
+
+
+def choose_deck(message, bot):
+    try:
+        cid = message.chat.id
+        pair_id = get_user_pair(cid)
+        lang = get_language_pair(pair_id)[1]
+        decks = get_storage().get_decks(cid, pair_id=pair_id)
+        current_deck = get_user_deck(cid)
+
+        markup = types.InlineKeyboardMarkup(row_width=1)
+        mark = '✅ ' if current_deck is None else ''
+        markup.add(types.InlineKeyboardButton(
+            f"{mark}{get_text('deck.all_words', lang)}", callback_data='deck:0'))
+        for deck_id, name, owner_id, words_count in decks:
+            mark = '✅ ' if deck_id == current_deck else ''
+            owner = '👤 ' if owner_id is not None else ''
+            markup.add(types.InlineKeyboardButton(
+                f"{mark}{owner}{name} ({words_count})",
+                callback_data=f'deck:{deck_id}'
+            ))
+
+        bot.send_message(cid, get_text('deck.choose', lang), reply_markup=markup)
+    except Exception as e:
+        print(f"Ошибка при выборе колоды: {e}")
+        try:
+            bot.send_message(cid, get_text('error.generic', get_user_language(cid)))
+        except Exception as e:
+            print(f"Ошибка при отправке сообщения об ошибке: {e}")
+
+
+def select_deck(call, bot):
+    try:
+        cid = call.message.chat.id
+        deck_id = int(call.data.split(':', 1)[1]) or None
+        lang = get_user_language(cid)
+
+        if deck_id is None:
+            deck_name = get_text('deck.all_words', lang)
+        else:
+            deck = get_storage().get_deck(cid, deck_id)
+            if not deck:
+                bot.answer_callback_query(call.id, get_text('deck.not_found', lang))
+                return
+            deck_name = deck[1]
+
+        if not set_user_deck(cid, deck_id):
+            bot.answer_callback_query(call.id, get_text('deck.select_error', lang))
+            return
+
+        bot.answer_callback_query(call.id)
+        bot.send_message(cid, get_text('deck.selected', lang, name=deck_name))
+        call.message.from_user = call.from_user
+        create_cards(call.message, bot)
+    except Exception as e:
+        print(f"Ошибка при выборе колоды: {e}")
+
+
+def new_deck(message, bot):
+    try:
+        cid = message.chat.id
+        name = message.text.partition(' ')[2].strip()
+        pair_id = get_user_pair(cid)
+        lang = get_language_pair(pair_id)[1]
+        if not name:
+            bot.send_message(cid, get_text('deck.new_usage', lang))
+            return
+
+        deck_id = get_storage().create_deck(name, cid, pair_id=pair_id)
+        if deck_id is None or not set_user_deck(cid, deck_id):
+            bot.send_message(cid, get_text('deck.create_error', lang))
+            return
+
+        bot.send_message(cid, get_text('deck.created', lang, name=name))
+    except Exception as e:
+        print(f"Ошибка при создании колоды: {e}")
+        try:
+            bot.send_message(cid, get_text('error.generic', get_user_language(cid)))
+        except Exception as e:
+            print(f"Ошибка при отправке сообщения об ошибке: {e}")
+
+
+def export_deck_command(message, bot):
+    try:
+        cid = message.chat.id
+        deck_id = get_user_deck(cid)
+        lang = get_user_language(cid)
+        if deck_id is None:
+            bot.send_message(cid, get_text('deck.choose_first', lang))
+            return
+
+        deck = get_storage().get_deck(cid, deck_id)
+        data = get_storage().export_deck(cid, deck_id) if deck else None
+        if data is None:
+            bot.send_message(cid, get_text('deck.export_error', lang))
+            return
+
+        bot.send_document(
+            cid,
+            io.BytesIO(data),
+            visible_file_name=f"{deck[1]}.csv",
+            caption=get_text('deck.caption', lang, name=deck[1])
+        )
+    except Exception as e:
+        print(f"Ошибка при выгрузке колоды: {e}")
+        try:
+            bot.send_message(cid, get_text('error.generic', get_user_language(cid)))
+        except Exception as e:
+            print(f"Ошибка при отправке сообщения об ошибке: {e}")
+
+
+def import_deck_command(message, bot):
+    try:
+        cid = message.chat.id
+        document = message.document
+        pair_id = get_user_pair(cid)
+        lang = get_language_pair(pair_id)[1]
+        name = message.caption.partition(' ')[2].strip()
+        if not name:
+            name = os.path.splitext(document.file_name or '')[0].strip()
+        if not name:
+            bot.send_message(cid, get_text('deck.import_usage', lang))
+            return
+
+        file_info = bot.get_file(document.file_id)
+        data = bot.download_file(file_info.file_path)
+
+        # Администраторы загружают общие колоды, остальные - личные
+        owner_id = None if cid in ADMIN_IDS else cid
+        result = get_storage().import_deck(name, data, owner_id, pair_id=pair_id)
+        if result is None:
+            bot.send_message(cid, get_text('deck.import_error', lang))
+            return
+
+        deck_id, words_count = result
+        set_user_deck(cid, deck_id)
+        bot.send_message(cid, get_text('deck.imported', lang, name=name, count=words_count))
+    except Exception as e:
+        print(f"Ошибка при загрузке колоды: {e}")
+        try:
+            bot.send_message(cid, get_text('error.generic', get_user_language(cid)))
+        except Exception as e:
+            print(f"Ошибка при отправке сообщения об ошибке: {e}")
+
+
+def get_pair_name(pair_id: int, lang: str) -> str:
+    """Название языковой пары с флагами на языке интерфейса."""
+    source_lang, target_lang = get_language_pair(pair_id)
+    return get_text('language.pair', lang, **get_language_params(source_lang, target_lang, lang))
+
+
+def choose_language(message, bot):
+    try:
+        cid = message.chat.id
+        current_pair = get_user_pair(cid)
+        lang = get_language_pair(current_pair)[1]
+
+        markup = types.InlineKeyboardMarkup(row_width=1)
+        for pair_id in load_language_pairs():
+            mark = '✅ ' if pair_id == current_pair else ''
+            markup.add(types.InlineKeyboardButton(
+                f"{mark}{get_pair_name(pair_id, lang)}",
+                callback_data=f'pair:{pair_id}'
+            ))
+
+        bot.send_message(cid, get_text('language.choose', lang), reply_markup=markup)
+    except Exception as e:
+        print(f"Ошибка при выборе языковой пары: {e}")
+        try:
+            bot.send_message(cid, get_text('error.generic', get_user_language(cid)))
+        except Exception as e:
+            print(f"Ошибка при отправке сообщения об ошибке: {e}")
+
+
+def select_pair(call, bot):
+    try:
+        cid = call.message.chat.id
+        pair_id = int(call.data.split(':', 1)[1])
+
+        # Пара сохраняется в строке пользователя, поэтому она должна существовать
+        register_user(cid, call.from_user.username)
+        if not set_user_pair(cid, pair_id):
+            bot.answer_callback_query(call.id, get_text('language.select_error', get_user_language(cid)))
+            return
+
+        # Интерфейс переключается на язык перевода выбранной пары
+        lang = get_language_pair(pair_id)[1]
+        bot.answer_callback_query(call.id)
+        bot.send_message(cid, get_text('language.selected', lang, pair=get_pair_name(pair_id, lang)))
+        call.message.from_user = call.from_user
+        create_cards(call.message, bot)
+    except Exception as e:
+        print(f"Ошибка при выборе языковой пары: {e}")
+
+
+def new_pair(message, bot):
+    try:
+        cid = message.chat.id
+        lang = get_user_language(cid)
+        if cid not in ADMIN_IDS:
+            bot.send_message(cid, get_text('language.no_rights', lang))
+            return
+
+        # /newpair <изучаемый язык> <язык перевода>
+        args = [arg.lower() for arg in message.text.split()[1:]]
+        if len(args) != 2 or args[0] == args[1]:
+            bot.send_message(cid, get_text('language.new_usage', lang))
+            return
+        languages = get_languages()
+        for code in args:
+            if code not in languages:
+                bot.send_message(cid, get_text('language.unknown', lang, code=code, codes=', '.join(languages)))
+                return
+
+        pair_id = get_storage().create_language_pair(*args)
+        if pair_id is None:
+            bot.send_message(cid, get_text('language.create_error', lang))
+            return
+
+        load_language_pairs()
+        bot.send_message(cid, get_text('language.created', lang, pair=get_pair_name(pair_id, lang)))
+    except Exception as e:
+        print(f"Ошибка при создании языковой пары: {e}")
+        try:
+            bot.send_message(cid, get_text('error.generic', get_user_language(cid)))
+        except Exception as e:
+            print(f"Ошибка при отправке сообщения об ошибке: {e}")
+
+
+def message_reply(message, bot):
+    try:
+        cid = message.chat.id
+        text = message.text
+        command = get_command(text)
+        
+        # Проверяем команды
+        if command == Command.RESTART:
+            restart_bot(message, bot)
+            return
+        elif command == Command.ADD_WORD:
+            add_word(message, bot)
+            return
+        elif command == Command.DELETE_WORD:
+            delete_word(message, bot)
+            return
+        elif command == Command.NEXT:
+            next_cards(message, bot)
+            return
+        elif command == Command.ADMIN_DELETE_WORD:
+            admin_delete_word(message, bot)
+            return
+        
+        # Проверяем наличие текущего слова (после вытеснения чата из памяти
+        # карточка восстанавливается из хранилища)
+        chat = get_chat(cid)
+        if chat.card is None:
+            print("Нет текущего слова, создаем новую карточку")
+            create_cards(message, bot)
+            return
+        
+        current_data = chat.card
+        current_word = current_data['target_word']
+        current_translation = current_data['translate_word']
+        current_word_id = current_data['word_id']
+        params = get_pair_params(chat.pair_id)
+        lang = params['lang']
+        
+        print(f"Текущее слово: '{current_word}', перевод '{current_translation}', ID {current_word_id}")
+        print(f"Сравниваем ответы: '{text}' и '{current_word}'")
+        
+        correct = text.strip().lower() == current_word.strip().lower()
+        shown_at = current_data.get('shown_at')
+        answer_log.record(
+            cid,
+            current_word_id,
+            current_data.get('mode', 'all'),
+            correct,
+            int((time.time() - shown_at) * 1000) if shown_at else None
+        )
+        
+        if correct:
+            # Правильный ответ
+            print(f"Ответ верный! Добавляем слово {current_word_id} пользователю {cid}")
+            if get_storage().add_user_word(cid, current_word_id):
+                hint = show_target(current_data)
+                hint_text = [get_text('answer.correct', lang), hint]
+                hint = show_hint(*hint_text)
+                markup = create_markup(current_data.get('options', [current_word]), lang)
+                bot.send_message(cid, hint, reply_markup=markup)
+                # Показываем новую карточку
+                create_cards(message, bot)
+            else:
+                # Если слово уже существует, просто показываем новую карточку
+                create_cards(message, bot)
+        else:
+            # Неправильный ответ
+            print(f"Ответ неверный! Ожидалось: '{current_word}', получено: '{text}'")
+            hint = show_hint(get_text('answer.wrong', lang),
+                           get_text('answer.try_again', translation=current_translation, **params))
+            
+            # Обновляем клавиатуру: правильный ответ и новые варианты
+            other_words = get_storage().get_random_other_words(
+                cid, current_word_id, deck_id=chat.deck_id, pair_id=chat.pair_id)
+            options = [current_word] + [word[0] for word in other_words]
+            random.shuffle(options)
+            
+            bot.send_message(cid, hint, reply_markup=create_markup(options, lang))
+            
+            # Оставляем текущее слово
+            print(f"Оставляем текущее слово: '{current_word}', перевод '{current_translation}', ID {current_word_id}")
+    except Exception as e:
+        print(f"Ошибка в обработке сообщения: {e}")
+        try:
+            bot.send_message(cid, get_text('error.generic', get_user_language(cid)))
+            create_cards(message, bot)
+        except Exception as e:
+            print(f"Ошибка при отправке сообщения об ошибке: {e}")
+
+
+def export_answers_command(message, bot):
+    try:
+        cid = message.chat.id
+        lang = get_user_language(cid)
+        if cid not in ADMIN_IDS:
+            bot.send_message(cid, get_text('answers.no_rights', lang))
+            return
+
+        # /export_answers [csv|parquet] [дней]
+        args = message.text.split()[1:]
+        export_format = args[0].lower() if args else 'csv'
+        if export_format not in EXPORT_FORMATS or len(args) > 2 or (len(args) == 2 and not args[1].isdigit()):
+            bot.send_message(cid, get_text('answers.usage', lang))
+            return
+        since = None
+        if len(args) == 2:
+            since = datetime.now(timezone.utc) - timedelta(days=int(args[1]))
+
+        # Записываем накопленные ответы, чтобы они попали в выгрузку
+        answer_log.flush()
+        with tempfile.TemporaryFile() as output:
+            total = export_answer_events(output, export_format, since)
+            if total is None:
+                bot.send_message(cid, get_text('answers.export_error', lang))
+                return
+            output.seek(0)
+            bot.send_document(
+                cid,
+                output,
+                visible_file_name=f"answers.{export_format}",
+                caption=get_text('answers.caption', lang, count=total)
+            )
+    except Exception as e:
+        print(f"Ошибка при выгрузке журнала ответов: {e}")
+        try:
+            bot.send_message(cid, get_text('error.generic', get_user_language(cid)))
+        except Exception as e:
+            print(f"Ошибка при отправке сообщения об ошибке: {e}")
+
+
+def memory_command(message, bot):
+    try:
+        cid = message.chat.id
+        lang = get_user_language(cid)
+        if cid not in ADMIN_IDS:
+            bot.send_message(cid, get_text('memory.no_rights', lang))
+            return
+
+        count, size = chats.memory_usage()
+        bot.send_message(
+            cid,
+            get_text(
+                'memory.usage', lang,
+                count=count,
+                limit=chats.limit,
+                size_mb=size / 2 ** 20,
+                per_chat=size // max(count, 1),
+                ttl_min=chats.ttl // 60
+            )
+        )
+    except Exception as e:
+        print(f"Ошибка при получении статистики памяти: {e}")
+
+
+def admin_delete_word(message, bot):
+    try:
+        cid = message.chat.id
+        chat = get_chat(cid)
+        lang = get_user_language(cid)
+        if chat.card is None:
+            bot.send_message(cid, get_text('delete_word.no_word', lang))
+            return
+
+        current_data = chat.card
+        word_id = current_data['word_id']
+        
+        # Личные слова может удалить их владелец, общие - только администратор
+        if get_storage().delete_word_from_database(word_id, cid, is_admin=cid in ADMIN_IDS):
+            bot.send_message(
+                cid, get_text('delete_word.deleted_from_database', lang, word=current_data['target_word']))
+            # Показываем новую карточку
+            create_cards(message, bot)
+        elif cid not in ADMIN_IDS:
+            bot.send_message(cid, get_text('delete_word.no_rights', lang))
+        else:
+            bot.send_message(cid, get_text('delete_word.database_error', lang))
+            # Показываем новую карточку
+            create_cards(message, bot)
+    except Exception as e:
+        print(f"Ошибка при удалении слова администратором: {e}")
+        try:
+            bot.send_message(cid, get_text('delete_word.error', get_user_language(cid)))
+            # Показываем новую карточку
+            create_cards(message, bot)
+        except Exception as e:
+            print(f"Ошибка при отправке сообщения об ошибке: {e}")
+
+
+def register_handlers(bot: TeleBot) -> None:
+    """Регистрация обработчиков в боте.
+    
+    Порядок регистрации важен: обработчик любых текстовых сообщений
+    должен идти после команд и состояний.
+    
+    Args:
+        bot: Экземпляр бота
+    """
+    bot.register_message_handler(process_translate_word, state=MyStates.translate_word, pass_bot=True)
+    bot.register_message_handler(create_cards, commands=['cards', 'start'], pass_bot=True)
+    bot.register_message_handler(
+        next_cards, func=lambda message: get_command(message.text) == Command.NEXT, pass_bot=True)
+    bot.register_message_handler(
+        delete_word, func=lambda message: get_command(message.text) == Command.DELETE_WORD, pass_bot=True)
+    bot.register_message_handler(
+        add_word, func=lambda message: get_command(message.text) == Command.ADD_WORD, pass_bot=True)
+    bot.register_message_handler(process_add_word, state=MyStates.add_word, pass_bot=True)
+    bot.register_message_handler(
+        restart_bot, func=lambda message: get_command(message.text) == Command.RESTART, pass_bot=True)
+    bot.register_message_handler(choose_deck, commands=['deck'], pass_bot=True)
+    bot.register_callback_query_handler(
+        select_deck, func=lambda call: call.data.startswith('deck:'), pass_bot=True)
+    bot.register_message_handler(new_deck, commands=['newdeck'], pass_bot=True)
+    bot.register_message_handler(choose_language, commands=['language'], pass_bot=True)
+    bot.register_callback_query_handler(
+        select_pair, func=lambda call: call.data.startswith('pair:'), pass_bot=True)
+    bot.register_message_handler(new_pair, commands=['newpair'], pass_bot=True)
+    bot.register_message_handler(export_deck_command, commands=['export_deck'], pass_bot=True)
+    bot.register_message_handler(export_answers_command, commands=['export_answers'], pass_bot=True)
+    bot.register_message_handler(memory_command, commands=['memory'], pass_bot=True)
+    bot.register_message_handler(
+        import_deck_command,
+        content_types=['document'],
+        func=lambda message: (message.caption or '').startswith('/import_deck'),
+        pass_bot=True
+    )
+    bot.register_message_handler(
+        message_reply, func=lambda message: True, content_types=['text'], pass_bot=True)
+    bot.register_message_handler(
+        admin_delete_word, func=lambda message: get_command(message.text) == Command.ADMIN_DELETE_WORD, pass_bot=True)
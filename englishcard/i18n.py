@@ -0,0 +1,106 @@
+"""Строки интерфейса бота на разных языках.
+
+Строки хранятся в файлах ``englishcard/locales/<язык>.json`` и загружаются
+в память один раз, при первом обращении. Язык интерфейса чата - язык
+перевода его языковой пары: изучающий английский с переводом на русский
+видит русский интерфейс. Если строки нет в каталоге языка, используется
+русский каталог.
+"""
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+LOCALES_DIR: str = os.path.join(os.path.dirname(__file__), 'locales')
+DEFAULT_LANGUAGE: str = 'ru'
+# Строки кнопок: по тексту нажатой кнопки на любом языке находится команда
+BUTTON_PREFIX: str = 'button.'
+
+_catalog: Optional[Dict[str, Dict[str, Dict]]] = None
+_commands: Dict[str, str] = {}
+_lock = threading.Lock()
+
+
+def load_catalog(path: str = LOCALES_DIR) -> Dict[str, Dict[str, Dict]]:
+    """Чтение каталогов строк всех языков.
+
+    Args:
+        path: Папка с файлами <язык>.json
+
+    Returns:
+        Dict[str, Dict[str, Dict]]: Каталог каждого языка: названия языков
+            (languages) и строки интерфейса (messages)
+    """
+    catalog = {}
+    for file_name in sorted(os.listdir(path)):
+        lang, extension = os.path.splitext(file_name)
+        if extension == '.json':
+            with open(os.path.join(path, file_name), encoding='utf-8') as f:
+                catalog[lang] = json.load(f)
+    return catalog
+
+
+def get_catalog() -> Dict[str, Dict[str, Dict]]:
+    """Каталог строк, загруженный при первом обращении."""
+    global _catalog
+    if _catalog is None:
+        with _lock:
+            if _catalog is None:
+                catalog = load_catalog()
+                for messages in (locale['messages'] for locale in catalog.values()):
+                    _commands.update(
+                        (text, key) for key, text in messages.items() if key.startswith(BUTTON_PREFIX)
+                    )
+                _catalog = catalog
+    return _catalog
+
+
+def get_text(key: str, lang: str = DEFAULT_LANGUAGE, **params) -> str:
+    """Строка интерфейса.
+
+    Args:
+        key: Ключ строки, например 'cards.choose'
+        lang: Язык интерфейса
+        **params: Значения для подстановки в строку
+
+    Returns:
+        str: Строка на языке lang или на языке по умолчанию
+    """
+    catalog = get_catalog()
+    text = catalog.get(lang, {}).get('messages', {}).get(key)
+    if text is None:
+        text = catalog[DEFAULT_LANGUAGE]['messages'][key]
+    return text.format(**params) if params else text
+
+
+def get_command(text: Optional[str]) -> Optional[str]:
+    """Ключ кнопки по ее тексту на любом языке или None, если это не кнопка."""
+    get_catalog()
+    return _commands.get(text)
+
+
+def get_languages() -> List[str]:
+    """Коды языков, для которых в каталоге есть названия."""
+    return list(get_catalog()[DEFAULT_LANGUAGE]['languages'])
+
+
+def get_language_params(source_lang: str, target_lang: str, lang: str) -> Dict[str, str]:
+    """Названия и флаги языков пары для подстановки в строки интерфейса.
+
+    Args:
+        source_lang: Код изучаемого языка
+        target_lang: Код языка перевода
+        lang: Язык интерфейса
+
+    Returns:
+        Dict[str, str]: source_name, source_in, source_flag, target_name и target_flag
+    """
+    catalog = get_catalog()
+    languages = catalog.get(lang, catalog[DEFAULT_LANGUAGE])['languages']
+    params = {}
+    for prefix, code in (('source', source_lang), ('target', target_lang)):
+        language = languages.get(code, {})
+        params[f'{prefix}_name'] = language.get('name', code)
+        params[f'{prefix}_in'] = language.get('in', code)
+        params[f'{prefix}_flag'] = language.get('flag', '')
+    return params
@@ -0,0 +1,226 @@
+"""Жизненный цикл бота: переподключение, корректное завершение
+и сохранение состояния чатов между перезапусками."""
+import json
+import os
+import random
+import signal
+import threading
+import time
+from functools import partial
+from typing import Optional
+
+from telebot import TeleBot
+
+from englishcard.config import (
+    CHECKPOINT_INTERVAL,
+    DRAIN_TIMEOUT,
+    HEALTHY_POLLING_TIME,
+    MAX_RETRY_DELAY,
+    RETRY_DELAY,
+    get_card_selection,
+    get_checkpoint_path,
+)
+from englishcard.difficulty import difficulty_loop
+from englishcard.events import answer_log
+from englishcard.state import (
+    ChatState,
+    chats,
+    evict_loop,
+    shutdown_event,
+    shutdown_hooks,
+    state_storage,
+)
+from englishcard.storage import close_storage
+
+STARTED_AT: float = time.perf_counter()
+
+# Хранилище закрывается последним: хуки, добавленные при импорте state и
+# events выше, еще записывают в него карточки чатов и журнал ответов
+shutdown_hooks.append(close_storage)
+
+
+def save_checkpoint(path: Optional[str] = None) -> bool:
+    """Сохранение состояния чатов на диск.
+    
+    Сохраняются состояния чатов в памяти (колода, текущая карточка и
+    точность ответов) и незавершенных диалогов (например, добавления
+    слова). Файл записывается атомарно через временный файл.
+    
+    Args:
+        path: Путь к файлу контрольной точки (по умолчанию CHECKPOINT_PATH)
+        
+    Returns:
+        bool: True если состояние сохранено
+    """
+    path = path or get_checkpoint_path()
+    try:
+        checkpoint = {
+            'saved_at': time.time(),
+            'chats': {str(cid): chat.to_dict() for cid, chat in chats.items() if not chat.is_new},
+            'states': {
+                key: {'state': value['state'], 'data': dict(value['data'])}
+                for key, value in list(state_storage.data.items())
+            },
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        print(f"Ошибка при сохранении состояния: {e}")
+        return False
+
+
+def restore_checkpoint(path: Optional[str] = None) -> int:
+    """Восстановление состояния чатов из контрольной точки.
+    
+    Args:
+        path: Путь к файлу контрольной точки (по умолчанию CHECKPOINT_PATH)
+        
+    Returns:
+        int: Количество восстановленных чатов
+    """
+    path = path or get_checkpoint_path()
+    if not os.path.exists(path):
+        return 0
+
+    try:
+        with open(path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+
+        restored = 0
+        for cid, data in checkpoint.get('chats', {}).items():
+            chats.add(int(cid), ChatState(**data))
+            restored += 1
+        state_storage.data.update(checkpoint.get('states', {}))
+        return restored
+    except Exception as e:
+        print(f"Ошибка при восстановлении состояния: {e}")
+        return 0
+
+
+def checkpoint_loop() -> None:
+    """Периодическое сохранение состояния на случай аварийного завершения."""
+    while not shutdown_event.wait(CHECKPOINT_INTERVAL):
+        save_checkpoint()
+
+
+def drain_updates(bot: TeleBot, timeout: float = DRAIN_TIMEOUT) -> bool:
+    """Ожидание обработки уже полученных обновлений.
+    
+    Args:
+        bot: Экземпляр бота
+        timeout: Максимальное время ожидания в секундах
+        
+    Returns:
+        bool: True если очередь обработчиков опустела до таймаута
+    """
+    dispatcher = getattr(bot, 'dispatcher', None)
+    if dispatcher:
+        drained = dispatcher.wait(timeout)
+        # Потоки завершаются после уже поставленных в очередь чатов
+        dispatcher.close(timeout)
+        return drained
+
+    worker_pool = getattr(bot, 'worker_pool', None)
+    if not worker_pool:
+        return True
+
+    deadline = time.monotonic() + timeout
+    while not worker_pool.tasks.empty() and time.monotonic() < deadline:
+        time.sleep(0.1)
+    drained = worker_pool.tasks.empty()
+    # Потоки завершаются после текущей задачи, поэтому close() дожидается
+    # обработчиков, которые еще выполняются
+    worker_pool.close()
+    return drained
+
+
+def handle_shutdown_signal(bot: TeleBot, signum, frame) -> None:
+    """Обработчик SIGINT/SIGTERM: останавливает получение обновлений."""
+    print(f"Получен сигнал {signal.Signals(signum).name}, завершаем работу...")
+    shutdown_event.set()
+    bot.stop_polling()
+
+
+def get_retry_delay(attempt: int) -> float:
+    """Задержка перед переподключением: экспоненциальный рост со случайным разбросом.
+    
+    Args:
+        attempt: Номер неудачной попытки подряд, начиная с 0
+        
+    Returns:
+        float: Задержка в секундах
+    """
+    return random.uniform(0, min(MAX_RETRY_DELAY, RETRY_DELAY * 2 ** attempt))
+
+
+def shutdown_bot(bot: TeleBot) -> None:
+    """Корректное завершение: обработка полученных обновлений,
+    сброс отложенных записей и сохранение состояния чатов."""
+    started = time.perf_counter()
+    if not drain_updates(bot):
+        print("Не все полученные обновления успели обработаться")
+
+    for hook in shutdown_hooks:
+        try:
+            hook()
+        except Exception as e:
+            print(f"Ошибка при сбросе отложенных записей: {e}")
+
+    if save_checkpoint():
+        print(f"Состояние {len(chats)} чатов сохранено в {get_checkpoint_path()}")
+    print(f"Бот остановлен за {time.perf_counter() - started:.2f} с")
+
+
+def start_bot(bot: TeleBot) -> None:
+    """Запуск получения обновлений до сигнала завершения.
+    
+    Args:
+        bot: Экземпляр бота, созданный :func:`englishcard.app.create_app`
+    """
+    signal.signal(signal.SIGINT, partial(handle_shutdown_signal, bot))
+    signal.signal(signal.SIGTERM, partial(handle_shutdown_signal, bot))
+
+    started = time.perf_counter()
+    restored = restore_checkpoint()
+    print(f"Восстановлено состояние {restored} чатов за "
+          f"{(time.perf_counter() - started) * 1000:.1f} мс")
+
+    threading.Thread(target=checkpoint_loop, name='CheckpointThread', daemon=True).start()
+    threading.Thread(target=answer_log.flush_loop, name='AnswerLogThread', daemon=True).start()
+    threading.Thread(target=evict_loop, name='ChatEvictionThread', daemon=True).start()
+    if get_card_selection() == 'difficulty':
+        threading.Thread(target=difficulty_loop, name='DifficultyThread', daemon=True).start()
+
+    attempt = 0
+    failed_at = None
+    skip_pending = True
+    while not shutdown_event.is_set():
+        polling_started = time.perf_counter()
+        if failed_at is None:
+            print(f"Запуск бота... (время старта {polling_started - STARTED_AT:.2f} с)")
+        else:
+            print(f"Переподключение... (простой {polling_started - failed_at:.2f} с)")
+
+        try:
+            bot.polling(non_stop=False, skip_pending=skip_pending)
+            # Пропускаем накопившиеся обновления только при первом запуске,
+            # после переподключения их нужно обработать
+            skip_pending = False
+        except Exception as e:
+            print(f"Ошибка при запуске бота: {e}")
+
+        if shutdown_event.is_set():
+            break
+
+        failed_at = time.perf_counter()
+        if failed_at - polling_started >= HEALTHY_POLLING_TIME:
+            attempt = 0
+        delay = get_retry_delay(attempt)
+        attempt += 1
+        print(f"Повторная попытка через {delay:.1f} секунд...")
+        shutdown_event.wait(delay)
+
+    shutdown_bot(bot)
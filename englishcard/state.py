@@ -0,0 +1,274 @@
+"""Состояние чатов, которое бот хранит в памяти.
+
+Память ограничена: чат, к которому не обращались дольше CHAT_STATE_TTL
+секунд, и самые давние чаты сверх CHAT_STATE_LIMIT вытесняются. Текущая
+карточка и точность ответов вытесненного чата сохраняются в таблицу
+users, поэтому при следующем сообщении состояние чата восстанавливается
+из хранилища (:func:`get_chat`) и пользователь продолжает с той же карточки.
+"""
+import itertools
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from telebot.storage import StateMemoryStorage
+from telebot.handler_backends import State, StatesGroup
+
+from englishcard.config import CHAT_EVICT_INTERVAL, CHAT_STATE_LIMIT, CHAT_STATE_TTL
+from englishcard.storage import get_storage
+from englishcard.storage.base import DEFAULT_PAIR_ID
+
+shutdown_hooks: List[Callable[[], None]] = []
+shutdown_event = threading.Event()
+
+state_storage = StateMemoryStorage()
+
+
+class MyStates(StatesGroup):
+    target_word = State()
+    translate_word = State()
+    another_words = State()
+    add_word = State()
+
+
+class ChatState:
+    """Состояние одного чата: языковая пара, выбранная колода, текущая
+    карточка и точность ответов.
+
+    is_new отмечает чат пользователя, которого еще нет в хранилище: такое
+    состояние кэшируется, чтобы каждое его сообщение не читало хранилище.
+    """
+
+    __slots__ = ('pair_id', 'deck_id', 'card', 'accuracy', 'is_new', 'seen_at')
+
+    def __init__(self, deck_id: Optional[int] = None, card: Optional[Dict] = None,
+                 accuracy: Optional[float] = None, pair_id: int = DEFAULT_PAIR_ID,
+                 is_new: bool = False) -> None:
+        self.pair_id = pair_id
+        self.deck_id = deck_id
+        self.card = card
+        self.accuracy = accuracy
+        self.is_new = is_new
+        self.seen_at = time.monotonic()
+
+    def to_dict(self) -> Dict:
+        return {
+            'pair_id': self.pair_id,
+            'deck_id': self.deck_id,
+            'card': self.card,
+            'accuracy': self.accuracy
+        }
+
+
+def get_object_size(value) -> int:
+    """Приблизительный размер объекта в байтах вместе с вложенными объектами.
+
+    Ключи словарей не учитываются: у карточек это общие для всех чатов
+    строковые литералы.
+    """
+    if value is None:
+        return 0
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(get_object_size(item) for item in value.values())
+    elif isinstance(value, (list, tuple)):
+        size += sum(get_object_size(item) for item in value)
+    elif isinstance(value, ChatState):
+        size += sum(get_object_size(getattr(value, name)) for name in ChatState.__slots__)
+    return size
+
+
+class ChatCache:
+    """Состояние чатов с вытеснением неактивных.
+
+    Чаты хранятся в порядке последнего обращения, поэтому вытеснение
+    просматривает только самые давние чаты. Вытесненные чаты передаются
+    в on_evict; пока они сохраняются, обращение к чату возвращает его
+    в кэш без чтения из хранилища. После сохранения ID чатов, которые так
+    и не вернулись в кэш, передаются в on_drop под блокировкой кэша.
+    """
+
+    def __init__(self, ttl: float = CHAT_STATE_TTL, limit: int = CHAT_STATE_LIMIT,
+                 on_evict: Optional[Callable[[List[Tuple[int, ChatState]]], None]] = None,
+                 on_drop: Optional[Callable[[Set[int]], None]] = None) -> None:
+        self.ttl = ttl
+        self.limit = limit
+        self.on_evict = on_evict
+        self.on_drop = on_drop
+        self._lock = threading.Lock()
+        self._chats: 'OrderedDict[int, ChatState]' = OrderedDict()
+        self._evicting: Dict[int, ChatState] = {}
+
+    def __len__(self) -> int:
+        return len(self._chats)
+
+    def __contains__(self, cid: int) -> bool:
+        return cid in self._chats or cid in self._evicting
+
+    def get(self, cid: int) -> Optional[ChatState]:
+        """Состояние чата с отметкой обращения или None, если чата нет в памяти."""
+        with self._lock:
+            chat = self._chats.get(cid)
+            if chat is None:
+                chat = self._evicting.get(cid)
+                if chat is None:
+                    return None
+                self._chats[cid] = chat
+            else:
+                self._chats.move_to_end(cid)
+            chat.seen_at = time.monotonic()
+            return chat
+
+    def add(self, cid: int, chat: ChatState) -> ChatState:
+        """Добавление чата. Если чат уже в памяти, возвращается имеющееся состояние."""
+        with self._lock:
+            current = self._chats.get(cid) or self._evicting.get(cid)
+            if current is not None:
+                self._chats[cid] = current
+                self._chats.move_to_end(cid)
+                return current
+            chat.seen_at = time.monotonic()
+            self._chats[cid] = chat
+            evicted = self._pop_oldest(len(self._chats) - self.limit)
+        self._evict(evicted)
+        return chat
+
+    def items(self) -> List[Tuple[int, ChatState]]:
+        with self._lock:
+            return list(self._chats.items())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._chats.clear()
+            self._evicting.clear()
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Вытеснение чатов, к которым не обращались дольше ttl секунд.
+
+        Args:
+            now: Текущее время по time.monotonic() (для замеров)
+
+        Returns:
+            int: Количество вытесненных чатов
+        """
+        cutoff = (time.monotonic() if now is None else now) - self.ttl
+        with self._lock:
+            count = 0
+            for chat in self._chats.values():
+                if chat.seen_at >= cutoff:
+                    break
+                count += 1
+            evicted = self._pop_oldest(count)
+        self._evict(evicted)
+        return len(evicted)
+
+    def memory_usage(self, sample: int = 1000) -> Tuple[int, int]:
+        """Оценка памяти, занятой состоянием чатов.
+
+        Размер одного чата оценивается по последним активным чатам.
+
+        Args:
+            sample: Количество чатов для оценки
+
+        Returns:
+            Tuple[int, int]: Количество чатов в памяти и занятая ими память в байтах
+        """
+        with self._lock:
+            count = len(self._chats)
+            table = sys.getsizeof(self._chats)
+            chats = list(itertools.islice(reversed(self._chats.items()), sample))
+        if not chats:
+            return count, table
+        per_chat = sum(get_object_size(cid) + get_object_size(chat) for cid, chat in chats) / len(chats)
+        return count, table + int(per_chat * count)
+
+    def _pop_oldest(self, count: int) -> List[Tuple[int, ChatState]]:
+        evicted = [self._chats.popitem(last=False) for _ in range(max(count, 0))]
+        self._evicting.update(evicted)
+        return evicted
+
+    def _evict(self, evicted: List[Tuple[int, ChatState]]) -> None:
+        if not evicted:
+            return
+        try:
+            if self.on_evict:
+                self.on_evict(evicted)
+        finally:
+            with self._lock:
+                dropped = set()
+                for cid, _ in evicted:
+                    self._evicting.pop(cid, None)
+                    # Чат, к которому обратились во время сохранения, снова в кэше
+                    if cid not in self._chats:
+                        dropped.add(cid)
+                # Под блокировкой: чат не вернется в кэш, пока удаляется его состояние
+                if dropped and self.on_drop:
+                    self.on_drop(dropped)
+
+
+def save_chats(states: Iterable[Tuple[int, ChatState]]) -> bool:
+    """Сохранение текущих карточек и точности ответов в хранилище."""
+    return get_storage().save_chat_states([
+        (cid, chat.card['word_id'] if chat.card else None, chat.accuracy)
+        for cid, chat in states if not chat.is_new
+    ])
+
+
+def drop_dialogs(chat_ids: Set[int]) -> None:
+    """Удаление незавершенных диалогов (например, добавления слова)
+    вытесненных чатов."""
+    chat_ids = {str(cid) for cid in chat_ids}
+    for key in list(state_storage.data):
+        # Ключ состояния заканчивается на ":chat_id:user_id"
+        if key.split(state_storage.separator)[-2] in chat_ids:
+            state_storage.data.pop(key, None)
+
+
+chats = ChatCache(on_evict=save_chats, on_drop=drop_dialogs)
+shutdown_hooks.append(lambda: save_chats(chats.items()))
+
+
+def get_chat(cid: int) -> ChatState:
+    """Состояние чата из памяти или, если чат был вытеснен, из хранилища.
+
+    Args:
+        cid: ID чата в Telegram
+
+    Returns:
+        ChatState: Состояние чата; для нового пользователя - пустое состояние
+        с отметкой is_new
+    """
+    chat = chats.get(cid)
+    if chat is not None:
+        return chat
+
+    row = get_storage().get_chat_state(cid)
+    if row is None:
+        return chats.add(cid, ChatState(is_new=True))
+    pair_id, deck_id, word_id, word, translation, accuracy = row
+    card = None
+    if word is not None:
+        # Варианты ответа прежней клавиатуры не сохраняются, карточка
+        # восстанавливается с одним правильным вариантом
+        card = {
+            'target_word': word,
+            'translate_word': translation,
+            'word_id': word_id,
+            'options': [word],
+            'mode': 'all' if deck_id is None else 'deck',
+            'shown_at': None
+        }
+    return chats.add(cid, ChatState(deck_id, card, accuracy, pair_id))
+
+
+def evict_loop(interval: float = CHAT_EVICT_INTERVAL) -> None:
+    """Периодическое вытеснение неактивных чатов до завершения бота."""
+    while not shutdown_event.wait(interval):
+        try:
+            evicted = chats.evict_idle()
+            if evicted:
+                print(f"Вытеснено неактивных чатов: {evicted}, в памяти: {len(chats)}")
+        except Exception as e:
+            print(f"Ошибка при вытеснении неактивных чатов: {e}")
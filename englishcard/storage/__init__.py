@@ -0,0 +1,74 @@
+"""Хранилища словаря.
+
+Реализация выбирается переменной окружения STORAGE_BACKEND:
+``postgres`` (по умолчанию), ``sqlite`` или ``memory``. Модули реализаций
+импортируются только при выборе, поэтому для SQLite и хранилища в памяти
+psycopg2 не нужен.
+"""
+import threading
+from typing import Optional
+
+from englishcard.config import get_sqlite_path, get_storage_backend
+from englishcard.storage.base import AnswerEvent, Storage
+
+STORAGE_BACKENDS = ('postgres', 'sqlite', 'memory')
+
+_storage: Optional[Storage] = None
+_storage_lock = threading.Lock()
+
+
+def create_storage(backend: Optional[str] = None) -> Storage:
+    """Создание хранилища.
+    
+    Args:
+        backend: Название реализации (по умолчанию STORAGE_BACKEND)
+        
+    Returns:
+        Storage: Новое хранилище
+    """
+    backend = backend or get_storage_backend()
+    if backend == 'postgres':
+        from englishcard.storage.postgres import PostgresStorage
+        return PostgresStorage()
+    if backend == 'sqlite':
+        from englishcard.storage.sqlite import SQLiteStorage
+        return SQLiteStorage(get_sqlite_path())
+    if backend == 'memory':
+        from englishcard.storage.memory import MemoryStorage
+        return MemoryStorage()
+    raise ValueError(
+        f"Неизвестное хранилище '{backend}', ожидается одно из: {', '.join(STORAGE_BACKENDS)}"
+    )
+
+
+def get_storage() -> Storage:
+    """Получение хранилища приложения, которое создается при первом обращении."""
+    global _storage
+    if _storage is None:
+        # Первые сообщения обрабатываются параллельно: без блокировки каждый
+        # поток создал бы свое хранилище (и свой пул соединений)
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage()
+    return _storage
+
+
+def close_storage() -> None:
+    """Закрытие хранилища приложения, если оно было создано."""
+    with _storage_lock:
+        storage = _storage
+    if storage is not None:
+        storage.close()
+
+
+def set_storage(storage: Storage) -> None:
+    """Замена хранилища приложения (например, на хранилище в памяти для замеров)."""
+    global _storage
+    with _storage_lock:
+        _storage = storage
+
+
+__all__ = [
+    'AnswerEvent', 'Storage', 'STORAGE_BACKENDS',
+    'close_storage', 'create_storage', 'get_storage', 'set_storage',
+]
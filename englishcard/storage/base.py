@@ -0,0 +1,332 @@
+"""Интерфейс хранилища слов, пользователей и колод."""
+import csv
+import io
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+# Языковая пара по умолчанию: английские слова с переводом на русский.
+# Слова, колоды и пользователи, созданные до появления языковых пар,
+# относятся к ней
+DEFAULT_PAIR_ID: int = 1
+
+# Начальные данные для хранилищ, которые создают схему сами
+INITIAL_LANGUAGE_PAIRS: List[Tuple[str, str]] = [
+    ('en', 'ru'),
+]
+
+INITIAL_WORDS: List[Tuple[str, str]] = [
+    ('red', 'красный'),
+    ('blue', 'синий'),
+    ('green', 'зеленый'),
+    ('yellow', 'желтый'),
+    ('black', 'черный'),
+    ('white', 'белый'),
+    ('I', 'я'),
+    ('you', 'ты'),
+    ('he', 'он'),
+    ('she', 'она'),
+]
+
+INITIAL_DECKS: Dict[str, List[str]] = {
+    'Цвета': ['red', 'blue', 'green', 'yellow', 'black', 'white'],
+    'Местоимения': ['I', 'you', 'he', 'she'],
+    'A1': [],
+    'A2': [],
+    'B1': [],
+    'B2': [],
+    'C1': [],
+    'C2': [],
+}
+
+UNWANTED_WORDS: Tuple[str, ...] = ('хуй', 'член', 'chlen')
+
+ANSWER_EVENT_FIELDS: Tuple[str, ...] = (
+    'user_id', 'word_id', 'mode', 'correct', 'latency_ms', 'answered_at'
+)
+
+
+class AnswerEvent(NamedTuple):
+    """Ответ пользователя на карточку."""
+
+    user_id: int
+    word_id: int
+    mode: str
+    correct: bool
+    latency_ms: Optional[int]
+    answered_at: datetime
+
+
+class Storage(ABC):
+    """Хранилище словаря.
+    
+    Словарь состоит из общих слов (владелец None) и личных слов
+    пользователей. Слова и колоды относятся к языковой паре (изучаемый
+    язык и язык перевода); карточки строятся из слов активной пары
+    пользователя. Методы не выбрасывают исключений при ошибках доступа
+    к данным: ошибка выводится в лог, а возвращается значение по умолчанию.
+    """
+
+    @abstractmethod
+    def initialize(self) -> None:
+        """Создание схемы и заполнение начальными данными."""
+
+    @abstractmethod
+    def delete_unwanted_words(self) -> bool:
+        """Удаление нежелательных слов из общего и личных словарей."""
+
+    @abstractmethod
+    def ensure_user_exists(self, user_id: int, username: str | None) -> bool:
+        """Проверка и создание пользователя.
+        
+        Args:
+            user_id: ID пользователя в Telegram
+            username: Имя пользователя в Telegram
+            
+        Returns:
+            bool: True если пользователь существует или был создан, False в случае ошибки
+        """
+
+    @abstractmethod
+    def get_language_pairs(self) -> List[Tuple[int, str, str]]:
+        """Получение языковых пар: ID, код изучаемого языка и код языка перевода."""
+
+    @abstractmethod
+    def create_language_pair(self, source_lang: str, target_lang: str) -> Optional[int]:
+        """Создание языковой пары или получение существующей с теми же языками."""
+
+    @abstractmethod
+    def set_user_pair(self, user_id: int, pair_id: int) -> bool:
+        """Выбор активной языковой пары пользователя.
+        
+        Колода и текущая карточка относятся к прежней паре, поэтому
+        сбрасываются.
+        """
+
+    @abstractmethod
+    def reset_user_progress(self, user_id: int) -> None:
+        """Удаление всех выученных пользователем слов."""
+
+    @abstractmethod
+    def get_random_word(self, user_id: int, show_all: bool = False, deck_id: Optional[int] = None,
+                        pair_id: int = DEFAULT_PAIR_ID) -> Tuple[int, str, str] | None:
+        """Получение случайного невыученного слова для пользователя.
+        
+        Args:
+            user_id: ID пользователя в Telegram
+            show_all: Выбирать слово через LEFT JOIN вместо NOT IN
+                (имеет значение только для SQL хранилищ)
+            deck_id: ID колоды, которой ограничивается выборка
+            pair_id: ID языковой пары (колода всегда относится к одной паре)
+            
+        Returns:
+            Tuple[int, str, str] | None: ID, слово и перевод
+        """
+
+    @abstractmethod
+    def get_random_other_words(self, user_id: int, word_id: int, count: int = 3, deck_id: Optional[int] = None,
+                               pair_id: int = DEFAULT_PAIR_ID) -> List[Tuple[str]]:
+        """Получение случайных слов для вариантов ответа.
+        
+        Если указана колода, варианты берутся из нее, а недостающие
+        добираются из всего доступного пользователю словаря языковой пары.
+        """
+
+    @abstractmethod
+    def add_user_word(self, user_id: int, word_id: int) -> bool:
+        """Отметка слова выученным. Возвращает False, если оно уже выучено."""
+
+    @abstractmethod
+    def delete_user_word(self, user_id: int, word_id: int) -> Optional[bool]:
+        """Удаление слова из выученных.
+        
+        Returns:
+            Optional[bool]: True если слово было удалено, False если его не было
+                у пользователя, None в случае ошибки
+        """
+
+    @abstractmethod
+    def get_user_words_count(self, user_id: int) -> int:
+        """Получение количества выученных пользователем слов."""
+
+    @abstractmethod
+    def get_personal_words_count(self, user_id: int, pair_id: int = DEFAULT_PAIR_ID) -> int:
+        """Получение количества слов, добавленных пользователем в языковой паре."""
+
+    @abstractmethod
+    def find_word(self, user_id: int, word: str, pair_id: int = DEFAULT_PAIR_ID) -> Optional[int]:
+        """Поиск слова (в нижнем регистре) в общем и личном словаре пользователя
+        для языковой пары."""
+
+    @abstractmethod
+    def add_personal_word(self, user_id: int, word: str, translation: str, deck_id: Optional[int] = None,
+                          pair_id: int = DEFAULT_PAIR_ID) -> Optional[int]:
+        """Добавление слова в личный словарь и, если указана, в собственную колоду.
+        
+        Returns:
+            Optional[int]: ID добавленного слова или None в случае ошибки
+        """
+
+    @abstractmethod
+    def get_user_deck(self, user_id: int) -> Optional[int]:
+        """Получение выбранной пользователем колоды (None - все слова)."""
+
+    @abstractmethod
+    def set_user_deck(self, user_id: int, deck_id: Optional[int]) -> bool:
+        """Сохранение выбранной пользователем колоды."""
+
+    @abstractmethod
+    def get_chat_state(self, user_id: int
+                       ) -> Tuple[int, Optional[int], Optional[int], Optional[str], Optional[str],
+                                  Optional[float]] | None:
+        """Сохраненное состояние чата для восстановления после вытеснения из памяти.
+        
+        Returns:
+            Tuple | None: ID активной языковой пары, ID выбранной колоды, ID,
+                слово и перевод текущей карточки (None, если карточки нет или
+                слово удалено) и точность ответов; None, если пользователя нет
+                или в случае ошибки
+        """
+
+    @abstractmethod
+    def save_chat_states(self, states: List[Tuple[int, Optional[int], Optional[float]]]) -> bool:
+        """Сохранение состояния чатов: тройки (ID пользователя, ID слова текущей
+        карточки, точность ответов)."""
+
+    @abstractmethod
+    def get_decks(self, user_id: int, pair_id: int = DEFAULT_PAIR_ID) -> List[Tuple[int, str, Optional[int], int]]:
+        """Получение общих и собственных колод языковой пары: ID, название,
+        владелец и количество слов."""
+
+    @abstractmethod
+    def get_deck(self, user_id: int, deck_id: int) -> Tuple[int, str, Optional[int]] | None:
+        """Получение колоды, доступной пользователю: ID, название и владелец."""
+
+    @abstractmethod
+    def create_deck(self, name: str, owner_id: Optional[int], pair_id: int = DEFAULT_PAIR_ID) -> Optional[int]:
+        """Создание колоды или получение существующей с тем же названием в языковой паре."""
+
+    @abstractmethod
+    def export_deck(self, user_id: int, deck_id: int) -> Optional[bytes]:
+        """Выгрузка слов колоды в CSV со столбцами word,translation."""
+
+    @abstractmethod
+    def import_deck(self, name: str, data: bytes, owner_id: Optional[int],
+                    pair_id: int = DEFAULT_PAIR_ID) -> Tuple[int, int] | None:
+        """Загрузка колоды из CSV со столбцами word,translation.
+        
+        Отсутствующие слова добавляются в личный словарь владельца
+        (или в общий словарь для общей колоды) языковой пары.
+        
+        Returns:
+            Tuple[int, int] | None: ID колоды и количество добавленных в нее слов
+        """
+
+    @abstractmethod
+    def delete_word_from_database(self, word_id: int, user_id: int, is_admin: bool = False) -> bool:
+        """Удаление слова из словаря.
+        
+        Администратор может удалить слово из общего словаря или своего личного,
+        остальные пользователи - только из своего личного словаря.
+        """
+
+    @abstractmethod
+    def is_word_learned(self, user_id: int, word_id: int) -> bool:
+        """Проверка, выучено ли слово пользователем."""
+
+    @abstractmethod
+    def get_learned_word_ids(self, user_id: int, word_ids: List[int]) -> Optional[Set[int]]:
+        """Выученные пользователем слова среди переданных.
+        
+        Args:
+            user_id: ID пользователя в Telegram
+            word_ids: ID проверяемых слов
+            
+        Returns:
+            Optional[Set[int]]: ID выученных слов или None в случае ошибки
+        """
+
+    @abstractmethod
+    def get_answer_stats(self) -> List[Tuple[int, int, int, Optional[float]]]:
+        """Статистика журнала ответов по словам.
+        
+        Returns:
+            List[Tuple[int, int, int, Optional[float]]]: ID слова, количество
+                ответов, количество ошибок и среднее число попыток до первого
+                верного ответа (None, если верных ответов не было)
+        """
+
+    @abstractmethod
+    def set_word_difficulties(self, difficulties: List[Tuple[int, float]]) -> bool:
+        """Сохранение рассчитанной сложности слов: пары (ID слова, сложность)."""
+
+    @abstractmethod
+    def get_word_difficulties(self, deck_id: Optional[int] = None, pair_id: int = DEFAULT_PAIR_ID
+                              ) -> List[Tuple[int, str, str, Optional[float]]]:
+        """Общие слова (всего словаря языковой пары или колоды) со сложностью.
+        
+        Returns:
+            List[Tuple[int, str, str, Optional[float]]]: ID, слово, перевод
+                и сложность (None, если еще не рассчитана)
+        """
+
+    @abstractmethod
+    def add_answer_events(self, events: List[AnswerEvent]) -> bool:
+        """Пакетная запись ответов в журнал (только добавление).
+        
+        Returns:
+            bool: True если пакет записан, False в случае ошибки
+        """
+
+    @abstractmethod
+    def iter_answer_events(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                           chunk_size: int = 10000) -> Iterator[List[AnswerEvent]]:
+        """Чтение журнала ответов частями в порядке времени ответа.
+        
+        В отличие от остальных методов, ошибка чтения не печатается, а
+        передается вызывающему коду: иначе выгрузка молча обрывается и
+        обрезанный файл выглядит полным.
+        
+        Args:
+            since: Начало периода включительно (None - с начала журнала)
+            until: Конец периода не включительно (None - до конца журнала)
+            chunk_size: Максимальное количество ответов в части
+            
+        Returns:
+            Iterator[List[AnswerEvent]]: Части журнала
+        """
+
+    def close(self) -> None:
+        """Закрытие соединений хранилища при завершении бота."""
+
+
+def get_month_start(moment: datetime) -> datetime:
+    """Начало месяца: журнал ответов разбит на секции по месяцам."""
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def read_deck_csv(data: bytes) -> List[Tuple[str, str]]:
+    """Разбор CSV файла колоды со столбцами word,translation.
+
+    Слова приводятся к нижнему регистру, пустые строки и повторы пропускаются.
+    """
+    reader = csv.DictReader(io.StringIO(data.decode('utf-8-sig')))
+    if not reader.fieldnames or not {'word', 'translation'} <= set(reader.fieldnames):
+        raise ValueError("Ожидаются столбцы word,translation")
+
+    rows = {}
+    for row in reader:
+        word = (row['word'] or '').strip().lower()
+        translation = (row['translation'] or '').strip()
+        if word and translation:
+            rows.setdefault(word, translation)
+    return list(rows.items())
+
+
+def write_deck_csv(rows: Iterable[Tuple[str, str]]) -> bytes:
+    """Запись слов колоды в CSV со столбцами word,translation."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(('word', 'translation'))
+    writer.writerows(rows)
+    return buffer.getvalue().encode('utf-8')
@@ -0,0 +1,446 @@
+"""Хранилище в памяти процесса: без базы данных, данные теряются при перезапуске.
+
+Подходит для тестов, замеров и запуска бота без сервера базы данных.
+"""
+import random
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from englishcard.storage.base import (
+    DEFAULT_PAIR_ID,
+    INITIAL_DECKS,
+    INITIAL_LANGUAGE_PAIRS,
+    INITIAL_WORDS,
+    UNWANTED_WORDS,
+    AnswerEvent,
+    Storage,
+    get_month_start,
+    read_deck_csv,
+    write_deck_csv,
+)
+
+# Сколько случайных слов пары или колоды проверяется при выборе карточки,
+# прежде чем собрать полный список невыученных слов
+RANDOM_WORD_PROBES: int = 16
+
+
+class MemoryStorage(Storage):
+    """Хранилище на словарях Python.
+
+    Общие слова и личные слова каждого пользователя хранятся в отдельных
+    списках для каждой языковой пары, поэтому выборка карточки просматривает
+    только общую часть и слова текущего пользователя в его паре.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._next_word_id = 1
+        self._next_deck_id = 1
+        self.language_pairs: Dict[int, Tuple[str, str]] = {}
+        self.words: Dict[int, Tuple[str, str, Optional[int], int]] = {}
+        self.shared_word_ids: Dict[int, List[int]] = {}
+        self.personal_word_ids: Dict[int, Dict[int, List[int]]] = {}
+        self.users: Dict[int, Dict[str, Optional[int] | float | str]] = {}
+        self.user_words: Dict[int, Set[int]] = {}
+        self.decks: Dict[int, Tuple[str, Optional[int], int]] = {}
+        self.deck_words: Dict[int, List[int]] = {}
+        self.answer_events: Dict[datetime, List[AnswerEvent]] = {}
+        self.difficulty: Dict[int, float] = {}
+
+    def initialize(self) -> None:
+        with self._lock:
+            if self.words:
+                return
+            for source_lang, target_lang in INITIAL_LANGUAGE_PAIRS:
+                self._get_or_create_pair(source_lang, target_lang)
+            for word, translation in INITIAL_WORDS:
+                self._insert_word(word, translation, None, DEFAULT_PAIR_ID)
+            for name, words in INITIAL_DECKS.items():
+                deck_id = self._get_or_create_deck(name, None, DEFAULT_PAIR_ID)
+                for word in words:
+                    word_id = self._find_word(None, word.lower(), DEFAULT_PAIR_ID)
+                    if word_id is not None:
+                        self._link_deck_word(deck_id, word_id)
+
+    def delete_unwanted_words(self) -> bool:
+        with self._lock:
+            for word_id, (word, translation, *_) in list(self.words.items()):
+                if word.lower() in UNWANTED_WORDS or translation.lower() in UNWANTED_WORDS:
+                    self._delete_word(word_id)
+        return True
+
+    def ensure_user_exists(self, user_id: int, username: str | None) -> bool:
+        with self._lock:
+            self.users.setdefault(user_id, {
+                'username': username, 'pair_id': DEFAULT_PAIR_ID, 'deck_id': None,
+                'current_word_id': None, 'accuracy': None
+            })
+        return True
+
+    def get_language_pairs(self) -> List[Tuple[int, str, str]]:
+        with self._lock:
+            return [(pair_id, *pair) for pair_id, pair in sorted(self.language_pairs.items())]
+
+    def create_language_pair(self, source_lang: str, target_lang: str) -> Optional[int]:
+        with self._lock:
+            return self._get_or_create_pair(source_lang, target_lang)
+
+    def set_user_pair(self, user_id: int, pair_id: int) -> bool:
+        with self._lock:
+            if pair_id not in self.language_pairs:
+                return False
+            if user_id in self.users:
+                self.users[user_id].update(pair_id=pair_id, deck_id=None, current_word_id=None)
+        return True
+
+    def reset_user_progress(self, user_id: int) -> None:
+        with self._lock:
+            self.user_words.pop(user_id, None)
+
+    def get_random_word(self, user_id: int, show_all: bool = False, deck_id: Optional[int] = None,
+                        pair_id: int = DEFAULT_PAIR_ID) -> Tuple[int, str, str] | None:
+        with self._lock:
+            learned = self.user_words.get(user_id, set())
+            # Случайное слово берется прямо из списков пары или колоды: пока
+            # выучена небольшая часть слов, подходящее находится за несколько
+            # попыток без сборки списка всех кандидатов
+            word_lists = self._word_id_lists(user_id, deck_id, pair_id)
+            for word_id in self._probe_word_ids(word_lists, RANDOM_WORD_PROBES):
+                if word_id not in learned and self.words[word_id][2] in (None, user_id):
+                    word, translation, *_ = self.words[word_id]
+                    return word_id, word, translation
+
+            candidates = [
+                word_id for word_id in self._available_word_ids(user_id, deck_id, pair_id)
+                if word_id not in learned
+            ]
+            if not candidates:
+                return None
+            word_id = random.choice(candidates)
+            word, translation, *_ = self.words[word_id]
+            return word_id, word, translation
+
+    def get_random_other_words(self, user_id: int, word_id: int, count: int = 3, deck_id: Optional[int] = None,
+                               pair_id: int = DEFAULT_PAIR_ID) -> List[Tuple[str]]:
+        with self._lock:
+            other_words = []
+            if deck_id is not None:
+                other_words = self._sample_words(user_id, deck_id, pair_id, word_id, count)
+            if len(other_words) < count:
+                taken = set(other_words)
+                other_words.extend(
+                    word for word in self._sample_words(user_id, None, pair_id, word_id, count)
+                    if word not in taken
+                )
+            return [(word,) for word in other_words[:count]]
+
+    def add_user_word(self, user_id: int, word_id: int) -> bool:
+        with self._lock:
+            learned = self.user_words.setdefault(user_id, set())
+            if word_id in learned:
+                return False
+            learned.add(word_id)
+            return True
+
+    def delete_user_word(self, user_id: int, word_id: int) -> Optional[bool]:
+        with self._lock:
+            learned = self.user_words.get(user_id, set())
+            if word_id not in learned:
+                return False
+            learned.discard(word_id)
+            return True
+
+    def get_user_words_count(self, user_id: int) -> int:
+        with self._lock:
+            return len(self.user_words.get(user_id, ()))
+
+    def get_personal_words_count(self, user_id: int, pair_id: int = DEFAULT_PAIR_ID) -> int:
+        with self._lock:
+            return len(self.personal_word_ids.get(user_id, {}).get(pair_id, ()))
+
+    def find_word(self, user_id: int, word: str, pair_id: int = DEFAULT_PAIR_ID) -> Optional[int]:
+        with self._lock:
+            return self._find_word(user_id, word, pair_id)
+
+    def add_personal_word(self, user_id: int, word: str, translation: str, deck_id: Optional[int] = None,
+                          pair_id: int = DEFAULT_PAIR_ID) -> Optional[int]:
+        with self._lock:
+            word_id = self._insert_word(word, translation, user_id, pair_id)
+            if deck_id is not None and self.decks.get(deck_id, (None, None, None))[1:] == (user_id, pair_id):
+                self._link_deck_word(deck_id, word_id)
+            return word_id
+
+    def get_user_deck(self, user_id: int) -> Optional[int]:
+        with self._lock:
+            return self.users.get(user_id, {}).get('deck_id')
+
+    def set_user_deck(self, user_id: int, deck_id: Optional[int]) -> bool:
+        with self._lock:
+            if user_id in self.users:
+                self.users[user_id]['deck_id'] = deck_id
+        return True
+
+    def get_chat_state(self, user_id: int
+                       ) -> Tuple[int, Optional[int], Optional[int], Optional[str], Optional[str],
+                                  Optional[float]] | None:
+        with self._lock:
+            user = self.users.get(user_id)
+            if user is None:
+                return None
+            word_id = user['current_word_id']
+            if word_id not in self.words:
+                return user['pair_id'], user['deck_id'], None, None, None, user['accuracy']
+            word, translation, *_ = self.words[word_id]
+            return user['pair_id'], user['deck_id'], word_id, word, translation, user['accuracy']
+
+    def save_chat_states(self, states: List[Tuple[int, Optional[int], Optional[float]]]) -> bool:
+        with self._lock:
+            for user_id, word_id, accuracy in states:
+                if user_id in self.users:
+                    self.users[user_id].update(current_word_id=word_id, accuracy=accuracy)
+        return True
+
+    def get_decks(self, user_id: int, pair_id: int = DEFAULT_PAIR_ID) -> List[Tuple[int, str, Optional[int], int]]:
+        with self._lock:
+            decks = [
+                (deck_id, name, owner_id, len(self.deck_words.get(deck_id, ())))
+                for deck_id, (name, owner_id, deck_pair_id) in self.decks.items()
+                if deck_pair_id == pair_id and (owner_id is None or owner_id == user_id)
+            ]
+            return sorted(decks, key=lambda deck: (deck[2] is not None, deck[0]))
+
+    def get_deck(self, user_id: int, deck_id: int) -> Tuple[int, str, Optional[int]] | None:
+        with self._lock:
+            if deck_id not in self.decks:
+                return None
+            name, owner_id, _ = self.decks[deck_id]
+            if owner_id is not None and owner_id != user_id:
+                return None
+            return deck_id, name, owner_id
+
+    def create_deck(self, name: str, owner_id: Optional[int], pair_id: int = DEFAULT_PAIR_ID) -> Optional[int]:
+        with self._lock:
+            return self._get_or_create_deck(name, owner_id, pair_id)
+
+    def export_deck(self, user_id: int, deck_id: int) -> Optional[bytes]:
+        with self._lock:
+            rows = []
+            for word_id in sorted(self.deck_words.get(deck_id, ())):
+                word, translation, owner_id, _ = self.words[word_id]
+                if owner_id is None or owner_id == user_id:
+                    rows.append((word, translation))
+        return write_deck_csv(rows)
+
+    def import_deck(self, name: str, data: bytes, owner_id: Optional[int],
+                    pair_id: int = DEFAULT_PAIR_ID) -> Tuple[int, int] | None:
+        try:
+            rows = read_deck_csv(data)
+        except ValueError as e:
+            print(f"Ошибка при загрузке колоды: {e}")
+            return None
+
+        with self._lock:
+            deck_id = self._get_or_create_deck(name, owner_id, pair_id)
+            added = 0
+            for word, translation in rows:
+                word_id = self._find_word(owner_id, word, pair_id)
+                if word_id is None:
+                    word_id = self._insert_word(word, translation, owner_id, pair_id)
+                added += self._link_deck_word(deck_id, word_id)
+            return deck_id, added
+
+    def delete_word_from_database(self, word_id: int, user_id: int, is_admin: bool = False) -> bool:
+        with self._lock:
+            if word_id not in self.words:
+                return False
+            owner_id = self.words[word_id][2]
+            if owner_id != user_id and not (is_admin and owner_id is None):
+                return False
+            self._delete_word(word_id)
+            return True
+
+    def is_word_learned(self, user_id: int, word_id: int) -> bool:
+        with self._lock:
+            return word_id in self.user_words.get(user_id, ())
+
+    def get_learned_word_ids(self, user_id: int, word_ids: List[int]) -> Optional[Set[int]]:
+        with self._lock:
+            return self.user_words.get(user_id, set()).intersection(word_ids)
+
+    def get_answer_stats(self) -> List[Tuple[int, int, int, Optional[float]]]:
+        with self._lock:
+            events = sorted(
+                (event for month in self.answer_events.values() for event in month),
+                key=lambda event: event.answered_at
+            )
+        answers: Dict[int, List[int]] = {}
+        attempts: Dict[Tuple[int, int], int] = {}
+        first_correct: Dict[int, List[int]] = {}
+        for event in events:
+            stats = answers.setdefault(event.word_id, [0, 0])
+            stats[0] += 1
+            stats[1] += not event.correct
+            key = (event.user_id, event.word_id)
+            if attempts.get(key, 0) < 0:
+                continue  # Слово уже было угадано
+            attempts[key] = attempts.get(key, 0) + 1
+            if event.correct:
+                first_correct.setdefault(event.word_id, []).append(attempts[key])
+                attempts[key] = -1
+        return [
+            (word_id, total, errors,
+             sum(first_correct[word_id]) / len(first_correct[word_id])
+             if word_id in first_correct else None)
+            for word_id, (total, errors) in answers.items()
+        ]
+
+    def set_word_difficulties(self, difficulties: List[Tuple[int, float]]) -> bool:
+        with self._lock:
+            self.difficulty.update(
+                (word_id, difficulty) for word_id, difficulty in difficulties
+                if word_id in self.words
+            )
+        return True
+
+    def get_word_difficulties(self, deck_id: Optional[int] = None, pair_id: int = DEFAULT_PAIR_ID
+                              ) -> List[Tuple[int, str, str, Optional[float]]]:
+        with self._lock:
+            if deck_id is None:
+                word_ids = self.shared_word_ids.get(pair_id, ())
+            else:
+                word_ids = self.deck_words.get(deck_id, ())
+            return [
+                (word_id, *self.words[word_id][:2], self.difficulty.get(word_id))
+                for word_id in sorted(word_ids)
+                if self.words[word_id][2] is None
+            ]
+
+    def add_answer_events(self, events: List[AnswerEvent]) -> bool:
+        with self._lock:
+            for event in events:
+                self.answer_events.setdefault(get_month_start(event.answered_at), []).append(event)
+        return True
+
+    def iter_answer_events(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                           chunk_size: int = 10000) -> Iterator[List[AnswerEvent]]:
+        with self._lock:
+            months = sorted(self.answer_events)
+        for month in months:
+            # Секции вне периода пропускаются целиком
+            if until is not None and month >= until:
+                break
+            if since is not None and month < get_month_start(since):
+                continue
+            with self._lock:
+                events = sorted(
+                    (event for event in self.answer_events[month]
+                     if (since is None or event.answered_at >= since)
+                     and (until is None or event.answered_at < until)),
+                    key=lambda event: event.answered_at
+                )
+            for start in range(0, len(events), chunk_size):
+                yield events[start:start + chunk_size]
+
+    def _word_id_lists(self, user_id: int, deck_id: Optional[int], pair_id: int) -> List[List[int]]:
+        """Списки слов колоды или пары (общие и личные слова пользователя) без копирования.
+
+        В колоде могут быть чужие личные слова: их отбрасывает вызывающий код.
+        """
+        if deck_id is not None:
+            return [self.deck_words.get(deck_id, [])]
+        return [self.shared_word_ids.get(pair_id, []), self.personal_word_ids.get(user_id, {}).get(pair_id, [])]
+
+    def _available_word_ids(self, user_id: int, deck_id: Optional[int], pair_id: int) -> List[int]:
+        if deck_id is not None:
+            return [
+                word_id for word_id in self.deck_words.get(deck_id, ())
+                if self.words[word_id][2] in (None, user_id)
+            ]
+        return self.shared_word_ids.get(pair_id, []) + self.personal_word_ids.get(user_id, {}).get(pair_id, [])
+
+    def _probe_word_ids(self, word_lists: List[List[int]], probes: int) -> Iterator[int]:
+        """Случайные слова из нескольких списков, как из одного общего (с повторами)."""
+        total = sum(len(word_ids) for word_ids in word_lists)
+        for _ in range(min(total, probes)):
+            index = random.randrange(total)
+            for word_ids in word_lists:
+                if index < len(word_ids):
+                    yield word_ids[index]
+                    break
+                index -= len(word_ids)
+
+    def _sample_words(self, user_id: int, deck_id: Optional[int], pair_id: int,
+                      exclude_id: int, count: int) -> List[str]:
+        picked: List[int] = []
+        word_lists = self._word_id_lists(user_id, deck_id, pair_id)
+        for word_id in self._probe_word_ids(word_lists, count * RANDOM_WORD_PROBES):
+            if len(picked) == count:
+                break
+            if word_id != exclude_id and word_id not in picked and self.words[word_id][2] in (None, user_id):
+                picked.append(word_id)
+        if len(picked) < count:
+            # В колоде или паре мало подходящих слов: выбираются все, какие есть
+            candidates = [
+                word_id for word_id in self._available_word_ids(user_id, deck_id, pair_id)
+                if word_id != exclude_id
+            ]
+            picked = random.sample(candidates, min(count, len(candidates)))
+        return [self.words[word_id][0] for word_id in picked]
+
+    def _find_word(self, user_id: Optional[int], word: str, pair_id: int) -> Optional[int]:
+        word_ids = self.shared_word_ids.get(pair_id, [])
+        if user_id is not None:
+            word_ids = word_ids + self.personal_word_ids.get(user_id, {}).get(pair_id, [])
+        for word_id in word_ids:
+            if self.words[word_id][0].lower() == word:
+                return word_id
+        return None
+
+    def _insert_word(self, word: str, translation: str, owner_id: Optional[int], pair_id: int) -> int:
+        word_id = self._next_word_id
+        self._next_word_id += 1
+        self.words[word_id] = (word, translation, owner_id, pair_id)
+        if owner_id is None:
+            self.shared_word_ids.setdefault(pair_id, []).append(word_id)
+        else:
+            self.personal_word_ids.setdefault(owner_id, {}).setdefault(pair_id, []).append(word_id)
+        return word_id
+
+    def _delete_word(self, word_id: int) -> None:
+        _, _, owner_id, pair_id = self.words.pop(word_id)
+        self.difficulty.pop(word_id, None)
+        if owner_id is None:
+            self.shared_word_ids[pair_id].remove(word_id)
+        else:
+            self.personal_word_ids[owner_id][pair_id].remove(word_id)
+        for learned in self.user_words.values():
+            learned.discard(word_id)
+        for word_ids in self.deck_words.values():
+            if word_id in word_ids:
+                word_ids.remove(word_id)
+
+    def _get_or_create_pair(self, source_lang: str, target_lang: str) -> int:
+        for pair_id, pair in self.language_pairs.items():
+            if pair == (source_lang, target_lang):
+                return pair_id
+        pair_id = len(self.language_pairs) + DEFAULT_PAIR_ID
+        self.language_pairs[pair_id] = (source_lang, target_lang)
+        return pair_id
+
+    def _get_or_create_deck(self, name: str, owner_id: Optional[int], pair_id: int) -> int:
+        for deck_id, deck in self.decks.items():
+            if deck == (name, owner_id, pair_id):
+                return deck_id
+        deck_id = self._next_deck_id
+        self._next_deck_id += 1
+        self.decks[deck_id] = (name, owner_id, pair_id)
+        self.deck_words[deck_id] = []
+        return deck_id
+
+    def _link_deck_word(self, deck_id: int, word_id: int) -> int:
+        word_ids = self.deck_words.setdefault(deck_id, [])
+        if word_id in word_ids:
+            return 0
+        word_ids.append(word_id)
+        return 1
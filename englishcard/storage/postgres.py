@@ -0,0 +1,1285 @@
+"""Хранилище в PostgreSQL: SQL запросы и работа со словами, пользователями
+и колодами."""
+import io
+import os
+import threading
+from datetime import datetime
+from typing import Iterator, List, Set, Tuple, Optional
+
+import psycopg2
+from psycopg2 import Error
+from psycopg2.extras import execute_batch, execute_values
+
+from englishcard.config import load_env
+from englishcard.storage.base import (
+    ANSWER_EVENT_FIELDS,
+    DEFAULT_PAIR_ID,
+    UNWANTED_WORDS,
+    AnswerEvent,
+    Storage,
+    get_month_start,
+)
+from englishcard.storage.queries import (
+    SQL_CHECK_USER_WORD,
+    SQL_GET_LEARNED_WORD_IDS,
+    SQL_COUNT_PERSONAL_WORDS,
+    SQL_COUNT_USER_WORDS,
+    SQL_FIND_WORD,
+    SQL_GET_CHAT_STATE,
+    SQL_GET_DECK,
+    SQL_GET_DECKS,
+    SQL_GET_OTHER_DECK_WORDS,
+    SQL_GET_ANSWER_STATS,
+    SQL_GET_DECK_WORD_DIFFICULTIES,
+    SQL_GET_LANGUAGE_PAIRS,
+    SQL_GET_OTHER_WORDS,
+    SQL_GET_RANDOM_DECK_WORD,
+    SQL_GET_RANDOM_WORD,
+    SQL_GET_RANDOM_WORD_ALL,
+    SQL_GET_WORD_DIFFICULTIES,
+    SQL_INSERT_USER_WORD,
+    SQL_SAVE_CHAT_STATE,
+    SQL_SET_USER_PAIR,
+    SQL_SET_WORD_DIFFICULTY,
+)
+from englishcard.storage.prepared import PreparedConnection, StatementRegistry
+
+
+def get_connection():
+    """Получение соединения с базой данных."""
+    load_env()
+    try:
+        conn = psycopg2.connect(
+            user=os.getenv('DB_USER'),
+            password=os.getenv('DB_PASSWORD'),
+            host=os.getenv('DB_HOST'),
+            port="5432",
+            database=os.getenv('DB_NAME'),
+            client_encoding='utf8'
+        )
+        print("Успешное подключение к базе данных")
+        return conn
+    except psycopg2.Error as e:
+        print(f"Ошибка при подключении к базе данных: {e}")
+        return None
+
+
+SQL_EXPORT_DECK: str = """
+    COPY (
+        SELECT w.word, w.translation 
+        FROM deck_words dw 
+        JOIN words w ON w.word_id = dw.word_id 
+        WHERE dw.deck_id = %s 
+        AND (w.owner_id IS NULL OR w.owner_id = %s) 
+        ORDER BY w.word_id
+    ) TO STDOUT WITH (FORMAT csv, HEADER true)
+"""
+
+# Импорт колоды: COPY во временную таблицу, затем пакетная вставка
+# недостающих слов и связей колоды
+SQL_IMPORT_DECK_PREPARE: str = """
+    CREATE TEMP TABLE deck_import (
+        word VARCHAR(255),
+        translation VARCHAR(255)
+    ) ON COMMIT DROP
+"""
+
+SQL_IMPORT_DECK_COPY: str = """
+    COPY deck_import (word, translation) FROM STDIN WITH (FORMAT csv, HEADER true)
+"""
+
+SQL_IMPORT_DECK_WORDS: str = """
+    INSERT INTO words (word, translation, owner_id, pair_id) 
+    SELECT DISTINCT ON (LOWER(TRIM(i.word))) 
+        LOWER(TRIM(i.word)), TRIM(i.translation), %s, %s 
+    FROM deck_import i 
+    WHERE TRIM(i.word) <> '' AND TRIM(i.translation) <> '' 
+    AND NOT EXISTS (
+        SELECT 1 FROM words w 
+        WHERE w.pair_id = %s AND LOWER(w.word) = LOWER(TRIM(i.word)) 
+        AND (w.owner_id IS NULL OR w.owner_id = %s)
+    )
+"""
+
+SQL_IMPORT_DECK_LINKS: str = """
+    INSERT INTO deck_words (deck_id, word_id) 
+    SELECT DISTINCT %s, w.word_id 
+    FROM deck_import i 
+    JOIN words w ON w.pair_id = %s AND LOWER(w.word) = LOWER(TRIM(i.word)) 
+    AND (w.owner_id IS NULL OR w.owner_id = %s) 
+    ON CONFLICT DO NOTHING
+"""
+
+SQL_INITIAL_WORDS: str = """
+    INSERT INTO words (word, translation) VALUES
+    ('red', 'красный'),
+    ('blue', 'синий'),
+    ('green', 'зеленый'),
+    ('yellow', 'желтый'),
+    ('black', 'черный'),
+    ('white', 'белый'),
+    ('I', 'я'),
+    ('you', 'ты'),
+    ('he', 'он'),
+    ('she', 'она')
+    ON CONFLICT DO NOTHING;
+"""
+
+# Миграция схемы: личные слова пользователей. Частичные индексы общей
+# и личной части создаются вместе с языковыми парами
+# (SQL_MIGRATE_LANGUAGE_PAIRS)
+SQL_MIGRATE_PERSONAL_WORDS: str = """
+    ALTER TABLE words 
+    ADD COLUMN IF NOT EXISTS owner_id BIGINT REFERENCES users(user_id) ON DELETE CASCADE;
+"""
+
+# Удаление слова из базы удаляет его у всех пользователей: без индекса
+# по word_id это полный просмотр user_words
+SQL_MIGRATE_USER_WORDS: str = """
+    CREATE INDEX IF NOT EXISTS user_words_word_idx ON user_words (word_id);
+"""
+
+# Колоды: общие (owner_id IS NULL) и пользовательские
+SQL_MIGRATE_DECKS: str = """
+    CREATE TABLE IF NOT EXISTS decks (
+        deck_id SERIAL PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        owner_id BIGINT REFERENCES users(user_id) ON DELETE CASCADE
+    );
+
+    CREATE TABLE IF NOT EXISTS deck_words (
+        deck_id INTEGER REFERENCES decks(deck_id) ON DELETE CASCADE,
+        word_id INTEGER REFERENCES words(word_id) ON DELETE CASCADE,
+        PRIMARY KEY (deck_id, word_id)
+    );
+
+    CREATE INDEX IF NOT EXISTS deck_words_word_idx ON deck_words (word_id);
+
+    ALTER TABLE users 
+    ADD COLUMN IF NOT EXISTS deck_id INTEGER REFERENCES decks(deck_id) ON DELETE SET NULL;
+"""
+
+# Журнал ответов секционирован по месяцам: запись идет в одну маленькую
+# секцию, выгрузка за период читает только нужные секции, а старые
+# месяцы удаляются целиком через DROP TABLE
+SQL_MIGRATE_ANSWER_EVENTS: str = """
+    CREATE TABLE IF NOT EXISTS answer_events (
+        user_id BIGINT NOT NULL,
+        word_id INTEGER NOT NULL,
+        mode VARCHAR(16) NOT NULL,
+        correct BOOLEAN NOT NULL,
+        latency_ms INTEGER,
+        answered_at TIMESTAMPTZ NOT NULL
+    ) PARTITION BY RANGE (answered_at);
+"""
+
+# Сложность слова от 0 до 1, рассчитывается по журналу ответов
+SQL_MIGRATE_WORD_DIFFICULTY: str = """
+    ALTER TABLE words ADD COLUMN IF NOT EXISTS difficulty REAL;
+"""
+
+# Состояние чата, вытесненного из памяти: текущая карточка и точность ответов
+SQL_MIGRATE_CHAT_STATE: str = """
+    ALTER TABLE users 
+    ADD COLUMN IF NOT EXISTS current_word_id INTEGER, 
+    ADD COLUMN IF NOT EXISTS accuracy REAL;
+"""
+
+# Языковые пары: слова, колоды и пользователи относятся к паре, по
+# умолчанию - английский с переводом на русский. Таблица words не
+# секционируется по паре (на word_id ссылаются user_words и deck_words),
+# вместо этого частичные индексы общей и личной части начинаются с
+# pair_id: выборка карточки читает только диапазон индекса своей пары
+SQL_MIGRATE_LANGUAGE_PAIRS: str = f"""
+    CREATE TABLE IF NOT EXISTS language_pairs (
+        pair_id SERIAL PRIMARY KEY,
+        source_lang VARCHAR(8) NOT NULL,
+        target_lang VARCHAR(8) NOT NULL,
+        UNIQUE (source_lang, target_lang)
+    );
+
+    INSERT INTO language_pairs (pair_id, source_lang, target_lang) 
+    VALUES ({DEFAULT_PAIR_ID}, 'en', 'ru') 
+    ON CONFLICT DO NOTHING;
+
+    SELECT setval(pg_get_serial_sequence('language_pairs', 'pair_id'), MAX(pair_id)) 
+    FROM language_pairs;
+
+    ALTER TABLE words 
+    ADD COLUMN IF NOT EXISTS pair_id INTEGER NOT NULL DEFAULT {DEFAULT_PAIR_ID} 
+    REFERENCES language_pairs(pair_id);
+
+    ALTER TABLE decks 
+    ADD COLUMN IF NOT EXISTS pair_id INTEGER NOT NULL DEFAULT {DEFAULT_PAIR_ID} 
+    REFERENCES language_pairs(pair_id);
+
+    ALTER TABLE users 
+    ADD COLUMN IF NOT EXISTS pair_id INTEGER NOT NULL DEFAULT {DEFAULT_PAIR_ID} 
+    REFERENCES language_pairs(pair_id);
+
+    -- Индексы без pair_id из прежних версий схемы
+    DROP INDEX IF EXISTS words_shared_idx, words_owner_idx, 
+        words_shared_lower_word_idx, words_owner_lower_word_idx, 
+        decks_shared_name_idx, decks_owner_name_idx;
+
+    CREATE INDEX IF NOT EXISTS words_shared_pair_idx 
+    ON words (pair_id, word_id) WHERE owner_id IS NULL;
+
+    CREATE INDEX IF NOT EXISTS words_owner_pair_idx 
+    ON words (owner_id, pair_id, word_id) WHERE owner_id IS NOT NULL;
+
+    CREATE INDEX IF NOT EXISTS words_shared_pair_lower_word_idx 
+    ON words (pair_id, LOWER(word)) WHERE owner_id IS NULL;
+
+    CREATE INDEX IF NOT EXISTS words_owner_pair_lower_word_idx 
+    ON words (owner_id, pair_id, LOWER(word)) WHERE owner_id IS NOT NULL;
+
+    CREATE UNIQUE INDEX IF NOT EXISTS decks_shared_pair_name_idx 
+    ON decks (pair_id, name) WHERE owner_id IS NULL;
+
+    CREATE UNIQUE INDEX IF NOT EXISTS decks_owner_pair_name_idx 
+    ON decks (owner_id, pair_id, name) WHERE owner_id IS NOT NULL;
+"""
+
+SQL_CREATE_ANSWER_PARTITION: str = """
+    CREATE TABLE IF NOT EXISTS answer_events_{suffix} 
+    PARTITION OF answer_events 
+    FOR VALUES FROM (%s) TO (%s)
+"""
+
+SQL_INSERT_ANSWER_EVENTS: str = f"""
+    INSERT INTO answer_events ({', '.join(ANSWER_EVENT_FIELDS)}) VALUES %s
+"""
+
+SQL_INITIAL_DECKS: str = """
+    INSERT INTO decks (name) VALUES
+    ('Цвета'),
+    ('Местоимения'),
+    ('A1'),
+    ('A2'),
+    ('B1'),
+    ('B2'),
+    ('C1'),
+    ('C2')
+    ON CONFLICT (pair_id, name) WHERE owner_id IS NULL DO NOTHING;
+
+    INSERT INTO deck_words (deck_id, word_id) 
+    SELECT d.deck_id, w.word_id 
+    FROM decks d 
+    JOIN words w ON w.owner_id IS NULL AND w.pair_id = d.pair_id 
+    AND w.word IN ('red', 'blue', 'green', 'yellow', 'black', 'white') 
+    WHERE d.name = 'Цвета' AND d.owner_id IS NULL 
+    ON CONFLICT DO NOTHING;
+
+    INSERT INTO deck_words (deck_id, word_id) 
+    SELECT d.deck_id, w.word_id 
+    FROM decks d 
+    JOIN words w ON w.owner_id IS NULL AND w.pair_id = d.pair_id 
+    AND w.word IN ('I', 'you', 'he', 'she') 
+    WHERE d.name = 'Местоимения' AND d.owner_id IS NULL 
+    ON CONFLICT DO NOTHING;
+"""
+
+
+# Горячие запросы показа и проверки карточки выполняются как подготовленные
+STATEMENTS = StatementRegistry()
+STATEMENTS.register('get_random_word', SQL_GET_RANDOM_WORD)
+STATEMENTS.register('get_random_word_all', SQL_GET_RANDOM_WORD_ALL)
+STATEMENTS.register('get_random_deck_word', SQL_GET_RANDOM_DECK_WORD)
+STATEMENTS.register('get_other_words', SQL_GET_OTHER_WORDS)
+STATEMENTS.register('get_other_deck_words', SQL_GET_OTHER_DECK_WORDS)
+STATEMENTS.register('check_user_word', SQL_CHECK_USER_WORD)
+STATEMENTS.register('get_learned_word_ids', SQL_GET_LEARNED_WORD_IDS)
+STATEMENTS.register('insert_user_word', SQL_INSERT_USER_WORD)
+STATEMENTS.register('count_user_words', SQL_COUNT_USER_WORDS)
+
+
+def get_next_month(month: datetime) -> datetime:
+    """Начало следующего месяца."""
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+class PostgresStorage(Storage):
+    """Хранилище в PostgreSQL.
+
+    Горячие запросы карточки выполняются на долгоживущем соединении потока
+    как подготовленные запросы из :data:`STATEMENTS`, остальные операции
+    открывают новое соединение.
+    """
+
+    def __init__(self) -> None:
+        # Месяцы, для которых секция журнала ответов уже создана
+        self._answer_partitions: Set[datetime] = set()
+        self._local = threading.local()
+        # Соединения всех потоков, чтобы закрыть их при завершении бота
+        self._connections: List[PreparedConnection] = []
+        self._connections_lock = threading.Lock()
+
+    def _get_prepared_connection(self) -> Optional[PreparedConnection]:
+        """Долгоживущее соединение текущего потока.
+
+        Соединение работает в режиме autocommit: горячие запросы состоят
+        из одной команды и не тратят обращения к серверу на BEGIN и COMMIT.
+        """
+        prepared = getattr(self._local, 'connection', None)
+        if prepared is not None:
+            if not prepared.closed:
+                return prepared
+            self._reset_prepared_connection()
+        conn = get_connection()
+        if not conn:
+            return None
+        conn.autocommit = True
+        prepared = PreparedConnection(conn, STATEMENTS)
+        self._local.connection = prepared
+        with self._connections_lock:
+            self._connections.append(prepared)
+        return prepared
+
+    def _reset_prepared_connection(self) -> None:
+        """Закрытие соединения потока после ошибки: следующий запрос
+        откроет новое и подготовит запросы заново."""
+        prepared = getattr(self._local, 'connection', None)
+        if prepared is not None:
+            prepared.close()
+            self._local.connection = None
+            with self._connections_lock:
+                # Соединение уже закрыто вместе с остальными в close()
+                if prepared in self._connections:
+                    self._connections.remove(prepared)
+
+    def close(self) -> None:
+        """Закрытие долгоживущих соединений всех потоков."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for prepared in connections:
+            prepared.close()
+
+    def initialize(self) -> None:
+        """Инициализация базы данных начальными данными."""
+        try:
+            conn = get_connection()
+            if not conn:
+                print("Ошибка подключения к базе данных")
+                return
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute(SQL_MIGRATE_PERSONAL_WORDS)
+                        cur.execute(SQL_MIGRATE_USER_WORDS)
+                        cur.execute(SQL_MIGRATE_DECKS)
+                        cur.execute(SQL_MIGRATE_ANSWER_EVENTS)
+                        cur.execute(SQL_MIGRATE_WORD_DIFFICULTY)
+                        cur.execute(SQL_MIGRATE_CHAT_STATE)
+                        cur.execute(SQL_MIGRATE_LANGUAGE_PAIRS)
+                        cur.execute(SQL_INITIAL_WORDS)
+                        cur.execute(SQL_INITIAL_DECKS)
+                        conn.commit()
+                        print("База данных успешно инициализирована")
+            finally:
+                conn.close()
+        except (Exception, Error) as error:
+            print(f"Ошибка при инициализации базы данных: {error}")
+            if 'conn' in locals():
+                conn.rollback()
+
+    def reset_user_progress(self, user_id: int) -> None:
+        try:
+            conn = get_connection()
+            if not conn:
+                print("Ошибка подключения к базе данных")
+                return
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute("""
+                            DELETE FROM user_words 
+                            WHERE user_id = %s
+                        """, (user_id,))
+                        conn.commit()
+                        print(f"Прогресс пользователя {user_id} сброшен")
+            finally:
+                conn.close()
+        except (Exception, Error) as error:
+            print(f"Ошибка при сбросе прогресса пользователя: {error}")
+            if 'conn' in locals():
+                conn.rollback()  # Откатываем транзакцию при ошибке
+
+    def ensure_user_exists(self, user_id: int, username: str | None) -> bool:
+        """Проверка и создание пользователя в базе данных.
+
+        Args:
+            user_id: ID пользователя в Telegram
+            username: Имя пользователя в Telegram
+
+        Returns:
+            bool: True если пользователь существует или был создан, False в случае ошибки
+        """
+        try:
+            print(f"Проверяем существование пользователя {user_id}")
+            conn = get_connection()
+            if not conn:
+                print("Ошибка подключения к базе данных")
+                return False
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute("""
+                            SELECT user_id FROM users WHERE user_id = %s
+                        """, (user_id,))
+                        if not cur.fetchone():
+                            print(f"Создаем нового пользователя {user_id}")
+                            cur.execute("""
+                                INSERT INTO users (user_id, username) 
+                                VALUES (%s, %s)
+                            """, (user_id, username))
+                            conn.commit()
+                            print("Пользователь успешно создан")
+                            return True
+                        return True
+            finally:
+                conn.close()
+        except (Exception, Error) as error:
+            print(f"Ошибка при проверке/создании пользователя: {error}")
+            return False
+
+    def get_language_pairs(self) -> List[Tuple[int, str, str]]:
+        """Получение языковых пар.
+
+        Returns:
+            List[Tuple[int, str, str]]: ID, код изучаемого языка и код языка перевода
+        """
+        try:
+            conn = get_connection()
+            if not conn:
+                return []
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute(SQL_GET_LANGUAGE_PAIRS)
+                        return cur.fetchall()
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Ошибка при получении языковых пар: {e}")
+            return []
+
+    def create_language_pair(self, source_lang: str, target_lang: str) -> Optional[int]:
+        """Создание языковой пары или получение существующей с теми же языками.
+
+        Args:
+            source_lang: Код изучаемого языка
+            target_lang: Код языка перевода
+
+        Returns:
+            Optional[int]: ID языковой пары или None в случае ошибки
+        """
+        try:
+            conn = get_connection()
+            if not conn:
+                return None
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute(
+                            "SELECT pair_id FROM language_pairs "
+                            "WHERE source_lang = %s AND target_lang = %s",
+                            (source_lang, target_lang)
+                        )
+                        row = cur.fetchone()
+                        if row:
+                            return row[0]
+                        cur.execute(
+                            "INSERT INTO language_pairs (source_lang, target_lang) "
+                            "VALUES (%s, %s) RETURNING pair_id",
+                            (source_lang, target_lang)
+                        )
+                        return cur.fetchone()[0]
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Ошибка при создании языковой пары: {e}")
+            return None
+
+    def set_user_pair(self, user_id: int, pair_id: int) -> bool:
+        """Выбор активной языковой пары пользователя.
+
+        Args:
+            user_id: ID пользователя в Telegram
+            pair_id: ID языковой пары
+
+        Returns:
+            bool: True если пара выбрана
+        """
+        try:
+            conn = get_connection()
+            if not conn:
+                return False
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute(SQL_SET_USER_PAIR, (pair_id, user_id))
+                return True
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Ошибка при выборе языковой пары: {e}")
+            return False
+
+    def get_random_word(self, user_id: int, show_all: bool = False, deck_id: Optional[int] = None,
+                        pair_id: int = DEFAULT_PAIR_ID) -> Tuple[int, str, str] | None:
+        """Получение случайного слова для пользователя.
+
+        Если выбрана колода, слово выбирается только среди слов этой колоды,
+        иначе - среди слов языковой пары.
+        """
+        try:
+            print(f"Получаем случайное слово для пользователя {user_id}")
+            conn = self._get_prepared_connection()
+            if not conn:
+                return None
+
+            with conn.cursor() as cur:
+                if deck_id is not None:
+                    conn.execute(cur, 'get_random_deck_word', (user_id, deck_id, user_id))
+                elif show_all:
+                    conn.execute(cur, 'get_random_word_all', (pair_id, user_id, pair_id, user_id))
+                else:
+                    conn.execute(cur, 'get_random_word', (pair_id, user_id, pair_id, user_id))
+                result = cur.fetchone()
+                if result:
+                    print(f"Найдено слово: {result}")
+                else:
+                    print("Слов не найдено")
+                return result
+        except Exception as e:
+            print(f"Ошибка при получении слова: {e}")
+            self._reset_prepared_connection()
+            return None
+
+    def get_random_other_words(self, user_id: int, word_id: int, count: int = 3, deck_id: Optional[int] = None,
+                               pair_id: int = DEFAULT_PAIR_ID) -> List[Tuple[str]]:
+        """Получение случайных слов для вариантов ответа из общего и личного словаря.
+
+        Если выбрана колода, варианты берутся из нее, а недостающие
+        добираются из всего словаря языковой пары.
+        """
+        try:
+            conn = self._get_prepared_connection()
+            if not conn:
+                print("Ошибка подключения к базе данных")
+                return []
+
+            with conn.cursor() as cur:
+                other_words = []
+                if deck_id is not None:
+                    conn.execute(cur, 'get_other_deck_words', (deck_id, user_id, word_id, count))
+                    other_words = cur.fetchall()
+                if len(other_words) < count:
+                    conn.execute(cur, 'get_other_words', (pair_id, user_id, pair_id, word_id, count))
+                    taken = {word for word, in other_words}
+                    other_words.extend(
+                        row for row in cur.fetchall() if row[0] not in taken
+                    )
+                return other_words[:count]
+        except (Exception, Error) as error:
+            print("Ошибка при получении других слов:", error)
+            self._reset_prepared_connection()
+            return []
+
+    def add_user_word(self, user_id: int, word_id: int) -> bool:
+        """Добавление слова пользователю."""
+        try:
+            print(f"Добавляем слово {word_id} пользователю {user_id}")
+            conn = self._get_prepared_connection()
+            if not conn:
+                return False
+
+            with conn.cursor() as cur:
+                # Проверяем, не существует ли уже такая запись
+                conn.execute(cur, 'check_user_word', (user_id, word_id))
+                if not cur.fetchone():
+                    conn.execute(cur, 'insert_user_word', (user_id, word_id))
+                    print("Слово успешно добавлено пользователю")
+                    return True
+                print("Слово уже существует у пользователя")
+                return False
+        except Exception as e:
+            print(f"Ошибка при добавлении слова пользователю: {e}")
+            self._reset_prepared_connection()
+            return False
+
+    def delete_user_word(self, user_id: int, word_id: int) -> Optional[bool]:
+        """Удаление слова у пользователя.
+
+        Returns:
+            Optional[bool]: True если слово было удалено, False если его не было
+                у пользователя, None в случае ошибки
+        """
+        try:
+            conn = get_connection()
+            if not conn:
+                print("Ошибка подключения к базе данных")
+                return None
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute("""
+                            DELETE FROM user_words 
+                            WHERE user_id = %s AND word_id = %s
+                        """, (user_id, word_id))
+                        conn.commit()
+                        return cur.rowcount > 0
+            finally:
+                conn.close()
+        except (Exception, Error) as error:
+            print("Ошибка при удалении слова у пользователя:", error)
+            return None
+
+    def get_user_words_count(self, user_id: int) -> int:
+        """Получение количества слов пользователя.
+
+        Args:
+            user_id: ID пользователя в Telegram
+
+        Returns:
+            int: Количество слов пользователя
+        """
+        try:
+            conn = self._get_prepared_connection()
+            if not conn:
+                return 0
+
+            with conn.cursor() as cur:
+                conn.execute(cur, 'count_user_words', (user_id,))
+                return cur.fetchone()[0]
+        except Exception as e:
+            print(f"Ошибка при подсчете слов пользователя: {e}")
+            self._reset_prepared_connection()
+            return 0
+
+    def get_personal_words_count(self, user_id: int, pair_id: int = DEFAULT_PAIR_ID) -> int:
+        """Получение количества слов, добавленных пользователем в языковой паре.
+
+        Args:
+            user_id: ID пользователя в Telegram
+            pair_id: ID языковой пары
+
+        Returns:
+            int: Количество слов пары в личном словаре пользователя
+        """
+        try:
+            conn = get_connection()
+            if not conn:
+                return 0
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute(SQL_COUNT_PERSONAL_WORDS, (user_id, pair_id))
+                        return cur.fetchone()[0]
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Ошибка при подсчете личных слов пользователя: {e}")
+            return 0
+
+    def find_word(self, user_id: int, word: str, pair_id: int = DEFAULT_PAIR_ID) -> Optional[int]:
+        """Поиск слова в общем и личном словаре пользователя.
+
+        Args:
+            user_id: ID пользователя в Telegram
+            word: Слово изучаемого языка в нижнем регистре
+            pair_id: ID языковой пары
+
+        Returns:
+            Optional[int]: ID найденного слова или None
+        """
+        try:
+            conn = get_connection()
+            if not conn:
+                return None
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute(SQL_FIND_WORD, (pair_id, word, user_id, pair_id, word))
+                        row = cur.fetchone()
+                        return row[0] if row else None
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Ошибка при поиске слова: {e}")
+            return None
+
+    def add_personal_word(self, user_id: int, word: str, translation: str, deck_id: Optional[int] = None,
+                          pair_id: int = DEFAULT_PAIR_ID) -> Optional[int]:
+        """Добавление слова в личный словарь пользователя.
+
+        Общий словарь при этом не меняется. Если указана собственная
+        колода пользователя в той же языковой паре, слово добавляется и в нее.
+
+        Args:
+            user_id: ID пользователя в Telegram
+            word: Слово изучаемого языка
+            translation: Перевод
+            deck_id: ID выбранной колоды
+            pair_id: ID языковой пары
+
+        Returns:
+            Optional[int]: ID добавленного слова или None в случае ошибки
+        """
+        try:
+            conn = get_connection()
+            if not conn:
+                return None
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute(
+                            "INSERT INTO words (word, translation, owner_id, pair_id) "
+                            "VALUES (%s, %s, %s, %s) RETURNING word_id",
+                            (word, translation, user_id, pair_id)
+                        )
+                        word_id = cur.fetchone()[0]
+
+                        if deck_id is not None:
+                            cur.execute(
+                                "INSERT INTO deck_words (deck_id, word_id) "
+                                "SELECT deck_id, %s FROM decks "
+                                "WHERE deck_id = %s AND owner_id = %s AND pair_id = %s "
+                                "ON CONFLICT DO NOTHING",
+                                (word_id, deck_id, user_id, pair_id)
+                            )
+                        return word_id
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Ошибка при добавлении слова в личный словарь: {e}")
+            return None
+
+    def get_user_deck(self, user_id: int) -> Optional[int]:
+        """Получение выбранной пользователем колоды.
+
+        Args:
+            user_id: ID пользователя в Telegram
+
+        Returns:
+            Optional[int]: ID колоды или None, если выбраны все слова
+        """
+        try:
+            conn = get_connection()
+            if not conn:
+                return None
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute(
+                            "SELECT deck_id FROM users WHERE user_id = %s",
+                            (user_id,)
+                        )
+                        row = cur.fetchone()
+                        return row[0] if row else None
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Ошибка при получении колоды пользователя: {e}")
+            return None
+
+    def set_user_deck(self, user_id: int, deck_id: Optional[int]) -> bool:
+        """Выбор колоды пользователем.
+
+        Args:
+            user_id: ID пользователя в Telegram
+            deck_id: ID колоды или None для всех слов
+
+        Returns:
+            bool: True если колода выбрана
+        """
+        try:
+            conn = get_connection()
+            if not conn:
+                return False
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute(
+                            "UPDATE users SET deck_id = %s WHERE user_id = %s",
+                            (deck_id, user_id)
+                        )
+                return True
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Ошибка при выборе колоды: {e}")
+            return False
+
+    def get_chat_state(self, user_id: int
+                       ) -> Tuple[int, Optional[int], Optional[int], Optional[str], Optional[str],
+                                  Optional[float]] | None:
+        try:
+            conn = get_connection()
+            if not conn:
+                return None
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute(SQL_GET_CHAT_STATE, (user_id,))
+                        return cur.fetchone()
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Ошибка при восстановлении состояния чата: {e}")
+            return None
+
+    def save_chat_states(self, states: List[Tuple[int, Optional[int], Optional[float]]]) -> bool:
+        if not states:
+            return True
+        try:
+            conn = get_connection()
+            if not conn:
+                return False
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        execute_batch(
+                            cur,
+                            SQL_SAVE_CHAT_STATE,
+                            [(word_id, accuracy, user_id) for user_id, word_id, accuracy in states],
+                            page_size=1000
+                        )
+                        return True
+            finally:
+                conn.close()
+        except (Exception, Error) as error:
+            print(f"Ошибка при сохранении состояния чатов: {error}")
+            return False
+
+    def get_decks(self, user_id: int, pair_id: int = DEFAULT_PAIR_ID) -> List[Tuple[int, str, Optional[int], int]]:
+        """Получение доступных пользователю колод языковой пары.
+
+        Args:
+            user_id: ID пользователя в Telegram
+            pair_id: ID языковой пары
+
+        Returns:
+            List[Tuple[int, str, Optional[int], int]]: ID, название, владелец
+                и количество слов для общих и собственных колод
+        """
+        try:
+            conn = get_connection()
+            if not conn:
+                return []
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute(SQL_GET_DECKS, (pair_id, user_id))
+                        return cur.fetchall()
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Ошибка при получении колод: {e}")
+            return []
+
+    def get_deck(self, user_id: int, deck_id: int) -> Tuple[int, str, Optional[int]] | None:
+        """Получение колоды, доступной пользователю."""
+        try:
+            conn = get_connection()
+            if not conn:
+                return None
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute(SQL_GET_DECK, (deck_id, user_id))
+                        return cur.fetchone()
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Ошибка при получении колоды: {e}")
+            return None
+
+    def create_deck(self, name: str, owner_id: Optional[int], pair_id: int = DEFAULT_PAIR_ID) -> Optional[int]:
+        """Создание колоды или получение существующей с тем же названием.
+
+        Args:
+            name: Название колоды
+            owner_id: ID владельца или None для общей колоды
+            pair_id: ID языковой пары
+
+        Returns:
+            Optional[int]: ID колоды или None в случае ошибки
+        """
+        try:
+            conn = get_connection()
+            if not conn:
+                return None
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        return self._get_or_create_deck(cur, name, owner_id, pair_id)
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Ошибка при создании колоды: {e}")
+            return None
+
+    def _get_or_create_deck(self, cur, name: str, owner_id: Optional[int], pair_id: int) -> int:
+        cur.execute(
+            "SELECT deck_id FROM decks "
+            "WHERE pair_id = %s AND name = %s AND owner_id IS NOT DISTINCT FROM %s",
+            (pair_id, name, owner_id)
+        )
+        row = cur.fetchone()
+        if row:
+            return row[0]
+        cur.execute(
+            "INSERT INTO decks (name, owner_id, pair_id) VALUES (%s, %s, %s) RETURNING deck_id",
+            (name, owner_id, pair_id)
+        )
+        return cur.fetchone()[0]
+
+    def export_deck(self, user_id: int, deck_id: int) -> Optional[bytes]:
+        """Выгрузка слов колоды в CSV одним запросом COPY.
+
+        Args:
+            user_id: ID пользователя в Telegram
+            deck_id: ID колоды
+
+        Returns:
+            Optional[bytes]: Содержимое CSV файла или None в случае ошибки
+        """
+        try:
+            conn = get_connection()
+            if not conn:
+                return None
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        buffer = io.StringIO()
+                        query = cur.mogrify(SQL_EXPORT_DECK, (deck_id, user_id))
+                        cur.copy_expert(query.decode(), buffer)
+                        return buffer.getvalue().encode('utf-8')
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Ошибка при выгрузке колоды: {e}")
+            return None
+
+    def import_deck(self, name: str, data: bytes, owner_id: Optional[int],
+                    pair_id: int = DEFAULT_PAIR_ID) -> Tuple[int, int] | None:
+        """Загрузка колоды из CSV файла со столбцами word,translation.
+
+        Отсутствующие слова добавляются в личный словарь владельца
+        (или в общий словарь для общей колоды) одной пакетной вставкой.
+
+        Args:
+            name: Название колоды
+            data: Содержимое CSV файла
+            owner_id: ID владельца или None для общей колоды
+            pair_id: ID языковой пары
+
+        Returns:
+            Tuple[int, int] | None: ID колоды и количество добавленных в нее слов
+        """
+        try:
+            conn = get_connection()
+            if not conn:
+                return None
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        deck_id = self._get_or_create_deck(cur, name, owner_id, pair_id)
+                        cur.execute(SQL_IMPORT_DECK_PREPARE)
+                        cur.copy_expert(
+                            SQL_IMPORT_DECK_COPY,
+                            io.StringIO(data.decode('utf-8-sig'))
+                        )
+                        cur.execute(SQL_IMPORT_DECK_WORDS, (owner_id, pair_id, pair_id, owner_id))
+                        cur.execute(SQL_IMPORT_DECK_LINKS, (deck_id, pair_id, owner_id))
+                        return deck_id, cur.rowcount
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Ошибка при загрузке колоды: {e}")
+            return None
+
+    def delete_word_from_database(self, word_id: int, user_id: int, is_admin: bool = False) -> bool:
+        """Удаление слова из базы данных.
+
+        Администратор может удалить слово из общего словаря или своего личного,
+        остальные пользователи - только из своего личного словаря.
+
+        Args:
+            word_id: ID слова
+            user_id: ID пользователя в Telegram
+            is_admin: Является ли пользователь администратором
+
+        Returns:
+            bool: True если слово было удалено
+        """
+        if is_admin:
+            scope = "(owner_id IS NULL OR owner_id = %s)"
+        else:
+            scope = "owner_id = %s"
+
+        try:
+            conn = get_connection()
+            if not conn:
+                print("Ошибка подключения к базе данных")
+                return False
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        # Проверяем, что слово доступно для удаления
+                        cur.execute(
+                            f"SELECT 1 FROM words WHERE word_id = %s AND {scope}",
+                            (word_id, user_id)
+                        )
+                        if not cur.fetchone():
+                            return False
+
+                        # Сначала удаляем все связи с пользователями
+                        cur.execute("""
+                            DELETE FROM user_words 
+                            WHERE word_id = %s
+                        """, (word_id,))
+
+                        # Затем удаляем само слово
+                        cur.execute("""
+                            DELETE FROM words 
+                            WHERE word_id = %s
+                        """, (word_id,))
+
+                        conn.commit()
+                        return True
+            finally:
+                conn.close()
+        except (Exception, Error) as error:
+            print(f"Ошибка при удалении слова из базы: {error}")
+            if 'conn' in locals():
+                conn.rollback()
+            return False
+
+    def delete_unwanted_words(self) -> bool:
+        """Удаление нежелательных слов из общего и личных словарей."""
+        try:
+            conn = get_connection()
+            if not conn:
+                print("Ошибка подключения к базе данных")
+                return False
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        unwanted_words = list(UNWANTED_WORDS)
+
+                        # Удаляем все связи с пользователями для нежелательных слов
+                        cur.execute("""
+                            DELETE FROM user_words 
+                            WHERE word_id IN (
+                                SELECT word_id FROM words 
+                                WHERE LOWER(word) = ANY(%s) 
+                                OR LOWER(translation) = ANY(%s)
+                            )
+                        """, (unwanted_words, unwanted_words))
+
+                        # Удаляем сами нежелательные слова
+                        cur.execute("""
+                            DELETE FROM words 
+                            WHERE LOWER(word) = ANY(%s) 
+                            OR LOWER(translation) = ANY(%s)
+                        """, (unwanted_words, unwanted_words))
+
+                        conn.commit()
+                        print("Нежелательные слова успешно удалены из базы данных")
+                        return True
+            finally:
+                conn.close()
+        except (Exception, Error) as error:
+            print(f"Ошибка при удалении нежелательных слов: {error}")
+            if 'conn' in locals():
+                conn.rollback()
+            return False
+
+    def is_word_learned(self, user_id: int, word_id: int) -> bool:
+        try:
+            conn = self._get_prepared_connection()
+            if not conn:
+                return False
+
+            with conn.cursor() as cur:
+                conn.execute(cur, 'check_user_word', (user_id, word_id))
+                return cur.fetchone() is not None
+        except Exception as e:
+            print(f"Ошибка при проверке выученного слова: {e}")
+            self._reset_prepared_connection()
+            return False
+
+    def get_learned_word_ids(self, user_id: int, word_ids: List[int]) -> Optional[Set[int]]:
+        try:
+            conn = self._get_prepared_connection()
+            if not conn:
+                return None
+
+            with conn.cursor() as cur:
+                conn.execute(cur, 'get_learned_word_ids', (user_id, list(word_ids)))
+                return {row[0] for row in cur.fetchall()}
+        except Exception as e:
+            print(f"Ошибка при проверке выученных слов: {e}")
+            self._reset_prepared_connection()
+            return None
+
+    def get_answer_stats(self) -> List[Tuple[int, int, int, Optional[float]]]:
+        """Статистика по всему журналу ответов одним агрегирующим запросом."""
+        try:
+            conn = get_connection()
+            if not conn:
+                return []
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute(SQL_GET_ANSWER_STATS)
+                        return [
+                            (word_id, answers, errors,
+                             float(attempts) if attempts is not None else None)
+                            for word_id, answers, errors, attempts in cur.fetchall()
+                        ]
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Ошибка при расчете статистики ответов: {e}")
+            return []
+
+    def set_word_difficulties(self, difficulties: List[Tuple[int, float]]) -> bool:
+        try:
+            conn = get_connection()
+            if not conn:
+                return False
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        execute_batch(
+                            cur,
+                            SQL_SET_WORD_DIFFICULTY,
+                            [(difficulty, word_id) for word_id, difficulty in difficulties],
+                            page_size=1000
+                        )
+                        return True
+            finally:
+                conn.close()
+        except (Exception, Error) as error:
+            print(f"Ошибка при сохранении сложности слов: {error}")
+            return False
+
+    def get_word_difficulties(self, deck_id: Optional[int] = None, pair_id: int = DEFAULT_PAIR_ID
+                              ) -> List[Tuple[int, str, str, Optional[float]]]:
+        try:
+            conn = get_connection()
+            if not conn:
+                return []
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        if deck_id is not None:
+                            cur.execute(SQL_GET_DECK_WORD_DIFFICULTIES, (deck_id,))
+                        else:
+                            cur.execute(SQL_GET_WORD_DIFFICULTIES, (pair_id,))
+                        return cur.fetchall()
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Ошибка при получении сложности слов: {e}")
+            return []
+
+    def _ensure_answer_partitions(self, cur, events: List[AnswerEvent]) -> None:
+        """Создание секций журнала для месяцев, в которые попадают ответы."""
+        for month in {get_month_start(event.answered_at) for event in events}:
+            if month in self._answer_partitions:
+                continue
+            cur.execute(
+                SQL_CREATE_ANSWER_PARTITION.format(suffix=month.strftime('%Y_%m')),
+                (month, get_next_month(month))
+            )
+            self._answer_partitions.add(month)
+
+    def add_answer_events(self, events: List[AnswerEvent]) -> bool:
+        """Пакетная запись ответов одним INSERT со списком значений."""
+        try:
+            conn = get_connection()
+            if not conn:
+                return False
+
+            try:
+                with conn:
+                    with conn.cursor() as cur:
+                        self._ensure_answer_partitions(cur, events)
+                        execute_values(cur, SQL_INSERT_ANSWER_EVENTS, events, page_size=1000)
+                        return True
+            finally:
+                conn.close()
+        except (Exception, Error) as error:
+            print(f"Ошибка при записи журнала ответов: {error}")
+            # Секции могли не создаться вместе с откатом транзакции
+            self._answer_partitions.clear()
+            return False
+
+    def iter_answer_events(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                           chunk_size: int = 10000) -> Iterator[List[AnswerEvent]]:
+        """Чтение журнала через курсор на стороне сервера.
+
+        Границы периода подставляются в запрос значениями, поэтому
+        планировщик отбрасывает секции вне периода.
+        """
+        conditions = []
+        params = []
+        if since is not None:
+            conditions.append("answered_at >= %s")
+            params.append(since)
+        if until is not None:
+            conditions.append("answered_at < %s")
+            params.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        conn = get_connection()
+        if not conn:
+            raise ConnectionError("Нет подключения к базе данных")
+
+        try:
+            with conn:
+                with conn.cursor(name='answer_events_export') as cur:
+                    cur.itersize = chunk_size
+                    cur.execute(
+                        f"SELECT {', '.join(ANSWER_EVENT_FIELDS)} FROM answer_events "
+                        f"{where} ORDER BY answered_at",
+                        params
+                    )
+                    while True:
+                        rows = cur.fetchmany(chunk_size)
+                        if not rows:
+                            return
+                        yield [AnswerEvent(*row) for row in rows]
+        finally:
+            conn.close()
@@ -0,0 +1,95 @@
+"""Именованные подготовленные запросы PostgreSQL на долгоживущих соединениях.
+
+Горячие запросы (выбор карточки, варианты ответа, отметка выученного
+слова и подсчет слов) регистрируются в :class:`StatementRegistry` один
+раз при импорте. Каждое соединение выполняет ``PREPARE`` для запроса при
+первом обращении к нему, дальше запрос вызывается через ``EXECUTE``:
+сервер не разбирает текст запроса заново и может переиспользовать план.
+"""
+import re
+from typing import Dict, Set, Tuple
+
+_PLACEHOLDER = re.compile(r'%s')
+
+
+def to_positional(query: str) -> str:
+    """Перевод параметров запроса из стиля %s в позиционные $1, $2, ..."""
+    numbers = iter(range(1, query.count('%s') + 1))
+    return _PLACEHOLDER.sub(lambda match: f'${next(numbers)}', query)
+
+
+class StatementRegistry:
+    """Реестр запросов, которые подготавливаются на каждом соединении один раз."""
+
+    def __init__(self) -> None:
+        self._statements: Dict[str, Tuple[str, int]] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._statements
+
+    def register(self, name: str, query: str) -> str:
+        """Регистрация запроса.
+
+        Args:
+            name: Имя подготовленного запроса на сервере
+            query: Текст запроса с параметрами в стиле %s
+
+        Returns:
+            str: Имя запроса
+        """
+        if not re.fullmatch(r'[a-z_][a-z0-9_]*', name):
+            raise ValueError(f"Недопустимое имя запроса '{name}'")
+        self._statements[name] = (to_positional(query), query.count('%s'))
+        return name
+
+    def prepare(self, cur, prepared: Set[str], name: str) -> None:
+        """Подготовка запроса, если на этом соединении он еще не подготовлен."""
+        if name in prepared:
+            return
+        query, _ = self._statements[name]
+        cur.execute(f"PREPARE {name} AS {query}")
+        prepared.add(name)
+
+    def execute(self, cur, prepared: Set[str], name: str, params: tuple = ()) -> None:
+        """Выполнение запроса через EXECUTE с подготовкой при первом вызове.
+
+        Args:
+            cur: Курсор соединения
+            prepared: Имена запросов, уже подготовленных на этом соединении
+            name: Имя зарегистрированного запроса
+            params: Параметры запроса
+        """
+        _, count = self._statements[name]
+        if len(params) != count:
+            raise ValueError(f"Запрос '{name}' ожидает параметров: {count}, передано: {len(params)}")
+        self.prepare(cur, prepared, name)
+        if params:
+            cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * count)})", params)
+        else:
+            cur.execute(f"EXECUTE {name}")
+
+
+class PreparedConnection:
+    """Долгоживущее соединение вместе с именами подготовленных на нем запросов."""
+
+    def __init__(self, conn, registry: StatementRegistry) -> None:
+        self.conn = conn
+        self.registry = registry
+        self.prepared: Set[str] = set()
+
+    @property
+    def closed(self) -> bool:
+        return bool(self.conn.closed)
+
+    def cursor(self):
+        return self.conn.cursor()
+
+    def execute(self, cur, name: str, params: tuple = ()) -> None:
+        self.registry.execute(cur, self.prepared, name, params)
+
+    def close(self) -> None:
+        try:
+            self.conn.close()
+        except Exception as e:
+            print(f"Ошибка при закрытии соединения: {e}")
+
@@ -0,0 +1,197 @@
+"""Переносимые SQL запросы, общие для PostgreSQL и SQLite.
+
+Параметры запросов записываются в стиле ``%s``; хранилище SQLite заменяет
+их на ``?`` при подготовке запроса.
+"""
+
+# Словарь разделен на общую часть (owner_id IS NULL) и личные слова
+# пользователей (owner_id = user_id). Карточки строятся из объединения
+# общей части и личных слов текущего пользователя в активной языковой
+# паре: индексы обеих частей начинаются с pair_id, поэтому запрос
+# просматривает только слова своей пары, сколько бы пар ни добавилось.
+SQL_GET_RANDOM_WORD: str = """
+    SELECT w.word_id, w.word, w.translation 
+    FROM (
+        SELECT word_id, word, translation FROM words WHERE owner_id IS NULL AND pair_id = %s
+        UNION ALL
+        SELECT word_id, word, translation FROM words WHERE owner_id = %s AND pair_id = %s
+    ) w 
+    WHERE w.word_id NOT IN (
+        SELECT word_id FROM user_words WHERE user_id = %s
+    ) 
+    ORDER BY RANDOM() 
+    LIMIT 1
+"""
+
+SQL_GET_RANDOM_WORD_ALL: str = """
+    SELECT w.word_id, w.word, w.translation 
+    FROM (
+        SELECT word_id, word, translation FROM words WHERE owner_id IS NULL AND pair_id = %s
+        UNION ALL
+        SELECT word_id, word, translation FROM words WHERE owner_id = %s AND pair_id = %s
+    ) w 
+    LEFT JOIN user_words uw ON w.word_id = uw.word_id 
+    AND uw.user_id = %s 
+    WHERE uw.user_id IS NULL 
+    ORDER BY RANDOM() 
+    LIMIT 1
+"""
+
+SQL_GET_OTHER_WORDS: str = """
+    SELECT w.word 
+    FROM (
+        SELECT word_id, word FROM words WHERE owner_id IS NULL AND pair_id = %s
+        UNION ALL
+        SELECT word_id, word FROM words WHERE owner_id = %s AND pair_id = %s
+    ) w 
+    WHERE w.word_id != %s 
+    ORDER BY RANDOM() 
+    LIMIT %s
+"""
+
+# Выборка из колоды: индекс (deck_id, word_id) первичного ключа deck_words
+# ограничивает выборку словами колоды, а не всем словарем
+SQL_GET_RANDOM_DECK_WORD: str = """
+    SELECT w.word_id, w.word, w.translation 
+    FROM deck_words dw 
+    JOIN words w ON w.word_id = dw.word_id 
+    LEFT JOIN user_words uw ON dw.word_id = uw.word_id 
+    AND uw.user_id = %s 
+    WHERE dw.deck_id = %s 
+    AND (w.owner_id IS NULL OR w.owner_id = %s) 
+    AND uw.user_id IS NULL 
+    ORDER BY RANDOM() 
+    LIMIT 1
+"""
+
+SQL_GET_OTHER_DECK_WORDS: str = """
+    SELECT w.word 
+    FROM deck_words dw 
+    JOIN words w ON w.word_id = dw.word_id 
+    WHERE dw.deck_id = %s 
+    AND (w.owner_id IS NULL OR w.owner_id = %s) 
+    AND w.word_id != %s 
+    ORDER BY RANDOM() 
+    LIMIT %s
+"""
+
+SQL_GET_DECKS: str = """
+    SELECT d.deck_id, d.name, d.owner_id, COUNT(dw.word_id) 
+    FROM decks d 
+    LEFT JOIN deck_words dw ON dw.deck_id = d.deck_id 
+    WHERE d.pair_id = %s AND (d.owner_id IS NULL OR d.owner_id = %s) 
+    GROUP BY d.deck_id, d.name, d.owner_id 
+    ORDER BY d.owner_id NULLS FIRST, d.deck_id
+"""
+
+SQL_GET_DECK: str = """
+    SELECT deck_id, name, owner_id 
+    FROM decks 
+    WHERE deck_id = %s AND (owner_id IS NULL OR owner_id = %s)
+"""
+
+# Частичные индексы по LOWER(word) не подходят для условия
+# owner_id IS NULL OR owner_id = ..., поэтому части ищутся отдельно
+SQL_FIND_WORD: str = """
+    SELECT word_id FROM words WHERE pair_id = %s AND LOWER(word) = %s AND owner_id IS NULL
+    UNION ALL
+    SELECT word_id FROM words WHERE owner_id = %s AND pair_id = %s AND LOWER(word) = %s
+"""
+
+SQL_COUNT_USER_WORDS: str = """
+    SELECT COUNT(*) 
+    FROM user_words 
+    WHERE user_id = %s
+"""
+
+SQL_COUNT_PERSONAL_WORDS: str = """
+    SELECT COUNT(*) 
+    FROM words 
+    WHERE owner_id = %s AND pair_id = %s
+"""
+
+SQL_CHECK_USER_WORD: str = """
+    SELECT 1 
+    FROM user_words 
+    WHERE user_id = %s AND word_id = %s
+"""
+
+# Выученные слова среди кандидатов карточки: один запрос вместо проверки
+# каждого кандидата по отдельности
+SQL_GET_LEARNED_WORD_IDS: str = """
+    SELECT word_id 
+    FROM user_words 
+    WHERE user_id = %s AND word_id = ANY(%s)
+"""
+
+SQL_INSERT_USER_WORD: str = """
+    INSERT INTO user_words (user_id, word_id) 
+    VALUES (%s, %s)
+"""
+
+# Статистика ответов по словам для расчета сложности. Оконные функции
+# нумеруют ответы каждого пользователя на слово по времени: первый верный
+# ответ (corrects = 1) показывает, с какой попытки слово было угадано
+SQL_GET_ANSWER_STATS: str = """
+    WITH numbered AS (
+        SELECT word_id, correct, 
+            ROW_NUMBER() OVER w AS attempt, 
+            SUM(CASE WHEN correct THEN 1 ELSE 0 END) OVER w AS corrects 
+        FROM answer_events 
+        WINDOW w AS (
+            PARTITION BY user_id, word_id ORDER BY answered_at 
+            ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+        )
+    ) 
+    SELECT word_id, 
+        COUNT(*), 
+        SUM(CASE WHEN correct THEN 0 ELSE 1 END), 
+        AVG(CASE WHEN correct AND corrects = 1 THEN attempt * 1.0 END) 
+    FROM numbered 
+    GROUP BY word_id
+"""
+
+SQL_SET_WORD_DIFFICULTY: str = """
+    UPDATE words SET difficulty = %s WHERE word_id = %s
+"""
+
+# Взвешенная выборка идет по общим словам: личные слова показываются
+# в равновероятной части карточек
+SQL_GET_WORD_DIFFICULTIES: str = """
+    SELECT word_id, word, translation, difficulty 
+    FROM words 
+    WHERE owner_id IS NULL AND pair_id = %s 
+    ORDER BY word_id
+"""
+
+SQL_GET_DECK_WORD_DIFFICULTIES: str = """
+    SELECT w.word_id, w.word, w.translation, w.difficulty 
+    FROM deck_words dw 
+    JOIN words w ON w.word_id = dw.word_id 
+    WHERE dw.deck_id = %s AND w.owner_id IS NULL 
+    ORDER BY w.word_id
+"""
+
+# Текущая карточка хранится без внешнего ключа на words: удаленное слово
+# отбрасывается соединением, а удаление слов не проверяет таблицу users
+SQL_GET_CHAT_STATE: str = """
+    SELECT u.pair_id, u.deck_id, w.word_id, w.word, w.translation, u.accuracy 
+    FROM users u 
+    LEFT JOIN words w ON w.word_id = u.current_word_id 
+    WHERE u.user_id = %s
+"""
+
+SQL_SAVE_CHAT_STATE: str = """
+    UPDATE users SET current_word_id = %s, accuracy = %s WHERE user_id = %s
+"""
+
+SQL_GET_LANGUAGE_PAIRS: str = """
+    SELECT pair_id, source_lang, target_lang 
+    FROM language_pairs 
+    ORDER BY pair_id
+"""
+
+# Колода и текущая карточка относятся к прежней паре и сбрасываются
+SQL_SET_USER_PAIR: str = """
+    UPDATE users SET pair_id = %s, deck_id = NULL, current_word_id = NULL WHERE user_id = %s
+"""
@@ -0,0 +1,617 @@
+"""Встроенное хранилище SQLite для небольших установок без сервера базы данных."""
+import csv
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Iterator, List, Set, Tuple, Optional
+
+from englishcard.storage.base import (
+    DEFAULT_PAIR_ID,
+    INITIAL_DECKS,
+    INITIAL_LANGUAGE_PAIRS,
+    INITIAL_WORDS,
+    UNWANTED_WORDS,
+    AnswerEvent,
+    Storage,
+    read_deck_csv,
+    write_deck_csv,
+)
+from englishcard.storage.queries import (
+    SQL_CHECK_USER_WORD,
+    SQL_COUNT_PERSONAL_WORDS,
+    SQL_COUNT_USER_WORDS,
+    SQL_FIND_WORD,
+    SQL_GET_CHAT_STATE,
+    SQL_GET_DECK,
+    SQL_GET_DECKS,
+    SQL_GET_OTHER_DECK_WORDS,
+    SQL_GET_ANSWER_STATS,
+    SQL_GET_DECK_WORD_DIFFICULTIES,
+    SQL_GET_LANGUAGE_PAIRS,
+    SQL_GET_OTHER_WORDS,
+    SQL_GET_RANDOM_DECK_WORD,
+    SQL_GET_RANDOM_WORD,
+    SQL_GET_RANDOM_WORD_ALL,
+    SQL_GET_WORD_DIFFICULTIES,
+    SQL_INSERT_USER_WORD,
+    SQL_SAVE_CHAT_STATE,
+    SQL_SET_USER_PAIR,
+    SQL_SET_WORD_DIFFICULTY,
+)
+
+SQLITE_SCHEMA: str = f"""
+    CREATE TABLE IF NOT EXISTS language_pairs (
+        pair_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source_lang TEXT NOT NULL,
+        target_lang TEXT NOT NULL,
+        UNIQUE (source_lang, target_lang)
+    );
+
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY,
+        username TEXT,
+        deck_id INTEGER REFERENCES decks(deck_id) ON DELETE SET NULL,
+        current_word_id INTEGER,
+        accuracy REAL,
+        pair_id INTEGER NOT NULL DEFAULT {DEFAULT_PAIR_ID} REFERENCES language_pairs(pair_id)
+    );
+
+    CREATE TABLE IF NOT EXISTS words (
+        word_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        word TEXT NOT NULL,
+        translation TEXT NOT NULL,
+        owner_id INTEGER REFERENCES users(user_id) ON DELETE CASCADE,
+        difficulty REAL,
+        pair_id INTEGER NOT NULL DEFAULT {DEFAULT_PAIR_ID} REFERENCES language_pairs(pair_id)
+    );
+
+    CREATE TABLE IF NOT EXISTS user_words (
+        user_id INTEGER REFERENCES users(user_id),
+        word_id INTEGER REFERENCES words(word_id),
+        PRIMARY KEY (user_id, word_id)
+    );
+
+    CREATE INDEX IF NOT EXISTS user_words_word_idx ON user_words (word_id);
+
+    CREATE TABLE IF NOT EXISTS decks (
+        deck_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        owner_id INTEGER REFERENCES users(user_id) ON DELETE CASCADE,
+        pair_id INTEGER NOT NULL DEFAULT {DEFAULT_PAIR_ID} REFERENCES language_pairs(pair_id)
+    );
+
+    CREATE TABLE IF NOT EXISTS deck_words (
+        deck_id INTEGER REFERENCES decks(deck_id) ON DELETE CASCADE,
+        word_id INTEGER REFERENCES words(word_id) ON DELETE CASCADE,
+        PRIMARY KEY (deck_id, word_id)
+    );
+
+    CREATE INDEX IF NOT EXISTS deck_words_word_idx ON deck_words (word_id);
+
+    -- Журнал ответов: SQLite не поддерживает секционирование,
+    -- поэтому чтение по периоду идет по индексу времени ответа
+    CREATE TABLE IF NOT EXISTS answer_events (
+        user_id INTEGER NOT NULL,
+        word_id INTEGER NOT NULL,
+        mode TEXT NOT NULL,
+        correct INTEGER NOT NULL,
+        latency_ms INTEGER,
+        answered_at TEXT NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS answer_events_answered_at_idx ON answer_events (answered_at);
+"""
+
+# Индексы словаря и колод по языковой паре. Создаются после добавления
+# столбца pair_id в базы, созданные до появления языковых пар
+SQLITE_PAIR_INDEXES: str = """
+    DROP INDEX IF EXISTS words_shared_idx;
+    DROP INDEX IF EXISTS words_owner_idx;
+    DROP INDEX IF EXISTS words_lower_word_idx;
+    DROP INDEX IF EXISTS decks_shared_name_idx;
+    DROP INDEX IF EXISTS decks_owner_name_idx;
+
+    CREATE INDEX IF NOT EXISTS words_shared_pair_idx
+    ON words (pair_id, word_id) WHERE owner_id IS NULL;
+
+    CREATE INDEX IF NOT EXISTS words_owner_pair_idx
+    ON words (owner_id, pair_id, word_id) WHERE owner_id IS NOT NULL;
+
+    CREATE INDEX IF NOT EXISTS words_pair_lower_word_idx ON words (pair_id, LOWER(word));
+
+    CREATE UNIQUE INDEX IF NOT EXISTS decks_shared_pair_name_idx
+    ON decks (pair_id, name) WHERE owner_id IS NULL;
+
+    CREATE UNIQUE INDEX IF NOT EXISTS decks_owner_pair_name_idx
+    ON decks (owner_id, pair_id, name) WHERE owner_id IS NOT NULL;
+"""
+
+# Время хранится строкой фиксированной ширины в UTC, чтобы сравнение
+# строк совпадало со сравнением моментов времени
+TIMESTAMP_FORMAT: str = '%Y-%m-%d %H:%M:%S.%f'
+
+
+def _sqlite(query: str) -> str:
+    """Перевод параметров запроса из стиля %s в стиль SQLite."""
+    return query.replace('%s', '?')
+
+
+def _to_timestamp(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def _from_timestamp(value: str) -> datetime:
+    return datetime.strptime(value, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+
+
+class SQLiteStorage(Storage):
+    """Хранилище в файле SQLite (или в памяти при path=':memory:').
+
+    Используется одно соединение на все потоки, операции выполняются
+    под блокировкой.
+    """
+
+    def __init__(self, path: str = 'englishcard.db') -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._lock = threading.Lock()
+
+    def _execute(self, query: str, params: tuple = ()) -> sqlite3.Cursor:
+        return self._conn.execute(_sqlite(query), params)
+
+    def initialize(self) -> None:
+        try:
+            with self._lock, self._conn:
+                self._conn.executescript(SQLITE_SCHEMA)
+                # Базы, созданные до появления сложности слов
+                columns = {row[1] for row in self._conn.execute("PRAGMA table_info(words)")}
+                if 'difficulty' not in columns:
+                    self._conn.execute("ALTER TABLE words ADD COLUMN difficulty REAL")
+                # и состояния вытесненных из памяти чатов
+                columns = {row[1] for row in self._conn.execute("PRAGMA table_info(users)")}
+                if 'current_word_id' not in columns:
+                    self._conn.execute("ALTER TABLE users ADD COLUMN current_word_id INTEGER")
+                    self._conn.execute("ALTER TABLE users ADD COLUMN accuracy REAL")
+                # и языковых пар
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO language_pairs (pair_id, source_lang, target_lang) VALUES (?, ?, ?)",
+                    [(pair_id, *pair) for pair_id, pair in enumerate(INITIAL_LANGUAGE_PAIRS, DEFAULT_PAIR_ID)]
+                )
+                for table in ('users', 'words', 'decks'):
+                    columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+                    if 'pair_id' not in columns:
+                        # SQLite не добавляет столбец с внешним ключом и
+                        # значением по умолчанию, отличным от NULL
+                        self._conn.execute(
+                            f"ALTER TABLE {table} ADD COLUMN pair_id INTEGER NOT NULL "
+                            f"DEFAULT {DEFAULT_PAIR_ID}"
+                        )
+                self._conn.executescript(SQLITE_PAIR_INDEXES)
+                if self._conn.execute("SELECT 1 FROM words LIMIT 1").fetchone():
+                    return
+                self._conn.executemany(
+                    "INSERT INTO words (word, translation) VALUES (?, ?)",
+                    INITIAL_WORDS
+                )
+                for name, words in INITIAL_DECKS.items():
+                    deck_id = self._get_or_create_deck(name, None, DEFAULT_PAIR_ID)
+                    for word in words:
+                        self._conn.execute(
+                            "INSERT OR IGNORE INTO deck_words (deck_id, word_id) "
+                            "SELECT ?, word_id FROM words "
+                            "WHERE word = ? AND owner_id IS NULL AND pair_id = ?",
+                            (deck_id, word, DEFAULT_PAIR_ID)
+                        )
+            print("База данных успешно инициализирована")
+        except sqlite3.Error as error:
+            print(f"Ошибка при инициализации базы данных: {error}")
+
+    def delete_unwanted_words(self) -> bool:
+        placeholders = ', '.join('?' * len(UNWANTED_WORDS))
+        condition = f"LOWER(word) IN ({placeholders}) OR LOWER(translation) IN ({placeholders})"
+        params = UNWANTED_WORDS + UNWANTED_WORDS
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    f"DELETE FROM user_words WHERE word_id IN "
+                    f"(SELECT word_id FROM words WHERE {condition})",
+                    params
+                )
+                self._conn.execute(f"DELETE FROM words WHERE {condition}", params)
+            print("Нежелательные слова успешно удалены из базы данных")
+            return True
+        except sqlite3.Error as error:
+            print(f"Ошибка при удалении нежелательных слов: {error}")
+            return False
+
+    def ensure_user_exists(self, user_id: int, username: str | None) -> bool:
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO users (user_id, username) VALUES (?, ?)",
+                    (user_id, username)
+                )
+            return True
+        except sqlite3.Error as error:
+            print(f"Ошибка при проверке/создании пользователя: {error}")
+            return False
+
+    def get_language_pairs(self) -> List[Tuple[int, str, str]]:
+        try:
+            with self._lock:
+                return self._execute(SQL_GET_LANGUAGE_PAIRS).fetchall()
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении языковых пар: {e}")
+            return []
+
+    def create_language_pair(self, source_lang: str, target_lang: str) -> Optional[int]:
+        try:
+            with self._lock, self._conn:
+                # Пропущенная OR IGNORE вставка все равно расходует ID,
+                # поэтому существующая пара ищется заранее
+                row = self._conn.execute(
+                    "SELECT pair_id FROM language_pairs WHERE source_lang = ? AND target_lang = ?",
+                    (source_lang, target_lang)
+                ).fetchone()
+                if row:
+                    return row[0]
+                return self._conn.execute(
+                    "INSERT INTO language_pairs (source_lang, target_lang) VALUES (?, ?)",
+                    (source_lang, target_lang)
+                ).lastrowid
+        except sqlite3.Error as e:
+            print(f"Ошибка при создании языковой пары: {e}")
+            return None
+
+    def set_user_pair(self, user_id: int, pair_id: int) -> bool:
+        try:
+            with self._lock, self._conn:
+                # В базе, обновленной ALTER TABLE, у users.pair_id нет внешнего ключа
+                if not self._conn.execute(
+                        "SELECT 1 FROM language_pairs WHERE pair_id = ?", (pair_id,)).fetchone():
+                    return False
+                self._execute(SQL_SET_USER_PAIR, (pair_id, user_id))
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при выборе языковой пары: {e}")
+            return False
+
+    def reset_user_progress(self, user_id: int) -> None:
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM user_words WHERE user_id = ?", (user_id,))
+            print(f"Прогресс пользователя {user_id} сброшен")
+        except sqlite3.Error as error:
+            print(f"Ошибка при сбросе прогресса пользователя: {error}")
+
+    def get_random_word(self, user_id: int, show_all: bool = False, deck_id: Optional[int] = None,
+                        pair_id: int = DEFAULT_PAIR_ID) -> Tuple[int, str, str] | None:
+        try:
+            with self._lock:
+                if deck_id is not None:
+                    cur = self._execute(SQL_GET_RANDOM_DECK_WORD, (user_id, deck_id, user_id))
+                elif show_all:
+                    cur = self._execute(SQL_GET_RANDOM_WORD_ALL, (pair_id, user_id, pair_id, user_id))
+                else:
+                    cur = self._execute(SQL_GET_RANDOM_WORD, (pair_id, user_id, pair_id, user_id))
+                return cur.fetchone()
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении слова: {e}")
+            return None
+
+    def get_random_other_words(self, user_id: int, word_id: int, count: int = 3, deck_id: Optional[int] = None,
+                               pair_id: int = DEFAULT_PAIR_ID) -> List[Tuple[str]]:
+        try:
+            with self._lock:
+                other_words = []
+                if deck_id is not None:
+                    other_words = self._execute(
+                        SQL_GET_OTHER_DECK_WORDS, (deck_id, user_id, word_id, count)
+                    ).fetchall()
+                if len(other_words) < count:
+                    taken = {word for word, in other_words}
+                    other_words.extend(
+                        row for row in self._execute(
+                            SQL_GET_OTHER_WORDS, (pair_id, user_id, pair_id, word_id, count)
+                        ).fetchall()
+                        if row[0] not in taken
+                    )
+                return other_words[:count]
+        except sqlite3.Error as error:
+            print("Ошибка при получении других слов:", error)
+            return []
+
+    def add_user_word(self, user_id: int, word_id: int) -> bool:
+        try:
+            with self._lock, self._conn:
+                if self._execute(SQL_CHECK_USER_WORD, (user_id, word_id)).fetchone():
+                    return False
+                self._execute(SQL_INSERT_USER_WORD, (user_id, word_id))
+                return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при добавлении слова пользователю: {e}")
+            return False
+
+    def delete_user_word(self, user_id: int, word_id: int) -> Optional[bool]:
+        try:
+            with self._lock, self._conn:
+                cur = self._conn.execute(
+                    "DELETE FROM user_words WHERE user_id = ? AND word_id = ?",
+                    (user_id, word_id)
+                )
+                return cur.rowcount > 0
+        except sqlite3.Error as error:
+            print("Ошибка при удалении слова у пользователя:", error)
+            return None
+
+    def get_user_words_count(self, user_id: int) -> int:
+        try:
+            with self._lock:
+                return self._execute(SQL_COUNT_USER_WORDS, (user_id,)).fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Ошибка при подсчете слов пользователя: {e}")
+            return 0
+
+    def get_personal_words_count(self, user_id: int, pair_id: int = DEFAULT_PAIR_ID) -> int:
+        try:
+            with self._lock:
+                return self._execute(SQL_COUNT_PERSONAL_WORDS, (user_id, pair_id)).fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Ошибка при подсчете личных слов пользователя: {e}")
+            return 0
+
+    def find_word(self, user_id: int, word: str, pair_id: int = DEFAULT_PAIR_ID) -> Optional[int]:
+        try:
+            with self._lock:
+                row = self._execute(SQL_FIND_WORD, (pair_id, word, user_id, pair_id, word)).fetchone()
+                return row[0] if row else None
+        except sqlite3.Error as e:
+            print(f"Ошибка при поиске слова: {e}")
+            return None
+
+    def add_personal_word(self, user_id: int, word: str, translation: str, deck_id: Optional[int] = None,
+                          pair_id: int = DEFAULT_PAIR_ID) -> Optional[int]:
+        try:
+            with self._lock, self._conn:
+                word_id = self._conn.execute(
+                    "INSERT INTO words (word, translation, owner_id, pair_id) VALUES (?, ?, ?, ?)",
+                    (word, translation, user_id, pair_id)
+                ).lastrowid
+                if deck_id is not None:
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO deck_words (deck_id, word_id) "
+                        "SELECT deck_id, ? FROM decks WHERE deck_id = ? AND owner_id = ? AND pair_id = ?",
+                        (word_id, deck_id, user_id, pair_id)
+                    )
+                return word_id
+        except sqlite3.Error as e:
+            print(f"Ошибка при добавлении слова в личный словарь: {e}")
+            return None
+
+    def get_user_deck(self, user_id: int) -> Optional[int]:
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT deck_id FROM users WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                return row[0] if row else None
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении колоды пользователя: {e}")
+            return None
+
+    def set_user_deck(self, user_id: int, deck_id: Optional[int]) -> bool:
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "UPDATE users SET deck_id = ? WHERE user_id = ?", (deck_id, user_id)
+                )
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при выборе колоды: {e}")
+            return False
+
+    def get_chat_state(self, user_id: int
+                       ) -> Tuple[int, Optional[int], Optional[int], Optional[str], Optional[str],
+                                  Optional[float]] | None:
+        try:
+            with self._lock:
+                return self._execute(SQL_GET_CHAT_STATE, (user_id,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Ошибка при восстановлении состояния чата: {e}")
+            return None
+
+    def save_chat_states(self, states: List[Tuple[int, Optional[int], Optional[float]]]) -> bool:
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    _sqlite(SQL_SAVE_CHAT_STATE),
+                    [(word_id, accuracy, user_id) for user_id, word_id, accuracy in states]
+                )
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при сохранении состояния чатов: {e}")
+            return False
+
+    def get_decks(self, user_id: int, pair_id: int = DEFAULT_PAIR_ID) -> List[Tuple[int, str, Optional[int], int]]:
+        try:
+            with self._lock:
+                return self._execute(SQL_GET_DECKS, (pair_id, user_id)).fetchall()
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении колод: {e}")
+            return []
+
+    def get_deck(self, user_id: int, deck_id: int) -> Tuple[int, str, Optional[int]] | None:
+        try:
+            with self._lock:
+                return self._execute(SQL_GET_DECK, (deck_id, user_id)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении колоды: {e}")
+            return None
+
+    def create_deck(self, name: str, owner_id: Optional[int], pair_id: int = DEFAULT_PAIR_ID) -> Optional[int]:
+        try:
+            with self._lock, self._conn:
+                return self._get_or_create_deck(name, owner_id, pair_id)
+        except sqlite3.Error as e:
+            print(f"Ошибка при создании колоды: {e}")
+            return None
+
+    def _get_or_create_deck(self, name: str, owner_id: Optional[int], pair_id: int) -> int:
+        row = self._conn.execute(
+            "SELECT deck_id FROM decks WHERE pair_id = ? AND name = ? AND owner_id IS ?",
+            (pair_id, name, owner_id)
+        ).fetchone()
+        if row:
+            return row[0]
+        return self._conn.execute(
+            "INSERT INTO decks (name, owner_id, pair_id) VALUES (?, ?, ?)", (name, owner_id, pair_id)
+        ).lastrowid
+
+    def export_deck(self, user_id: int, deck_id: int) -> Optional[bytes]:
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT w.word, w.translation FROM deck_words dw "
+                    "JOIN words w ON w.word_id = dw.word_id "
+                    "WHERE dw.deck_id = ? AND (w.owner_id IS NULL OR w.owner_id = ?) "
+                    "ORDER BY w.word_id",
+                    (deck_id, user_id)
+                ).fetchall()
+            return write_deck_csv(rows)
+        except sqlite3.Error as e:
+            print(f"Ошибка при выгрузке колоды: {e}")
+            return None
+
+    def import_deck(self, name: str, data: bytes, owner_id: Optional[int],
+                    pair_id: int = DEFAULT_PAIR_ID) -> Tuple[int, int] | None:
+        try:
+            rows = read_deck_csv(data)
+            with self._lock, self._conn:
+                deck_id = self._get_or_create_deck(name, owner_id, pair_id)
+                added = 0
+                for word, translation in rows:
+                    row = self._execute(SQL_FIND_WORD, (pair_id, word, owner_id, pair_id, word)).fetchone()
+                    if row:
+                        word_id = row[0]
+                    else:
+                        word_id = self._conn.execute(
+                            "INSERT INTO words (word, translation, owner_id, pair_id) VALUES (?, ?, ?, ?)",
+                            (word, translation, owner_id, pair_id)
+                        ).lastrowid
+                    added += self._conn.execute(
+                        "INSERT OR IGNORE INTO deck_words (deck_id, word_id) VALUES (?, ?)",
+                        (deck_id, word_id)
+                    ).rowcount
+                return deck_id, added
+        except (sqlite3.Error, ValueError, csv.Error) as e:
+            print(f"Ошибка при загрузке колоды: {e}")
+            return None
+
+    def delete_word_from_database(self, word_id: int, user_id: int, is_admin: bool = False) -> bool:
+        if is_admin:
+            scope = "(owner_id IS NULL OR owner_id = ?)"
+        else:
+            scope = "owner_id = ?"
+
+        try:
+            with self._lock, self._conn:
+                if not self._conn.execute(
+                    f"SELECT 1 FROM words WHERE word_id = ? AND {scope}", (word_id, user_id)
+                ).fetchone():
+                    return False
+                self._conn.execute("DELETE FROM user_words WHERE word_id = ?", (word_id,))
+                self._conn.execute("DELETE FROM words WHERE word_id = ?", (word_id,))
+                return True
+        except sqlite3.Error as error:
+            print(f"Ошибка при удалении слова из базы: {error}")
+            return False
+
+    def is_word_learned(self, user_id: int, word_id: int) -> bool:
+        try:
+            with self._lock:
+                return self._execute(SQL_CHECK_USER_WORD, (user_id, word_id)).fetchone() is not None
+        except sqlite3.Error as e:
+            print(f"Ошибка при проверке выученного слова: {e}")
+            return False
+
+    def get_learned_word_ids(self, user_id: int, word_ids: List[int]) -> Optional[Set[int]]:
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT word_id FROM user_words "
+                    f"WHERE user_id = ? AND word_id IN ({', '.join('?' * len(word_ids))})",
+                    (user_id, *word_ids)
+                ).fetchall()
+            return {row[0] for row in rows}
+        except sqlite3.Error as e:
+            print(f"Ошибка при проверке выученных слов: {e}")
+            return None
+
+    def get_answer_stats(self) -> List[Tuple[int, int, int, Optional[float]]]:
+        try:
+            with self._lock:
+                return self._execute(SQL_GET_ANSWER_STATS).fetchall()
+        except sqlite3.Error as e:
+            print(f"Ошибка при расчете статистики ответов: {e}")
+            return []
+
+    def set_word_difficulties(self, difficulties: List[Tuple[int, float]]) -> bool:
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    _sqlite(SQL_SET_WORD_DIFFICULTY),
+                    [(difficulty, word_id) for word_id, difficulty in difficulties]
+                )
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при сохранении сложности слов: {e}")
+            return False
+
+    def get_word_difficulties(self, deck_id: Optional[int] = None, pair_id: int = DEFAULT_PAIR_ID
+                              ) -> List[Tuple[int, str, str, Optional[float]]]:
+        try:
+            with self._lock:
+                if deck_id is not None:
+                    return self._execute(SQL_GET_DECK_WORD_DIFFICULTIES, (deck_id,)).fetchall()
+                return self._execute(SQL_GET_WORD_DIFFICULTIES, (pair_id,)).fetchall()
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении сложности слов: {e}")
+            return []
+
+    def add_answer_events(self, events: List[AnswerEvent]) -> bool:
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT INTO answer_events "
+                    "(user_id, word_id, mode, correct, latency_ms, answered_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(*event[:5], _to_timestamp(event.answered_at)) for event in events]
+                )
+            return True
+        except sqlite3.Error as error:
+            print(f"Ошибка при записи журнала ответов: {error}")
+            return False
+
+    def iter_answer_events(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                           chunk_size: int = 10000) -> Iterator[List[AnswerEvent]]:
+        # Части читаются отдельными запросами от последней прочитанной строки,
+        # чтобы не держать блокировку соединения между частями
+        last = (_to_timestamp(since) if since else '', 0)
+        end = _to_timestamp(until) if until else '9999'
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT rowid, user_id, word_id, mode, correct, latency_ms, answered_at "
+                    "FROM answer_events "
+                    "WHERE (answered_at, rowid) > (?, ?) AND answered_at < ? "
+                    "ORDER BY answered_at, rowid LIMIT ?",
+                    (*last, end, chunk_size)
+                ).fetchall()
+            if not rows:
+                return
+            last = (rows[-1][6], rows[-1][0])
+            yield [
+                AnswerEvent(user_id, word_id, mode, bool(correct), latency_ms, _from_timestamp(answered_at))
+                for _, user_id, word_id, mode, correct, latency_ms, answered_at in rows
+            ]